@@ -0,0 +1,250 @@
+"""Двухуровневый кэш: LRU в памяти процесса перед общим кэшем.
+
+L1 небольшой и живёт недолго (L1_TIMEOUT), L2 — любой кэш из CACHES,
+общий для всех воркеров (файловый, БД, memcached). Каждая запись и
+удаление публикуются в журнал в L2: счётчик SEQUENCE_KEY и ключи
+JOURNAL_PREFIX<номер>. Раз в SYNC_INTERVAL воркер дочитывает журнал и
+выбрасывает из своего L1 изменённые ключи; если журнал потерян или
+отстал больше чем на JOURNAL_SIZE записей, L1 очищается целиком.
+Заодно счётчики попаданий процесса складываются в L2 (см. cache_stats).
+Если L2 не умеет атомарный incr (файловый кэш), запись журнала может
+потеряться в гонке; тогда чужой L1 отстаёт не дольше L1_TIMEOUT.
+"""
+import pickle
+import threading
+import time
+from collections import Counter, OrderedDict
+
+from django.core.cache import caches
+from django.core.cache.backends.base import DEFAULT_TIMEOUT, BaseCache
+
+SEQUENCE_KEY = 'two-tier:sequence'
+JOURNAL_PREFIX = 'two-tier:journal:'
+STATS_PREFIX = 'two-tier:stats:'
+JOURNAL_SIZE = 1000
+JOURNAL_TIMEOUT = 300
+CLEAR_ALL = '*'
+STAT_NAMES = ('l1_hits', 'l2_hits', 'misses')
+
+_tiers = {}
+_tiers_lock = threading.Lock()
+
+
+class LocalTier:
+    """L1 одного процесса; общий для всех потоков, как LocMemCache."""
+
+    def __init__(self):
+        self.entries = OrderedDict()
+        self.lock = threading.Lock()
+        self.seen = None
+        self.next_sync = 0
+        self.stats = Counter()
+        self.unflushed = Counter()
+
+    def get(self, key):
+        with self.lock:
+            entry = self.entries.get(key)
+            if entry is None:
+                return None
+            if entry[1] <= time.monotonic():
+                del self.entries[key]
+                return None
+            self.entries.move_to_end(key)
+            return entry[0]
+
+    def set(self, key, pickled, lifetime, max_entries):
+        with self.lock:
+            self.entries[key] = (pickled, time.monotonic() + lifetime)
+            self.entries.move_to_end(key)
+            while len(self.entries) > max_entries:
+                self.entries.popitem(last=False)
+
+    def discard(self, keys):
+        with self.lock:
+            if CLEAR_ALL in keys:
+                self.entries.clear()
+            for key in keys:
+                self.entries.pop(key, None)
+
+    def count(self, name):
+        with self.lock:
+            self.stats[name] += 1
+            self.unflushed[name] += 1
+
+
+class TwoTierCache(BaseCache):
+    """LOCATION — имя кэша из CACHES, который служит общим L2."""
+
+    def __init__(self, location, params):
+        super().__init__(params)
+        options = params.get('OPTIONS', {})
+        self.l2_alias = location
+        self.l1_max_entries = options.get('L1_MAX_ENTRIES', 1000)
+        self.l1_timeout = options.get('L1_TIMEOUT', 5)
+        self.sync_interval = options.get('SYNC_INTERVAL', 0.5)
+        with _tiers_lock:
+            self.tier = _tiers.setdefault(location, LocalTier())
+
+    @property
+    def l2(self):
+        return caches[self.l2_alias]
+
+    def l1_lifetime(self, timeout):
+        timeout = self.get_backend_timeout(timeout)
+        if timeout is None:
+            return self.l1_timeout
+        return min(self.l1_timeout, timeout - time.time())
+
+    def remember(self, key, value, timeout=DEFAULT_TIMEOUT):
+        lifetime = self.l1_lifetime(timeout)
+        if lifetime > 0:
+            self.tier.set(
+                key, pickle.dumps(value, pickle.HIGHEST_PROTOCOL),
+                lifetime, self.l1_max_entries
+            )
+
+    def get(self, key, default=None, version=None):
+        self.sync()
+        made_key = self.make_key(key, version)
+        pickled = self.tier.get(made_key)
+        if pickled is not None:
+            self.tier.count('l1_hits')
+            return pickle.loads(pickled)
+        value = self.l2.get(key, self, version)
+        if value is self:
+            self.tier.count('misses')
+            return default
+        self.tier.count('l2_hits')
+        self.remember(made_key, value)
+        return value
+
+    def get_many(self, keys, version=None):
+        self.sync()
+        found = {}
+        missing = []
+        for key in keys:
+            pickled = self.tier.get(self.make_key(key, version))
+            if pickled is None:
+                missing.append(key)
+            else:
+                self.tier.count('l1_hits')
+                found[key] = pickle.loads(pickled)
+        if missing:
+            fetched = self.l2.get_many(missing, version)
+            for key, value in fetched.items():
+                self.tier.count('l2_hits')
+                self.remember(self.make_key(key, version), value)
+            for _ in range(len(missing) - len(fetched)):
+                self.tier.count('misses')
+            found.update(fetched)
+        return found
+
+    def set(self, key, value, timeout=DEFAULT_TIMEOUT, version=None):
+        self.l2.set(key, value, timeout, version)
+        self.publish([self.make_key(key, version)])
+        self.remember(self.make_key(key, version), value, timeout)
+
+    def set_many(self, data, timeout=DEFAULT_TIMEOUT, version=None):
+        failed = self.l2.set_many(data, timeout, version)
+        self.publish([self.make_key(key, version) for key in data])
+        for key, value in data.items():
+            if key not in failed:
+                self.remember(self.make_key(key, version), value, timeout)
+        return failed
+
+    def add(self, key, value, timeout=DEFAULT_TIMEOUT, version=None):
+        added = self.l2.add(key, value, timeout, version)
+        if added:
+            self.publish([self.make_key(key, version)])
+        return added
+
+    def touch(self, key, timeout=DEFAULT_TIMEOUT, version=None):
+        return self.l2.touch(key, timeout, version)
+
+    def incr(self, key, delta=1, version=None):
+        value = self.l2.incr(key, delta, version)
+        self.publish([self.make_key(key, version)])
+        return value
+
+    def delete(self, key, version=None):
+        self.l2.delete(key, version)
+        self.publish([self.make_key(key, version)])
+
+    def delete_many(self, keys, version=None):
+        self.l2.delete_many(keys, version)
+        self.publish([self.make_key(key, version) for key in keys])
+
+    def clear(self):
+        self.l2.clear()
+        self.publish([CLEAR_ALL])
+
+    def publish(self, made_keys):
+        """Пишет ключи в журнал и сразу убирает их из своего L1."""
+        self.tier.discard(made_keys)
+        l2 = self.l2
+        try:
+            sequence = l2.incr(SEQUENCE_KEY)
+        except ValueError:
+            l2.add(SEQUENCE_KEY, 0, None)
+            sequence = l2.incr(SEQUENCE_KEY)
+        l2.set(f'{JOURNAL_PREFIX}{sequence}', made_keys, JOURNAL_TIMEOUT)
+        if self.tier.seen == sequence - 1:
+            # Журнал прочитан до этой записи, свою запись читать незачем.
+            self.tier.seen = sequence
+
+    def sync(self):
+        """Дочитывает журнал инвалидаций не чаще SYNC_INTERVAL."""
+        tier = self.tier
+        now = time.monotonic()
+        if now < tier.next_sync:
+            return
+        tier.next_sync = now + self.sync_interval
+        l2 = self.l2
+        sequence = l2.get(SEQUENCE_KEY, 0)
+        seen, tier.seen = tier.seen, sequence
+        if seen is None:
+            # До первой сверки в L1 только собственные записи процесса.
+            seen = sequence
+        if sequence < seen or sequence - seen > JOURNAL_SIZE:
+            tier.discard([CLEAR_ALL])
+        elif sequence > seen:
+            journal = l2.get_many([
+                f'{JOURNAL_PREFIX}{number}'
+                for number in range(seen + 1, sequence + 1)
+            ])
+            if len(journal) < sequence - seen:
+                tier.discard([CLEAR_ALL])
+            for made_keys in journal.values():
+                tier.discard(made_keys)
+        self.flush_stats()
+
+    def flush_stats(self):
+        with self.tier.lock:
+            unflushed = self.tier.unflushed
+            self.tier.unflushed = Counter()
+        l2 = self.l2
+        for name, value in unflushed.items():
+            l2.add(f'{STATS_PREFIX}{name}', 0, None)
+            try:
+                l2.incr(f'{STATS_PREFIX}{name}', value)
+            except ValueError:
+                pass
+
+    def stats(self, shared=False):
+        """Попадания по уровням: этого процесса или всех (shared=True)."""
+        if shared:
+            self.flush_stats()
+            stored = self.l2.get_many(
+                [f'{STATS_PREFIX}{name}' for name in STAT_NAMES]
+            )
+            counts = {
+                name: stored.get(f'{STATS_PREFIX}{name}', 0)
+                for name in STAT_NAMES
+            }
+        else:
+            counts = {name: self.tier.stats[name] for name in STAT_NAMES}
+        total = sum(counts.values())
+        counts['l1_hit_rate'] = counts['l1_hits'] / total if total else 0
+        counts['l2_hit_rate'] = counts['l2_hits'] / total if total else 0
+        counts['l1_size'] = len(self.tier.entries)
+        return counts
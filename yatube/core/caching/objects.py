@@ -0,0 +1,63 @@
+"""Сквозной кэш объектов по уникальному полю.
+
+Значение поля отображается в pk, pk в сам объект. Так переименование
+объекта не оставляет в кэше записи, найденной по старому имени: она
+указывает на pk, а объект по pk проверяется на совпадение поля.
+Отсутствующие объекты кэшируются коротко, чтобы перебор несуществующих
+адресов не доходил до базы.
+"""
+from hashlib import md5
+
+from django.core.cache import cache
+from django.db.models.signals import post_delete, post_save
+from django.http import Http404
+
+OBJECT_TIMEOUT = 60 * 60
+MISSING_TIMEOUT = 30
+MISSING = 'missing'
+
+
+def object_key(model, pk):
+    return f'obj:{model._meta.label_lower}:pk:{pk}'
+
+
+def lookup_key(model, field, value):
+    digest = md5(str(value).encode()).hexdigest()
+    return f'obj:{model._meta.label_lower}:{field}:{digest}'
+
+
+def cached_get_object_or_404(model, **lookup):
+    """get_object_or_404 по одному уникальному полю через кэш."""
+    (field, value), = lookup.items()
+    key = lookup_key(model, field, value)
+    pk = cache.get(key)
+    if pk == MISSING:
+        raise Http404(f'No {model._meta.object_name} matches the query.')
+    if pk is not None:
+        obj = cache.get(object_key(model, pk))
+        if obj is not None and getattr(obj, field) == value:
+            return obj
+    try:
+        obj = model._default_manager.get(**lookup)
+    except model.DoesNotExist:
+        cache.set(key, MISSING, MISSING_TIMEOUT)
+        raise Http404(f'No {model._meta.object_name} matches the query.')
+    cache.set_many(
+        {key: obj.pk, object_key(model, obj.pk): obj}, OBJECT_TIMEOUT
+    )
+    return obj
+
+
+def register(model, field):
+    """Сбрасывает кэш объекта модели при его сохранении и удалении."""
+    def forget(sender, instance, **kwargs):
+        cache.delete_many([
+            object_key(model, instance.pk),
+            lookup_key(model, field, getattr(instance, field)),
+        ])
+
+    dispatch_uid = f'object_cache:{model._meta.label_lower}:{field}'
+    for signal in (post_save, post_delete):
+        signal.connect(
+            forget, sender=model, weak=False, dispatch_uid=dispatch_uid
+        )
@@ -0,0 +1,105 @@
+"""Пересборка кэша одним запросом вместо всех сразу.
+
+Значение хранится вместе со сроком годности и временем сборки и живёт в
+кэше дольше этого срока, на STALE_SECONDS. Незадолго до срока запрос
+с вероятностью, растущей к концу срока и с ценой сборки, берётся за
+пересборку заранее (XFetch). Пересобирает один лидер: внутри процесса его
+ждут через Event, между процессами ключ блокировки ставится cache.add.
+Остальные отдают устаревшую копию, а если её нет, недолго ждут свежую.
+"""
+import math
+import random
+import threading
+import time
+from collections import namedtuple
+
+from django.core.cache import cache as default_cache
+
+STALE_SECONDS = 60
+LOCK_TIMEOUT = 30
+WAIT_SECONDS = 2
+POLL_SECONDS = 0.05
+BETA = 1.0
+
+Entry = namedtuple('Entry', 'value expires delta')
+
+_flights = {}
+_flights_lock = threading.Lock()
+
+
+class Flight:
+    def __init__(self):
+        self.done = threading.Event()
+        self.value = None
+        self.failed = False
+
+
+def is_fresh(entry, beta=BETA):
+    """Свежее ли значение с учётом вероятностного раннего истечения."""
+    early = -entry.delta * beta * math.log(1 - random.random())
+    return time.time() + early < entry.expires
+
+
+def get_or_build(key, build, timeout, cache=None, beta=BETA):
+    """Значение по ключу; build() вызывается не чаще одного раза на ключ.
+
+    timeout=None хранит значение бессрочно, как в cache.set.
+    """
+    cache = cache or default_cache
+    entry = cache.get(key)
+    if isinstance(entry, Entry) and is_fresh(entry, beta):
+        return entry.value
+    if not isinstance(entry, Entry):
+        entry = None
+    with _flights_lock:
+        flight = _flights.get(key)
+        leader = flight is None
+        if leader:
+            flight = _flights[key] = Flight()
+    if not leader:
+        if entry is not None:
+            return entry.value
+        if flight.done.wait(WAIT_SECONDS) and not flight.failed:
+            return flight.value
+        return build()
+    try:
+        flight.value = build_once(cache, key, build, timeout, entry)
+        return flight.value
+    except BaseException:
+        flight.failed = True
+        raise
+    finally:
+        with _flights_lock:
+            del _flights[key]
+        flight.done.set()
+
+
+def build_once(cache, key, build, timeout, entry):
+    """Сборка под межпроцессной блокировкой."""
+    lock_key = f'{key}:lock'
+    locked = cache.add(lock_key, 1, LOCK_TIMEOUT)
+    if not locked:
+        if entry is not None:
+            return entry.value
+        deadline = time.monotonic() + WAIT_SECONDS
+        while time.monotonic() < deadline:
+            time.sleep(POLL_SECONDS)
+            entry = cache.get(key)
+            if isinstance(entry, Entry):
+                return entry.value
+    try:
+        started = time.monotonic()
+        value = build()
+        delta = time.monotonic() - started
+        if timeout is None:
+            cache.set(key, Entry(value, math.inf, delta), None)
+        else:
+            cache.set(
+                key, Entry(value, time.time() + timeout, delta),
+                timeout + STALE_SECONDS
+            )
+        return value
+    finally:
+        # Чужую блокировку не снимаем, даже если не дождались сборки.
+        if locked:
+            cache.delete(lock_key)
@@ -0,0 +1,9 @@
+from posts.notifications import unread_count
+
+
+def unread_notifications(request):
+    """Счётчик непрочитанных уведомлений; считается, только если нужен."""
+    user = getattr(request, 'user', None)
+    if user is None or not user.is_authenticated:
+        return {}
+    return {'unread_notifications': lambda: unread_count(user)}
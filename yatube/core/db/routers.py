@@ -0,0 +1,34 @@
+"""Маршрутизация чтения на реплики с гарантией read-your-writes.
+
+Запросы к представлениям из REPLICA_READ_VIEWS читают с реплик из
+DATABASE_REPLICAS, всё остальное работает с основной базой. Запрос,
+который что-то записал, закрепляет пользователя за основной базой на
+REPLICA_PIN_SECONDS через cookie, чтобы он сразу увидел свои изменения,
+даже если реплика ещё не догнала основную базу.
+"""
+import random
+from contextvars import ContextVar
+
+from django.conf import settings
+from django.db import DEFAULT_DB_ALIAS
+
+read_from_replicas = ContextVar('read_from_replicas', default=False)
+wrote_to_primary = ContextVar('wrote_to_primary', default=False)
+
+
+class ReplicaRouter:
+
+    def db_for_read(self, model, **hints):
+        if settings.DATABASE_REPLICAS and read_from_replicas.get():
+            return random.choice(settings.DATABASE_REPLICAS)
+        return DEFAULT_DB_ALIAS
+
+    def db_for_write(self, model, **hints):
+        wrote_to_primary.set(True)
+        return DEFAULT_DB_ALIAS
+
+    def allow_relation(self, obj1, obj2, **hints):
+        return True
+
+    def allow_migrate(self, db, app_label, model_name=None, **hints):
+        return db not in settings.DATABASE_REPLICAS
@@ -0,0 +1,98 @@
+"""SQLite-бэкенд с настройкой соединения для боевой нагрузки.
+
+Каждое новое соединение получает набор PRAGMA из OPTIONS['pragmas']
+(по умолчанию WAL, busy_timeout, mmap и др.), а ошибки «database is
+locked» вне транзакции повторяются с экспоненциальной паузой.
+"""
+import time
+
+from django.db.backends.sqlite3 import base
+
+Database = base.Database
+
+DEFAULT_PRAGMAS = {
+    'journal_mode': 'WAL',
+    'synchronous': 'NORMAL',
+    'busy_timeout': 5000,
+    'mmap_size': 256 * 1024 * 1024,
+    'cache_size': -20000,
+    'temp_store': 'MEMORY',
+}
+LOCKED_MESSAGE = 'database is locked'
+OWN_OPTIONS = ('pragmas', 'lock_retries', 'lock_backoff')
+
+
+def apply_pragmas(connection, pragmas):
+    for name, value in pragmas.items():
+        connection.execute(f'PRAGMA {name} = {value}')
+
+
+def call_with_retries(method, args, retries, backoff, can_retry):
+    delay = backoff
+    for attempt in range(retries + 1):
+        try:
+            return method(*args)
+        except Database.OperationalError as error:
+            if (
+                attempt == retries
+                or LOCKED_MESSAGE not in str(error)
+                or not can_retry()
+            ):
+                raise
+            time.sleep(delay)
+            delay *= 2
+
+
+class SQLiteCursorWrapper(base.SQLiteCursorWrapper):
+    """Курсор, повторяющий запросы при блокировке базы."""
+
+    def execute(self, query, params=None):
+        return self.retry(super().execute, query, params)
+
+    def executemany(self, query, param_list):
+        return self.retry(super().executemany, query, param_list)
+
+    def retry(self, method, *args):
+        wrapper = self.wrapper
+        return call_with_retries(
+            method, args,
+            retries=wrapper.lock_retries,
+            backoff=wrapper.lock_backoff,
+            # Внутри транзакции SQLite требует отката, повтор не поможет.
+            can_retry=lambda: not wrapper.in_atomic_block,
+        )
+
+
+class DatabaseWrapper(base.DatabaseWrapper):
+
+    @property
+    def own_options(self):
+        return self.settings_dict['OPTIONS']
+
+    @property
+    def pragmas(self):
+        return self.own_options.get('pragmas', DEFAULT_PRAGMAS)
+
+    @property
+    def lock_retries(self):
+        return self.own_options.get('lock_retries', 5)
+
+    @property
+    def lock_backoff(self):
+        return self.own_options.get('lock_backoff', 0.05)
+
+    def get_connection_params(self):
+        params = super().get_connection_params()
+        for option in OWN_OPTIONS:
+            params.pop(option, None)
+        return params
+
+    def get_new_connection(self, conn_params):
+        connection = super().get_new_connection(conn_params)
+        apply_pragmas(connection, self.pragmas)
+        return connection
+
+    def create_cursor(self, name=None):
+        cursor = self.connection.cursor(factory=SQLiteCursorWrapper)
+        cursor.wrapper = self
+        return cursor
@@ -0,0 +1,41 @@
+import os
+import tempfile
+
+from PIL import Image, ImageOps
+
+JPEG_QUALITY = 85
+
+
+def normalize(path, max_side):
+    """Поворачивает по EXIF, убирает метаданные и ужимает большую сторону.
+
+    Файл заменяется атомарно. Анимации и картинки, которым нечего менять,
+    остаются как есть; возвращает True, если файл переписан.
+    """
+    with Image.open(path) as image:
+        image_format = image.format
+        exif = image.getexif()
+        if getattr(image, 'is_animated', False) or (
+            not exif and max(image.size) <= max_side
+        ):
+            return False
+        if image_format == 'JPEG':
+            # JPEG декодируется сразу в уменьшенном масштабе.
+            image.draft('RGB', (max_side, max_side))
+        icc_profile = image.info.get('icc_profile')
+        normalized = ImageOps.exif_transpose(image)
+    normalized.thumbnail((max_side, max_side))
+    options = {'optimize': True}
+    if icc_profile:
+        options['icc_profile'] = icc_profile
+    if image_format == 'JPEG':
+        options['quality'] = JPEG_QUALITY
+    descriptor, temp_path = tempfile.mkstemp(dir=os.path.dirname(path))
+    try:
+        with os.fdopen(descriptor, 'wb') as target:
+            normalized.save(target, format=image_format, **options)
+        os.replace(temp_path, path)
+    except BaseException:
+        os.remove(temp_path)
+        raise
+    return True
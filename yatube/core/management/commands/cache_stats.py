@@ -0,0 +1,19 @@
+from django.core.cache import cache
+from django.core.management.base import BaseCommand, CommandError
+
+
+class Command(BaseCommand):
+    help = (
+        'Показывает долю попаданий в L1 и L2 двухуровневого кэша, '
+        'сложенную по всем воркерам.'
+    )
+
+    def handle(self, *args, **options):
+        if not hasattr(cache, 'stats'):
+            raise CommandError('Кэш default не двухуровневый.')
+        stats = cache.stats(shared=True)
+        self.stdout.write(
+            f"L1: {stats['l1_hits']} ({stats['l1_hit_rate']:.1%}), "
+            f"L2: {stats['l2_hits']} ({stats['l2_hit_rate']:.1%}), "
+            f"промахи: {stats['misses']}"
+        )
@@ -0,0 +1,71 @@
+import time
+
+from django.conf import settings
+from django.core.management.base import BaseCommand
+from django.utils import timezone
+from sorl.thumbnail import default as thumbnail
+from sorl.thumbnail.images import ImageFile
+
+from core.images import normalize
+from core.models import StoredFile
+from core.storage import media_storage
+from posts.cache import touch_feeds
+from posts.models import Post
+from posts.sharding import post_databases
+
+
+class Command(BaseCommand):
+    help = (
+        'Фоновый обработчик загруженных картинок: поворот по EXIF, удаление '
+        'метаданных и ограничение размера IMAGE_MAX_SIDE. С --interval '
+        'работает постоянно и забирает новые файлы.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--interval', type=float, default=0,
+            help='Пауза между проходами в секундах; 0 - один проход.'
+        )
+        parser.add_argument('--chunk-size', type=int, default=100)
+
+    def handle(self, *args, interval, chunk_size, **options):
+        while True:
+            processed = self.process(chunk_size)
+            if processed:
+                self.stdout.write(f'Обработано картинок: {processed}')
+            if not interval:
+                break
+            if processed < chunk_size:
+                time.sleep(interval)
+
+    def process(self, chunk_size):
+        pending = list(StoredFile.objects.filter(
+            normalized=False
+        ).values_list('pk', 'name')[:chunk_size])
+        for pk, name in pending:
+            try:
+                changed = normalize(
+                    media_storage.path(name), settings.IMAGE_MAX_SIDE
+                )
+            except OSError as error:
+                self.stderr.write(f'{name}: {error}')
+                changed = False
+            if changed:
+                # Старые миниатюры построены по необработанному файлу.
+                thumbnail.kvstore.delete_thumbnails(
+                    ImageFile(name, media_storage)
+                )
+                refresh_cards(name)
+            StoredFile.objects.filter(pk=pk).update(normalized=True)
+        return len(pending)
+
+
+def refresh_cards(name):
+    """Карточки в кэше ссылаются на удалённые миниатюры: новое updated
+    меняет ключ карточки, и её соберут с новыми миниатюрами."""
+    now = timezone.now()
+    for using in post_databases():
+        posts = Post.objects.using(using).filter(image=name)
+        for post in posts.only('pk', 'author_id', 'group_id'):
+            touch_feeds(post)
+        posts.update(updated=now)
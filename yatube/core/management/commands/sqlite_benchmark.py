@@ -0,0 +1,100 @@
+import os
+import sqlite3
+import tempfile
+import threading
+import time
+
+from django.core.management.base import BaseCommand
+
+from core.db.sqlite3.base import DEFAULT_PRAGMAS, apply_pragmas
+
+SEED_ROWS = 10000
+
+
+def connect(path, pragmas):
+    connection = sqlite3.connect(path, check_same_thread=False)
+    apply_pragmas(connection, pragmas)
+    return connection
+
+
+def read(connection):
+    connection.execute(
+        'SELECT id, text FROM post ORDER BY id DESC LIMIT 10'
+    ).fetchall()
+
+
+def write(connection):
+    with connection:
+        connection.execute('INSERT INTO post (text) VALUES (?)', ('x' * 200,))
+
+
+def work(path, pragmas, operation, stop, counters, name, lock):
+    connection = connect(path, pragmas)
+    while not stop.is_set():
+        try:
+            operation(connection)
+            result = name
+        except sqlite3.OperationalError:
+            result = 'errors'
+        with lock:
+            counters[result] += 1
+    connection.close()
+
+
+def run(path, pragmas, readers, writers, duration):
+    """Число чтений и записей за duration секунд."""
+    stop = threading.Event()
+    lock = threading.Lock()
+    counters = {'reads': 0, 'writes': 0, 'errors': 0}
+    jobs = [(read, 'reads')] * readers + [(write, 'writes')] * writers
+    threads = [
+        threading.Thread(
+            target=work,
+            args=(path, pragmas, operation, stop, counters, name, lock)
+        )
+        for operation, name in jobs
+    ]
+    for thread in threads:
+        thread.start()
+    time.sleep(duration)
+    stop.set()
+    for thread in threads:
+        thread.join()
+    return counters
+
+
+def prepare(path, pragmas):
+    connection = connect(path, pragmas)
+    with connection:
+        connection.execute(
+            'CREATE TABLE post (id INTEGER PRIMARY KEY, text TEXT)'
+        )
+        connection.executemany(
+            'INSERT INTO post (text) VALUES (?)',
+            (('x' * 200,) for _ in range(SEED_ROWS))
+        )
+    connection.close()
+
+
+class Command(BaseCommand):
+    help = (
+        'Сравнивает пропускную способность чтения SQLite при конкурентных '
+        'записях без настроек соединения и с PRAGMA из core.db.sqlite3.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--readers', type=int, default=4)
+        parser.add_argument('--writers', type=int, default=2)
+        parser.add_argument('--duration', type=float, default=3)
+
+    def handle(self, *args, readers, writers, duration, **options):
+        for title, pragmas in (('до', {}), ('после', DEFAULT_PRAGMAS)):
+            with tempfile.TemporaryDirectory() as directory:
+                path = os.path.join(directory, 'bench.sqlite3')
+                prepare(path, pragmas)
+                counters = run(path, pragmas, readers, writers, duration)
+            self.stdout.write(
+                f'{title}: чтений/с {counters["reads"] / duration:.0f}, '
+                f'записей/с {counters["writes"] / duration:.0f}, '
+                f'ошибок {counters["errors"]}'
+            )
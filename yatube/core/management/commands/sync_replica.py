@@ -0,0 +1,40 @@
+import sqlite3
+import time
+
+from django.conf import settings
+from django.core.management.base import BaseCommand
+from django.db import DEFAULT_DB_ALIAS
+
+
+class Command(BaseCommand):
+    help = (
+        'Копирует основную SQLite-базу в файлы реплик из DATABASE_REPLICAS '
+        'через online backup API. С --interval повторяет копирование.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--interval', type=float, default=0,
+            help='Пауза между синхронизациями в секундах; 0 - один раз.'
+        )
+        parser.add_argument('--pages', type=int, default=1024)
+
+    def handle(self, *args, interval, pages, **options):
+        while True:
+            self.sync(pages)
+            if not interval:
+                break
+            time.sleep(interval)
+
+    def sync(self, pages):
+        source = sqlite3.connect(settings.DATABASES[DEFAULT_DB_ALIAS]['NAME'])
+        try:
+            for alias in settings.DATABASE_REPLICAS:
+                target = sqlite3.connect(settings.DATABASES[alias]['NAME'])
+                try:
+                    source.backup(target, pages=pages)
+                finally:
+                    target.close()
+                self.stdout.write(f'Реплика {alias} синхронизирована')
+        finally:
+            source.close()
@@ -0,0 +1,116 @@
+import mimetypes
+import os
+import re
+import time
+
+from django.conf import settings
+from django.core.exceptions import SuspiciousFileOperation
+from django.http import FileResponse, HttpResponseNotModified
+from django.utils._os import safe_join
+from django.utils.http import http_date
+from django.views.static import was_modified_since
+
+from core.db.routers import read_from_replicas, wrote_to_primary
+
+PIN_COOKIE = 'primary_pin'
+# Имена вида app.1a2b3c4d5e6f.css от ManifestStaticFilesStorage.
+HASHED_NAME = re.compile(r'\.[0-9a-f]{12}\.[^/]+$')
+IMMUTABLE_CACHE = 'public, max-age=31536000, immutable'
+REVALIDATE_CACHE = 'public, max-age=60'
+
+
+class ReadReplicaMiddleware:
+    """Включает чтение с реплик для REPLICA_READ_VIEWS.
+
+    После запроса с записью ставит cookie, которая на время
+    REPLICA_PIN_SECONDS оставляет пользователя на основной базе.
+    """
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        read_token = read_from_replicas.set(False)
+        write_token = wrote_to_primary.set(False)
+        try:
+            response = self.get_response(request)
+            if wrote_to_primary.get() and settings.DATABASE_REPLICAS:
+                pin_until = time.time() + settings.REPLICA_PIN_SECONDS
+                response.set_cookie(
+                    PIN_COOKIE, str(pin_until),
+                    max_age=settings.REPLICA_PIN_SECONDS, httponly=True
+                )
+            return response
+        finally:
+            read_from_replicas.reset(read_token)
+            wrote_to_primary.reset(write_token)
+
+    def process_view(self, request, view_func, view_args, view_kwargs):
+        if (
+            request.method in ('GET', 'HEAD')
+            and request.resolver_match.view_name
+            in settings.REPLICA_READ_VIEWS
+            and not self.is_pinned(request)
+        ):
+            read_from_replicas.set(True)
+
+    @staticmethod
+    def is_pinned(request):
+        try:
+            return float(request.COOKIES[PIN_COOKIE]) > time.time()
+        except (KeyError, ValueError):
+            return False
+
+
+class StaticFilesMiddleware:
+    """Раздаёт STATIC_ROOT из процесса без обращения к URLconf.
+
+    Файлы с хэшем в имени кэшируются навсегда, остальные ненадолго.
+    Клиенту, принимающему gzip, уходит заранее сжатая .gz-копия.
+    FileResponse передаёт файл серверу через wsgi.file_wrapper, и тот
+    может отдать его через sendfile без копирования в Python.
+    """
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        response = None
+        if (
+            settings.STATIC_ROOT
+            and request.method in ('GET', 'HEAD')
+            and request.path.startswith(settings.STATIC_URL)
+        ):
+            response = self.serve(request)
+        return response or self.get_response(request)
+
+    def serve(self, request):
+        name = request.path[len(settings.STATIC_URL):]
+        try:
+            path = safe_join(settings.STATIC_ROOT, name)
+        except SuspiciousFileOperation:
+            return None
+        if not os.path.isfile(path):
+            return None
+        stat = os.stat(path)
+        if not was_modified_since(
+            request.META.get('HTTP_IF_MODIFIED_SINCE'),
+            stat.st_mtime, stat.st_size
+        ):
+            return HttpResponseNotModified()
+        content_type, encoding = mimetypes.guess_type(path)
+        accepts_gzip = 'gzip' in request.META.get('HTTP_ACCEPT_ENCODING', '')
+        if accepts_gzip and encoding is None and os.path.isfile(f'{path}.gz'):
+            response = FileResponse(open(f'{path}.gz', 'rb'))
+            response['Content-Encoding'] = 'gzip'
+            response['Content-Length'] = os.path.getsize(f'{path}.gz')
+        else:
+            response = FileResponse(open(path, 'rb'))
+            response['Content-Length'] = stat.st_size
+        response['Content-Type'] = content_type or 'application/octet-stream'
+        response['Last-Modified'] = http_date(stat.st_mtime)
+        response['Vary'] = 'Accept-Encoding'
+        response['Cache-Control'] = (
+            IMMUTABLE_CACHE if HASHED_NAME.search(name) else REVALIDATE_CACHE
+        )
+        return response
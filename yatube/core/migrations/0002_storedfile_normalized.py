@@ -0,0 +1,18 @@
+# Generated by Django 2.2.16 on 2026-10-19 10:33
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0001_initial'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='storedfile',
+            name='normalized',
+            field=models.BooleanField(db_index=True, default=False),
+        ),
+    ]
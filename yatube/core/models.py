@@ -0,0 +1,12 @@
+from django.db import models
+
+
+class StoredFile(models.Model):
+    """Счётчик ссылок на файл в ContentAddressedStorage."""
+    name = models.CharField(max_length=255, unique=True)
+    refs = models.PositiveIntegerField(default=0)
+    # Файл уже обработан normalize_images.
+    normalized = models.BooleanField(default=False, db_index=True)
+
+    def __str__(self):
+        return self.name
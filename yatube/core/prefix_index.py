@@ -0,0 +1,138 @@
+"""Префиксный индекс в памяти процесса для автодополнения.
+
+Пары (ключ, id) лежат в отсортированном массиве: поиск префикса — два
+bisect, вставка и удаление — bisect и сдвиг массива. Результаты
+упорядочены по рангу, при равенстве — по ключу. В широком диапазоне
+(больше SCAN_LIMIT пар) лучшие id префикса считаются один раз. Правка
+объекта трогает только топы префиксов его ключей: поднявшийся объект
+вставляется в топ на место, а топ, из которого объект ушёл или в котором
+опустился, пересчитается при следующем поиске.
+"""
+import heapq
+from bisect import bisect_left, insort
+from threading import RLock
+
+SCAN_LIMIT = 500
+# Больше любого символа ключа: граница диапазона префикса.
+PREFIX_END = '\U0010ffff'
+
+
+class PrefixIndex:
+    def __init__(self, items=(), limit=10):
+        """items — (id, ключи, значение, подпись, ранг)."""
+        self.limit = limit
+        self.lock = RLock()
+        self.entries = {}
+        self.ranks = {}
+        self.pairs = []
+        for pk, keys, value, label, rank in items:
+            keys = self.normalize(keys)
+            self.entries[pk] = (keys, value, label)
+            self.ranks[pk] = rank
+            self.pairs.extend((key, pk) for key in keys)
+        self.pairs.sort()
+        self.top = {}
+
+    @staticmethod
+    def normalize(keys):
+        return tuple(sorted({key.lower() for key in keys if key}))
+
+    def __len__(self):
+        return len(self.entries)
+
+    def best(self, start, stop, limit):
+        """Лучшие id диапазона по (-ранг, позиция), без повторов."""
+        ranked = heapq.nsmallest(
+            limit * 2, range(start, stop),
+            key=lambda position: (
+                -self.ranks[self.pairs[position][1]], position
+            )
+        )
+        pks = dict.fromkeys(self.pairs[position][1] for position in ranked)
+        return list(pks)[:limit]
+
+    def search(self, prefix, limit=None):
+        """[(id, значение, подпись)] для ключей, начинающихся с prefix."""
+        prefix = prefix.lower()
+        limit = min(limit or self.limit, self.limit)
+        with self.lock:
+            start = bisect_left(self.pairs, (prefix,))
+            stop = bisect_left(self.pairs, (prefix + PREFIX_END,), start)
+            if stop - start <= SCAN_LIMIT:
+                pks = self.best(start, stop, limit)
+            else:
+                if prefix not in self.top:
+                    self.top[prefix] = self.best(start, stop, self.limit)
+                pks = self.top[prefix][:limit]
+            return [(pk, *self.entries[pk][1:]) for pk in pks]
+
+    def put(self, pk, keys, value, label, rank=None):
+        """Добавляет или обновляет объект; False, если он не изменился.
+
+        Без rank у обновлённого объекта остаётся прежний ранг.
+        """
+        keys = self.normalize(keys)
+        with self.lock:
+            if self.entries.get(pk) == (keys, value, label) and (
+                rank is None or rank == self.ranks[pk]
+            ):
+                return False
+            old_rank = self.ranks.get(pk, 0)
+            self.remove(pk)
+            self.entries[pk] = (keys, value, label)
+            self.ranks[pk] = old_rank if rank is None else rank
+            for key in keys:
+                insort(self.pairs, (key, pk))
+            self.raise_in_top(pk)
+            return True
+
+    def remove(self, pk):
+        """Убирает объект; False, если его не было."""
+        with self.lock:
+            entry = self.entries.get(pk)
+            if entry is None:
+                return False
+            self.drop_top(pk)
+            del self.entries[pk]
+            del self.ranks[pk]
+            for key in entry[0]:
+                del self.pairs[bisect_left(self.pairs, (key, pk))]
+            return True
+
+    def shift_rank(self, pk, delta):
+        with self.lock:
+            if pk not in self.ranks:
+                return
+            if delta < 0:
+                self.drop_top(pk)
+            self.ranks[pk] += delta
+            if delta > 0:
+                self.raise_in_top(pk)
+
+    def top_prefixes(self, pk):
+        keys = self.entries[pk][0]
+        return [
+            prefix for prefix in self.top
+            if any(key.startswith(prefix) for key in keys)
+        ]
+
+    def order(self, pk, prefix):
+        """Место объекта в выдаче префикса, как у best()."""
+        key = min(
+            key for key in self.entries[pk][0] if key.startswith(prefix)
+        )
+        return -self.ranks[pk], key, pk
+
+    def raise_in_top(self, pk):
+        """Объект появился или поднялся: остальные в топах не сдвинулись."""
+        for prefix in self.top_prefixes(pk):
+            pks = set(self.top[prefix]) | {pk}
+            self.top[prefix] = sorted(
+                pks, key=lambda other: self.order(other, prefix)
+            )[:self.limit]
+
+    def drop_top(self, pk):
+        """Объект ушёл из топа или опустился: его место неизвестно."""
+        for prefix in self.top_prefixes(pk):
+            if pk in self.top[prefix]:
+                del self.top[prefix]
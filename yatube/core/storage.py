@@ -0,0 +1,122 @@
+import gzip
+import hashlib
+import os
+import posixpath
+
+from django.contrib.staticfiles.storage import ManifestStaticFilesStorage
+from django.core.files import File
+from django.core.files.storage import FileSystemStorage
+from django.db import transaction
+from django.db.models import F
+
+from .models import StoredFile
+
+COMPRESSIBLE_EXTENSIONS = (
+    '.css', '.js', '.svg', '.html', '.txt', '.json', '.xml', '.ico', '.map',
+)
+
+
+class CompressedManifestStaticFilesStorage(ManifestStaticFilesStorage):
+    """Хэш в именах файлов и готовые .gz-копии, собранные collectstatic.
+
+    Если файла нет в манифесте (разработка, тесты без collectstatic),
+    {% static %} отдаёт исходное имя вместо ошибки.
+    """
+
+    def stored_name(self, name):
+        try:
+            return super().stored_name(name)
+        except ValueError:
+            return name
+
+    def post_process(self, *args, **kwargs):
+        yield from super().post_process(*args, **kwargs)
+        if kwargs.get('dry_run'):
+            return
+        for name, hashed_name in self.hashed_files.items():
+            for path in {name, hashed_name}:
+                if path.endswith(COMPRESSIBLE_EXTENSIONS):
+                    self.compress(self.path(path))
+
+    @staticmethod
+    def compress(path):
+        """Пишет path.gz, если сжатие действительно уменьшает файл."""
+        with open(path, 'rb') as source:
+            content = source.read()
+        compressed = gzip.compress(content, compresslevel=9, mtime=0)
+        if len(compressed) < len(content):
+            with open(f'{path}.gz', 'wb') as target:
+                target.write(compressed)
+        elif os.path.exists(f'{path}.gz'):
+            os.remove(f'{path}.gz')
+
+
+class ContentAddressedStorage(FileSystemStorage):
+    """Файлы с именем по sha256 содержимого, по одной копии на картинку.
+
+    Путь раскладывается на два уровня подкаталогов (posts/ab/cd/abcd….gif),
+    чтобы каталоги не разрастались. Каждое сохранение добавляет ссылку
+    в StoredFile, delete() снимает её, а файл удаляется вместе с последней.
+    Миниатюры sorl-thumbnail привязаны к имени исходника, поэтому для уже
+    виденного содержимого они берутся из хранилища ключей, а не строятся.
+    """
+
+    def hashed_name(self, name, content):
+        # HashingUploadHandler уже посчитал хэш, пока принимал файл.
+        hexdigest = getattr(content, 'sha256', None)
+        if hexdigest is None:
+            digest = hashlib.sha256()
+            for chunk in content.chunks():
+                digest.update(chunk)
+            content.seek(0)
+            hexdigest = digest.hexdigest()
+        directory = posixpath.dirname(name.replace('\\', '/'))
+        extension = os.path.splitext(name)[1].lower()
+        return posixpath.join(
+            directory, hexdigest[:2], hexdigest[2:4], hexdigest + extension
+        )
+
+    def save(self, name, content, max_length=None):
+        if name is None:
+            name = content.name
+        if not hasattr(content, 'chunks'):
+            content = File(content, name)
+        name = self.hashed_name(name, content)
+        with transaction.atomic():
+            stored, created = StoredFile.objects.select_for_update(
+            ).get_or_create(name=name)
+            if self.exists(name):
+                # Свежий mtime не даёт media_gc удалить файл, который
+                # только что снова понадобился.
+                os.utime(self.path(name))
+            else:
+                name = self._save(name, content)
+            StoredFile.objects.filter(pk=stored.pk).update(
+                refs=F('refs') + 1
+            )
+        return name
+
+    def delete(self, name):
+        """Снимает ссылку; чужие файлы без StoredFile не трогает."""
+        with transaction.atomic():
+            StoredFile.objects.filter(name=name, refs__gt=0).update(
+                refs=F('refs') - 1
+            )
+            released, _ = StoredFile.objects.filter(
+                name=name, refs=0
+            ).delete()
+            if released:
+                super().delete(name)
+
+    def purge(self, name):
+        """Удаляет файл и его счётчик, не глядя на ссылки (для media_gc)."""
+        StoredFile.objects.filter(name=name).delete()
+        super().delete(name)
+
+    def references(self, name):
+        return StoredFile.objects.filter(name=name).values_list(
+            'refs', flat=True
+        ).first() or 0
+
+
+media_storage = ContentAddressedStorage()
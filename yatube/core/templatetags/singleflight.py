@@ -0,0 +1,40 @@
+from django import template
+from django.core.cache import InvalidCacheBackendError, caches
+from django.core.cache.utils import make_template_fragment_key
+from django.templatetags import cache as cache_tags
+
+from core.caching.singleflight import get_or_build
+
+register = template.Library()
+
+
+class SingleFlightCacheNode(cache_tags.CacheNode):
+    def render(self, context):
+        expire_time = self.expire_time_var.resolve(context)
+        if expire_time is not None:
+            expire_time = int(expire_time)
+        if self.cache_name:
+            fragment_cache = caches[self.cache_name.resolve(context)]
+        else:
+            try:
+                fragment_cache = caches['template_fragments']
+            except InvalidCacheBackendError:
+                fragment_cache = caches['default']
+        vary_on = [var.resolve(context) for var in self.vary_on]
+        return get_or_build(
+            make_template_fragment_key(self.fragment_name, vary_on),
+            lambda: self.nodelist.render(context),
+            expire_time,
+            cache=fragment_cache
+        )
+
+
+@register.tag('cache')
+def do_cache(parser, token):
+    """{% cache %} с тем же синтаксисом, но фрагмент пересобирает
+    один запрос, а остальные получают прежнюю копию."""
+    node = cache_tags.do_cache(parser, token)
+    return SingleFlightCacheNode(
+        node.nodelist, node.expire_time_var, node.fragment_name,
+        node.vary_on, node.cache_name
+    )
@@ -0,0 +1,71 @@
+from django.test import SimpleTestCase
+
+from core.prefix_index import SCAN_LIMIT, PrefixIndex
+
+
+class PrefixIndexTests(SimpleTestCase):
+    def setUp(self):
+        self.index = PrefixIndex([
+            (1, ['anna', 'Анна'], 'anna', 'Анна', 3),
+            (2, ['andrey'], 'andrey', 'andrey', 10),
+            (3, ['boris'], 'boris', 'boris', 50),
+            (4, ['ann'], 'ann', 'ann', 3),
+        ])
+
+    def test_search_ranks_by_rank_then_key(self):
+        self.assertEqual(
+            [pk for pk, *_ in self.index.search('AN')], [2, 4, 1]
+        )
+        self.assertEqual(self.index.search('анн'), [(1, 'anna', 'Анна')])
+        self.assertEqual(self.index.search('x'), [])
+        self.assertEqual(len(self.index.search('', limit=2)), 2)
+
+    def test_put_remove_and_shift_rank(self):
+        self.assertFalse(self.index.put(3, ['boris'], 'boris', 'boris'))
+        self.assertTrue(self.index.put(3, ['anton'], 'anton', 'Антон'))
+        self.assertEqual(self.index.search('an')[0], (3, 'anton', 'Антон'))
+        self.assertEqual(self.index.search('bor'), [])
+        self.assertTrue(self.index.remove(3))
+        self.assertFalse(self.index.remove(3))
+        self.index.shift_rank(1, 1)
+        self.assertEqual(
+            [pk for pk, *_ in self.index.search('an')], [2, 1, 4]
+        )
+        self.assertEqual(sorted(self.index.pairs), self.index.pairs)
+
+    def test_wide_prefix_uses_cached_top(self):
+        index = PrefixIndex(
+            [
+                (pk, [f'user{pk}'], f'user{pk}', '', pk)
+                for pk in range(SCAN_LIMIT * 2)
+            ],
+            limit=5
+        )
+        self.assertEqual(
+            [pk for pk, *_ in index.search('user')],
+            list(range(SCAN_LIMIT * 2 - 1, SCAN_LIMIT * 2 - 6, -1))
+        )
+        self.assertIn('user', index.top)
+        index.put(SCAN_LIMIT * 2, ['user'], 'user', '', 10 ** 6)
+        self.assertEqual(index.search('user', 1)[0][0], SCAN_LIMIT * 2)
+
+    def test_changes_touch_only_affected_tops(self):
+        index = PrefixIndex(
+            [
+                (pk, [f'user{pk}'], f'user{pk}', '', pk)
+                for pk in range(SCAN_LIMIT * 2)
+            ],
+            limit=3
+        )
+        index.search('user')
+        index.shift_rank(5, 10 ** 6)
+        self.assertIn('user', index.top)
+        self.assertEqual(index.search('user', 1)[0][0], 5)
+        index.remove(7)
+        self.assertIn('user', index.top)
+        index.shift_rank(5, -10 ** 6)
+        self.assertNotIn('user', index.top)
+        self.assertEqual(
+            [pk for pk, *_ in index.search('user')],
+            [SCAN_LIMIT * 2 - 1, SCAN_LIMIT * 2 - 2, SCAN_LIMIT * 2 - 3]
+        )
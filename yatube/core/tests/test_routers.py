@@ -0,0 +1,52 @@
+from django.contrib.auth import get_user_model
+from django.test import TestCase, override_settings
+from django.urls import reverse
+
+from core.db.routers import ReplicaRouter, read_from_replicas
+from core.middleware import PIN_COOKIE
+from posts.models import Post
+
+User = get_user_model()
+
+
+class ReplicaRouterTests(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.user = User.objects.create_user(username='replica_user')
+        cls.post = Post.objects.create(author=cls.user, text='Текст')
+
+    def setUp(self):
+        self.client.force_login(self.user)
+
+    @override_settings(DATABASE_REPLICAS=['replica'])
+    def test_reads_go_to_replica_only_when_enabled(self):
+        router = ReplicaRouter()
+        self.assertEqual(router.db_for_read(Post), 'default')
+        token = read_from_replicas.set(True)
+        try:
+            self.assertEqual(router.db_for_read(Post), 'replica')
+        finally:
+            read_from_replicas.reset(token)
+        self.assertEqual(router.db_for_write(Post), 'default')
+        self.assertFalse(router.allow_migrate('replica', 'posts'))
+
+    @override_settings(DATABASE_REPLICAS=['replica'])
+    def test_write_pins_user_to_primary(self):
+        """После записи пользователь читает с основной базы."""
+        response = self.client.post(
+            reverse('posts:add_comment', args=[self.post.pk]),
+            {'text': 'Комментарий'}
+        )
+        self.assertIn(PIN_COOKIE, response.cookies)
+        response = self.client.get(
+            reverse('posts:post_detail', args=[self.post.pk])
+        )
+        self.assertContains(response, 'Комментарий')
+
+    def test_no_pin_without_replicas(self):
+        response = self.client.post(
+            reverse('posts:add_comment', args=[self.post.pk]),
+            {'text': 'Комментарий'}
+        )
+        self.assertNotIn(PIN_COOKIE, response.cookies)
@@ -0,0 +1,69 @@
+import threading
+import time
+from unittest import mock
+
+from django.core.cache import cache
+from django.template import Context, Template
+from django.test import SimpleTestCase
+
+from core.caching.singleflight import Entry, get_or_build, is_fresh
+
+
+class SingleFlightTests(SimpleTestCase):
+    def setUp(self):
+        cache.clear()
+
+    def test_concurrent_misses_build_once(self):
+        calls = []
+
+        def build():
+            calls.append(1)
+            time.sleep(0.2)
+            return 'страница'
+
+        results = []
+        threads = [
+            threading.Thread(
+                target=lambda: results.append(get_or_build('hot', build, 20))
+            )
+            for _ in range(8)
+        ]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        self.assertEqual(len(calls), 1)
+        self.assertEqual(results, ['страница'] * 8)
+
+    def test_stale_copy_while_other_process_rebuilds(self):
+        cache.set('hot', Entry('старое', time.time() - 1, 0.1), 60)
+        cache.add('hot:lock', 1)
+        build = mock.Mock(return_value='новое')
+        self.assertEqual(get_or_build('hot', build, 20), 'старое')
+        build.assert_not_called()
+
+    @mock.patch('core.caching.singleflight.WAIT_SECONDS', 0.1)
+    def test_wait_timeout_keeps_other_process_lock(self):
+        cache.add('hot:lock', 1)
+        self.assertEqual(get_or_build('hot', lambda: 'новое', 20), 'новое')
+        self.assertEqual(cache.get('hot:lock'), 1)
+
+    def test_rebuilds_expired_value(self):
+        cache.set('hot', Entry('старое', time.time() - 1, 0.1), 60)
+        self.assertEqual(get_or_build('hot', lambda: 'новое', 20), 'новое')
+        self.assertEqual(cache.get('hot').value, 'новое')
+        self.assertIsNone(cache.get('hot:lock'))
+
+    @mock.patch('core.caching.singleflight.random.random', return_value=0.5)
+    def test_early_expiry_depends_on_build_cost(self, random):
+        expires = time.time() + 10
+        self.assertTrue(is_fresh(Entry('x', expires, 0.01)))
+        self.assertFalse(is_fresh(Entry('x', expires, 60)))
+
+    def test_template_fragment(self):
+        template = Template(
+            '{% load singleflight %}{% cache 20 fragment %}{{ x }}'
+            '{% endcache %}'
+        )
+        self.assertEqual(template.render(Context({'x': 1})), '1')
+        self.assertEqual(template.render(Context({'x': 2})), '1')
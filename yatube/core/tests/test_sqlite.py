@@ -0,0 +1,44 @@
+from unittest import mock
+
+from django.db import connection
+from django.test import SimpleTestCase, TestCase
+
+from core.db.sqlite3.base import Database, call_with_retries
+
+
+class SQLitePragmasTests(TestCase):
+    def test_pragmas_are_applied(self):
+        """Новое соединение получает PRAGMA из настроек."""
+        with connection.cursor() as cursor:
+            cursor.execute('PRAGMA busy_timeout')
+            self.assertEqual(cursor.fetchone()[0], 5000)
+            cursor.execute('PRAGMA temp_store')
+            self.assertEqual(cursor.fetchone()[0], 2)
+
+
+class LockRetryTests(SimpleTestCase):
+    def setUp(self):
+        self.method = mock.Mock(side_effect=[
+            Database.OperationalError('database is locked'),
+            Database.OperationalError('database is locked'),
+            'result',
+        ])
+
+    @mock.patch('core.db.sqlite3.base.time.sleep')
+    def test_locked_query_is_retried_with_backoff(self, sleep):
+        result = call_with_retries(
+            self.method, (), retries=5, backoff=0.1, can_retry=lambda: True
+        )
+        self.assertEqual(result, 'result')
+        self.assertEqual(
+            [call.args[0] for call in sleep.call_args_list], [0.1, 0.2]
+        )
+
+    @mock.patch('core.db.sqlite3.base.time.sleep')
+    def test_no_retry_inside_transaction(self, sleep):
+        with self.assertRaises(Database.OperationalError):
+            call_with_retries(
+                self.method, (), retries=5, backoff=0.1,
+                can_retry=lambda: False
+            )
+        sleep.assert_not_called()
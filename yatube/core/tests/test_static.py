@@ -0,0 +1,68 @@
+import gzip
+import json
+import os
+import shutil
+import tempfile
+
+from django.core.management import call_command
+from django.test import SimpleTestCase, override_settings
+
+from core.middleware import IMMUTABLE_CACHE, REVALIDATE_CACHE
+
+SOURCE_DIR = tempfile.mkdtemp()
+STATIC_ROOT = tempfile.mkdtemp()
+CSS = 'body { color: #333; }\n' * 50
+
+
+@override_settings(STATICFILES_DIRS=[SOURCE_DIR], STATIC_ROOT=STATIC_ROOT)
+class StaticPipelineTests(SimpleTestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        with open(os.path.join(SOURCE_DIR, 'site.css'), 'w') as css:
+            css.write(CSS)
+        call_command('collectstatic', interactive=False, verbosity=0)
+        with open(os.path.join(STATIC_ROOT, 'staticfiles.json')) as manifest:
+            cls.hashed = json.load(manifest)['paths']['site.css']
+
+    @classmethod
+    def tearDownClass(cls):
+        shutil.rmtree(SOURCE_DIR, ignore_errors=True)
+        shutil.rmtree(STATIC_ROOT, ignore_errors=True)
+        super().tearDownClass()
+
+    def test_collectstatic_writes_hashed_and_gzip_copies(self):
+        self.assertRegex(self.hashed, r'^site\.[0-9a-f]{12}\.css$')
+        with gzip.open(os.path.join(STATIC_ROOT, f'{self.hashed}.gz')) as gz:
+            self.assertEqual(gz.read().decode(), CSS)
+
+    def test_hashed_file_is_immutable_and_gzipped(self):
+        response = self.client.get(
+            f'/static/{self.hashed}', HTTP_ACCEPT_ENCODING='gzip, br'
+        )
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response['Cache-Control'], IMMUTABLE_CACHE)
+        self.assertEqual(response['Content-Encoding'], 'gzip')
+        self.assertEqual(response['Vary'], 'Accept-Encoding')
+        self.assertEqual(
+            gzip.decompress(b''.join(response.streaming_content)).decode(),
+            CSS
+        )
+
+    def test_plain_name_without_gzip(self):
+        response = self.client.get('/static/site.css')
+        self.assertEqual(response['Cache-Control'], REVALIDATE_CACHE)
+        self.assertFalse(response.has_header('Content-Encoding'))
+        self.assertEqual(b''.join(response.streaming_content).decode(), CSS)
+
+    def test_not_modified(self):
+        response = self.client.get('/static/site.css')
+        response = self.client.get(
+            '/static/site.css',
+            HTTP_IF_MODIFIED_SINCE=response['Last-Modified']
+        )
+        self.assertEqual(response.status_code, 304)
+
+    def test_path_outside_static_root_is_not_served(self):
+        response = self.client.get('/static/../manage.py')
+        self.assertEqual(response.status_code, 404)
@@ -0,0 +1,92 @@
+import hashlib
+import os
+import shutil
+import tempfile
+
+from django.contrib.auth import get_user_model
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.test import TestCase, override_settings
+
+from core.models import StoredFile
+from core.storage import media_storage
+from posts.models import Post
+
+User = get_user_model()
+
+MEDIA_ROOT = tempfile.mkdtemp()
+SMALL_GIF = (
+    b'\x47\x49\x46\x38\x39\x61\x01\x00'
+    b'\x01\x00\x00\x00\x00\x21\xf9\x04'
+    b'\x01\x0a\x00\x01\x00\x2c\x00\x00'
+    b'\x00\x00\x01\x00\x01\x00\x00\x02'
+    b'\x02\x4c\x01\x00\x3b'
+)
+DIGEST = hashlib.sha256(SMALL_GIF).hexdigest()
+
+
+def upload(name='small.gif', content=SMALL_GIF):
+    return SimpleUploadedFile(name, content, content_type='image/gif')
+
+
+@override_settings(MEDIA_ROOT=MEDIA_ROOT)
+class ContentAddressedStorageTests(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.user = User.objects.create_user(username='uploader')
+
+    @classmethod
+    def tearDownClass(cls):
+        shutil.rmtree(MEDIA_ROOT, ignore_errors=True)
+        super().tearDownClass()
+
+    def test_same_content_is_stored_once_under_fan_out_path(self):
+        first = Post.objects.create(
+            author=self.user, text='Первый', image=upload('A.GIF')
+        )
+        second = Post.objects.create(
+            author=self.user, text='Второй', image=upload('copy.gif')
+        )
+        expected = f'posts/{DIGEST[:2]}/{DIGEST[2:4]}/{DIGEST}.gif'
+        self.assertEqual(first.image.name, expected)
+        self.assertEqual(second.image.name, expected)
+        self.assertEqual(media_storage.references(expected), 2)
+        self.assertEqual(
+            os.listdir(os.path.join(MEDIA_ROOT, 'posts', DIGEST[:2],
+                                    DIGEST[2:4])),
+            [f'{DIGEST}.gif']
+        )
+
+    def test_file_is_removed_with_last_reference(self):
+        first = Post.objects.create(
+            author=self.user, text='Первый', image=upload()
+        )
+        second = Post.objects.create(
+            author=self.user, text='Второй', image=upload()
+        )
+        name = first.image.name
+        first.delete()
+        self.assertTrue(media_storage.exists(name))
+        self.assertEqual(media_storage.references(name), 1)
+        second.delete()
+        self.assertFalse(media_storage.exists(name))
+        self.assertFalse(StoredFile.objects.filter(name=name).exists())
+
+    def test_replacing_image_releases_old_one(self):
+        post = Post.objects.create(
+            author=self.user, text='Пост', image=upload()
+        )
+        old_name = post.image.name
+        post = Post.objects.get(pk=post.pk)
+        post.image = upload(content=SMALL_GIF + b'\x00')
+        post.save()
+        self.assertNotEqual(post.image.name, old_name)
+        self.assertFalse(media_storage.exists(old_name))
+        self.assertEqual(media_storage.references(post.image.name), 1)
+
+    def test_delete_ignores_unmanaged_files(self):
+        name = 'manual.gif'
+        with open(media_storage.path(name), 'wb') as image:
+            image.write(SMALL_GIF)
+        media_storage.delete(name)
+        self.assertTrue(media_storage.exists(name))
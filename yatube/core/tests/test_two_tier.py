@@ -0,0 +1,85 @@
+import shutil
+import tempfile
+from io import StringIO
+
+from django.core.cache import caches
+from django.core.management import call_command
+from django.test import SimpleTestCase, override_settings
+
+from core.caching.backends import LocalTier
+
+CACHE_DIR = tempfile.mkdtemp()
+TWO_TIER = {
+    'default': {
+        'BACKEND': 'core.caching.backends.TwoTierCache',
+        'LOCATION': 'shared',
+        'OPTIONS': {'L1_MAX_ENTRIES': 3, 'SYNC_INTERVAL': 0},
+    },
+    'shared': {
+        'BACKEND': 'django.core.cache.backends.filebased.FileBasedCache',
+        'LOCATION': CACHE_DIR,
+    },
+}
+
+
+@override_settings(CACHES=TWO_TIER)
+class TwoTierCacheTests(SimpleTestCase):
+    @classmethod
+    def tearDownClass(cls):
+        shutil.rmtree(CACHE_DIR, ignore_errors=True)
+        super().tearDownClass()
+
+    def setUp(self):
+        self.cache = caches['default']
+        self.cache.tier = LocalTier()
+        self.cache.clear()
+        # Второй воркер: свой L1, общий L2.
+        self.other = type(self.cache)('shared', TWO_TIER['default'])
+        self.other.tier = LocalTier()
+
+    def test_second_read_is_served_from_l1(self):
+        self.cache.set('key', {'value': 1})
+        self.other.get('key')
+        self.other.get('key')
+        stats = self.other.stats()
+        self.assertEqual((stats['l2_hits'], stats['l1_hits']), (1, 1))
+        self.assertEqual(stats['l1_hit_rate'], 0.5)
+
+    def test_writes_invalidate_other_workers(self):
+        self.cache.set('key', 'старое')
+        self.assertEqual(self.other.get('key'), 'старое')
+        self.cache.set('key', 'новое')
+        self.assertEqual(self.other.get('key'), 'новое')
+        self.cache.delete('key')
+        self.assertIsNone(self.other.get('key'))
+        self.cache.set('counter', 1)
+        self.assertEqual(self.other.get('counter'), 1)
+        self.cache.incr('counter')
+        self.assertEqual(self.other.get('counter'), 2)
+
+    def test_clear_drops_other_workers_l1(self):
+        self.cache.set('key', 'значение')
+        self.other.get('key')
+        self.cache.clear()
+        self.assertIsNone(self.other.get('key'))
+
+    def test_l1_is_bounded_lru(self):
+        for number in range(5):
+            self.cache.set(f'key{number}', number)
+        self.assertEqual(len(self.cache.tier.entries), 3)
+        self.assertEqual(self.cache.get('key0'), 0)
+        self.assertEqual(self.cache.stats()['l2_hits'], 1)
+
+    def test_l1_values_are_copies(self):
+        self.cache.set('list', [1])
+        self.cache.get('list').append(2)
+        self.assertEqual(self.cache.get('list'), [1])
+
+    def test_cache_stats_command(self):
+        self.cache.set('key', 1)
+        self.cache.get('key')
+        self.cache.get('missing')
+        out = StringIO()
+        call_command('cache_stats', stdout=out)
+        self.assertIn('L1: 1 (50.0%)', out.getvalue())
+        self.assertIn('промахи: 1', out.getvalue())
@@ -0,0 +1,95 @@
+import hashlib
+import shutil
+import tempfile
+from io import BytesIO, StringIO
+
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.core.management import call_command
+from django.test import TestCase, override_settings
+from django.urls import reverse
+from PIL import Image
+
+from core.models import StoredFile
+from core.storage import media_storage
+from posts.models import Post
+
+User = get_user_model()
+
+MEDIA_ROOT = tempfile.mkdtemp()
+ORIENTATION = 0x0112
+
+
+def jpeg(size=(300, 100), orientation=None):
+    buffer = BytesIO()
+    exif = Image.Exif()
+    if orientation:
+        exif[ORIENTATION] = orientation
+    Image.new('RGB', size, (200, 0, 0)).save(
+        buffer, 'JPEG', exif=exif.tobytes()
+    )
+    return buffer.getvalue()
+
+
+@override_settings(MEDIA_ROOT=MEDIA_ROOT, IMAGE_MAX_SIDE=100)
+class UploadPipelineTests(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.user = User.objects.create_user(username='uploader')
+
+    @classmethod
+    def tearDownClass(cls):
+        shutil.rmtree(MEDIA_ROOT, ignore_errors=True)
+        super().tearDownClass()
+
+    def setUp(self):
+        cache.clear()
+        self.client.force_login(self.user)
+
+    def create_post(self, content, name='photo.jpg'):
+        return self.client.post(reverse('posts:post_create'), {
+            'text': 'С картинкой',
+            'image': SimpleUploadedFile(name, content, 'image/jpeg'),
+        })
+
+    def test_upload_is_hashed_while_streaming(self):
+        content = jpeg()
+        self.create_post(content)
+        digest = hashlib.sha256(content).hexdigest()
+        post = Post.objects.get(text='С картинкой')
+        self.assertEqual(
+            post.image.name, f'posts/{digest[:2]}/{digest[2:4]}/{digest}.jpg'
+        )
+
+    @override_settings(IMAGE_MAX_PIXELS=1000)
+    def test_header_check_rejects_huge_images(self):
+        response = self.create_post(jpeg())
+        self.assertFormError(
+            response, 'form', 'image', 'Слишком большая картинка.'
+        )
+        self.assertFalse(Post.objects.exists())
+
+    def test_worker_rotates_strips_and_shrinks(self):
+        self.create_post(jpeg(orientation=6))
+        post = Post.objects.get()
+        with Image.open(media_storage.path(post.image.name)) as image:
+            self.assertEqual(image.size, (300, 100))
+        call_command('normalize_images', stdout=StringIO())
+        with Image.open(media_storage.path(post.image.name)) as image:
+            self.assertEqual(image.size, (33, 100))
+            self.assertNotIn(ORIENTATION, image.getexif())
+        self.assertFalse(StoredFile.objects.filter(normalized=False).exists())
+        self.assertGreater(
+            Post.objects.get().updated, post.updated,
+            'Карточка с удалёнными миниатюрами должна получить новый ключ.'
+        )
+
+    def test_worker_leaves_small_clean_images_alone(self):
+        content = jpeg(size=(50, 20))
+        self.create_post(content)
+        call_command('normalize_images', stdout=StringIO())
+        with open(media_storage.path(Post.objects.get().image.name),
+                  'rb') as image:
+            self.assertEqual(image.read(), content)
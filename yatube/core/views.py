@@ -1,4 +1,18 @@
+import mimetypes
+import os
+import re
+
+from django.conf import settings
+from django.core.exceptions import SuspiciousFileOperation
+from django.http import FileResponse, Http404, HttpResponse
 from django.shortcuts import render
+from django.utils._os import safe_join
+from django.utils.cache import get_conditional_response
+from django.utils.http import http_date, parse_http_date_safe
+from django.views.decorators.http import require_safe
+
+RANGE = re.compile(r'^bytes=(\d*)-(\d*)$')
+MEDIA_CACHE = 'public, max-age=86400'
 
 
 def page_not_found(request, exception):
@@ -15,3 +29,123 @@ def permission_denied(request, exception):
 
 def server_error(request):
     return render(request, 'core/500.html', status=500)
+
+
+class FileRange:
+    """Файл, из которого читается только отрезок [start, start + length).
+
+    Позиция открытого файла уже выставлена на start, поэтому сервер,
+    отдающий fileno() через sendfile, начнёт с нужного байта, а длину
+    возьмёт из Content-Length.
+    """
+
+    def __init__(self, file, start, length):
+        file.seek(start)
+        self.file = file
+        self.remaining = length
+
+    def read(self, size=-1):
+        if size < 0 or size > self.remaining:
+            size = self.remaining
+        data = self.file.read(size)
+        self.remaining -= len(data)
+        return data
+
+    def fileno(self):
+        return self.file.fileno()
+
+    def close(self):
+        self.file.close()
+
+
+def parse_range(header, size):
+    """Разбирает один диапазон bytes=a-b.
+
+    Возвращает (start, end) включительно, None для заголовка, который
+    проще проигнорировать и отдать весь файл, и False, если диапазон
+    за пределами файла.
+    """
+    match = RANGE.match(header.replace(' ', ''))
+    if not match or match.groups() == ('', ''):
+        return None
+    first, last = match.groups()
+    if not first:
+        start, end = max(size - int(last), 0), size - 1
+    else:
+        start = int(first)
+        end = min(int(last), size - 1) if last else size - 1
+    if start >= size or start > end:
+        return False
+    return start, end
+
+
+def range_is_fresh(request, etag, mtime):
+    """If-Range: диапазон отдаётся, только если файл не менялся."""
+    if_range = request.META.get('HTTP_IF_RANGE')
+    if not if_range:
+        return True
+    if if_range.startswith(('"', 'W/')):
+        return if_range == etag
+    return parse_http_date_safe(if_range) == int(mtime)
+
+
+def accel_response(path):
+    """Передаёт отдачу файла фронтовому прокси (nginx, Apache, lighttpd)."""
+    response = HttpResponse()
+    relative = os.path.relpath(path, settings.MEDIA_ROOT).replace(os.sep, '/')
+    if settings.MEDIA_ACCEL == 'x-accel-redirect':
+        response['X-Accel-Redirect'] = settings.MEDIA_ACCEL_PREFIX + relative
+    else:
+        response['X-Sendfile'] = path
+    return response
+
+
+def file_response(request, path, stat, etag):
+    requested = parse_range(request.META.get('HTTP_RANGE', ''), stat.st_size)
+    if requested is False:
+        response = HttpResponse(status=416)
+        response['Content-Range'] = f'bytes */{stat.st_size}'
+        return response
+    if requested and range_is_fresh(request, etag, stat.st_mtime):
+        start, end = requested
+        response = FileResponse(
+            FileRange(open(path, 'rb'), start, end - start + 1), status=206
+        )
+        response['Content-Range'] = f'bytes {start}-{end}/{stat.st_size}'
+        response['Content-Length'] = end - start + 1
+        return response
+    response = FileResponse(open(path, 'rb'))
+    response['Content-Length'] = stat.st_size
+    return response
+
+
+@require_safe
+def media(request, path):
+    """Отдаёт загруженные файлы из MEDIA_ROOT.
+
+    Поддерживает условные запросы и Range. Если настроен MEDIA_ACCEL,
+    сам файл отдаёт прокси, а Django только проверяет путь.
+    """
+    try:
+        full_path = safe_join(settings.MEDIA_ROOT, path)
+    except SuspiciousFileOperation:
+        raise Http404
+    if not os.path.isfile(full_path):
+        raise Http404
+    stat = os.stat(full_path)
+    etag = f'"{stat.st_mtime_ns:x}-{stat.st_size:x}"'
+    response = get_conditional_response(
+        request, etag=etag, last_modified=int(stat.st_mtime)
+    )
+    if response is None:
+        if settings.MEDIA_ACCEL:
+            response = accel_response(full_path)
+        else:
+            response = file_response(request, full_path, stat, etag)
+            response['Accept-Ranges'] = 'bytes'
+        content_type, encoding = mimetypes.guess_type(full_path)
+        response['Content-Type'] = content_type or 'application/octet-stream'
+    response['ETag'] = etag
+    response['Last-Modified'] = http_date(stat.st_mtime)
+    response['Cache-Control'] = MEDIA_CACHE
+    return response
@@ -1,20 +1,70 @@
 from django.contrib import admin
+from django.contrib.auth.admin import UserAdmin
+from django.db.models import Case, IntegerField, When
 
-from .models import Post, Group
+from .autocomplete import MAX_RESULTS, search
+from .models import Post, Group, User
+
+
+class PrefixSearchMixin:
+    """Автодополнение админки ищет по индексу автодополнения, а не
+    LIKE-запросом; обычный поиск в списке объектов не меняется."""
+    autocomplete_source = None
+
+    def get_search_results(self, request, queryset, search_term):
+        match = request.resolver_match
+        if not search_term or not match.url_name.endswith('_autocomplete'):
+            return super().get_search_results(request, queryset, search_term)
+        ids = [
+            pk for pk, *_ in search(
+                self.autocomplete_source, search_term, MAX_RESULTS
+            )
+        ]
+        if not ids:
+            return queryset.none(), False
+        order = Case(
+            *[When(pk=pk, then=position) for position, pk in enumerate(ids)],
+            output_field=IntegerField()
+        )
+        return queryset.filter(pk__in=ids).order_by(order), False
+
+
+class DuplicateFilter(admin.SimpleListFilter):
+    title = 'дубликаты'
+    parameter_name = 'duplicate'
+
+    def lookups(self, request, model_admin):
+        return (('yes', 'Только дубликаты'), ('no', 'Без дубликатов'))
+
+    def queryset(self, request, queryset):
+        if self.value() in ('yes', 'no'):
+            return queryset.filter(duplicate_of__isnull=self.value() == 'no')
+        return queryset
 
 
 class PostAdmin(admin.ModelAdmin):
-    list_display = ('pk', 'text', 'pub_date', 'author', 'group')
+    list_display = (
+        'pk', 'text', 'pub_date', 'author', 'group', 'duplicate_of'
+    )
     list_editable = ('group',)
     search_fields = ('text',)
-    list_filter = ('pub_date',)
+    list_filter = ('pub_date', DuplicateFilter)
+    autocomplete_fields = ('author', 'group')
     empty_value_display = '-пусто-'
 
 
-class GroupAdmin(admin.ModelAdmin):
+class GroupAdmin(PrefixSearchMixin, admin.ModelAdmin):
 
     list_display = ('title', 'description')
+    search_fields = ('title', 'slug')
+    autocomplete_source = 'groups'
+
+
+class AuthorAdmin(PrefixSearchMixin, UserAdmin):
+    autocomplete_source = 'users'
 
 
 admin.site.register(Post, PostAdmin)
 admin.site.register(Group, GroupAdmin)
+admin.site.unregister(User)
+admin.site.register(User, AuthorAdmin)
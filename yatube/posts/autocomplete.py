@@ -0,0 +1,254 @@
+"""Автодополнение имён пользователей и сообществ без LIKE-запросов.
+
+Каждый процесс держит по индексу PrefixIndex на источник: индекс
+строится при старте воркера (wsgi.py) или первом поиске и правится
+сигналами. Правки расходятся по процессам через журнал в общем кэше, как
+инвалидации двухуровневого кэша (core.caching.backends): счётчик
+sequence_key и записи journal_key с операцией — положить объект, убрать
+его или сдвинуть ранги. Не чаще раза в AUTOCOMPLETE_CHECK_SECONDS процесс
+дочитывает журнал и применяет чужие операции к своему индексу.
+
+Если журнал потерян, процесс отстал больше чем на JOURNAL_SIZE записей
+или индексу больше AUTOCOMPLETE_REBUILD_SECONDS, индекс пересобирается
+в фоновом потоке, а поиск до конца сборки идёт по старому. Синхронно
+индекс строится, только пока его в процессе нет. Пользователи
+ранжируются по числу подписчиков, сообщества — по числу постов; ранги
+сообществ обновляет только пересборка.
+"""
+import threading
+import time
+from collections import Counter
+from uuid import uuid4
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db import connections
+from django.db.models import Count
+
+from core.prefix_index import PrefixIndex
+
+from .models import Follow, Group, Post, User
+from .sharding import post_databases
+
+MAX_RESULTS = 20
+JOURNAL_SIZE = 1000
+JOURNAL_TIMEOUT = 300
+PUT, REMOVE, RANKS, REBUILD = 'put', 'remove', 'ranks', 'rebuild'
+# Свои записи журнала процесс применил к индексу ещё при публикации.
+PROCESS = uuid4().hex
+USER_FIELDS = ('username', 'first_name', 'last_name')
+GROUP_FIELDS = ('title', 'slug')
+
+
+def user_entry(user):
+    return (
+        user.pk, [getattr(user, field) for field in USER_FIELDS],
+        user.username, user.get_full_name() or user.username,
+    )
+
+
+def group_entry(group):
+    return (
+        group.pk, [getattr(group, field) for field in GROUP_FIELDS],
+        group.slug, group.title,
+    )
+
+
+def user_items():
+    ranks = dict(
+        Follow.objects.order_by().values_list('author_id').annotate(
+            Count('pk')
+        )
+    )
+    for user in User.objects.only('pk', *USER_FIELDS).iterator():
+        yield (*user_entry(user), ranks.get(user.pk, 0))
+
+
+def group_items():
+    ranks = Counter()
+    for using in post_databases():
+        ranks.update(dict(
+            Post.objects.using(using).exclude(group=None).order_by(
+            ).values_list('group_id').annotate(Count('pk'))
+        ))
+    for group in Group.objects.only('pk', *GROUP_FIELDS).iterator():
+        yield (*group_entry(group), ranks[group.pk])
+
+
+# Источник: поля модели в индексе, запись объекта и сборка индекса.
+SOURCES = {
+    'users': (USER_FIELDS, user_entry, user_items),
+    'groups': (GROUP_FIELDS, group_entry, group_items),
+}
+
+
+class Slot:
+    def __init__(self, index, seen):
+        self.index = index
+        self.seen = seen
+        self.missing = None
+        self.rebuilding = False
+        self.built = self.checked = time.monotonic()
+
+
+_slots = {}
+_lock = threading.Lock()
+
+
+def sequence_key(name):
+    return f'posts:autocomplete:sequence:{name}'
+
+
+def journal_key(name, number):
+    return f'posts:autocomplete:journal:{name}:{number}'
+
+
+def current_sequence(name):
+    cache.add(sequence_key(name), 0, None)
+    return cache.get(sequence_key(name), 0)
+
+
+def build(name):
+    seen = current_sequence(name)
+    return Slot(PrefixIndex(SOURCES[name][2](), MAX_RESULTS), seen)
+
+
+def apply(index, operation):
+    """Применяет операцию журнала; False, если индекс не изменился."""
+    kind, *args = operation
+    if kind == PUT:
+        return index.put(*args)
+    if kind == REMOVE:
+        return index.remove(*args)
+    if kind == RANKS:
+        for pk, delta in args[0].items():
+            index.shift_rank(pk, delta)
+    return True
+
+
+def catch_up(name, slot, own=False):
+    """Дочитывает журнал; False, если индекс нужно пересобрать.
+
+    Запись могла ещё не дойти до кэша после сдвига счётчика: её ждут до
+    следующей сверки, и только если её нет и тогда, журнал потерян.
+    """
+    sequence = current_sequence(name)
+    if sequence < slot.seen or sequence - slot.seen > JOURNAL_SIZE:
+        return False
+    numbers = range(slot.seen + 1, sequence + 1)
+    journal = cache.get_many([journal_key(name, number) for number in numbers])
+    for number in numbers:
+        record = journal.get(journal_key(name, number))
+        if record is None:
+            lost = slot.missing == number
+            slot.missing = number
+            return not lost
+        process, operation = record
+        if operation[0] == REBUILD and process != PROCESS:
+            slot.seen = number
+            return False
+        if own or process != PROCESS:
+            apply(slot.index, operation)
+        slot.seen = number
+    return True
+
+
+def rebuild(name, slot):
+    try:
+        fresh = build(name)
+        with _lock:
+            # Правки, сделанные во время сборки, в том числе свои.
+            catch_up(name, fresh, own=True)
+            _slots[name] = fresh
+    finally:
+        slot.rebuilding = False
+        connections.close_all()
+
+
+def rebuild_later(name, slot):
+    if slot.rebuilding:
+        return
+    slot.rebuilding = True
+    threading.Thread(target=rebuild, args=(name, slot), daemon=True).start()
+
+
+def get_index(name):
+    """Индекс процесса с применёнными правками других процессов."""
+    now = time.monotonic()
+    slot = _slots.get(name)
+    if slot and now - slot.checked < settings.AUTOCOMPLETE_CHECK_SECONDS:
+        return slot.index
+    with _lock:
+        slot = _slots.get(name)
+        if slot is None:
+            slot = _slots[name] = build(name)
+            return slot.index
+        slot.checked = now
+        if not catch_up(name, slot) or (
+            now - slot.built >= settings.AUTOCOMPLETE_REBUILD_SECONDS
+        ):
+            rebuild_later(name, slot)
+        return slot.index
+
+
+def warm_up():
+    for name in SOURCES:
+        get_index(name)
+
+
+def reset():
+    """Забывает индексы процесса; следующий поиск соберёт их заново."""
+    with _lock:
+        _slots.clear()
+
+
+def search(name, prefix, limit=10):
+    """[(id, значение, подпись)] лучших объектов источника по префиксу."""
+    if not prefix:
+        return []
+    return get_index(name).search(prefix, limit)
+
+
+def publish(name, operation):
+    """Применяет операцию к своему индексу и пишет её в журнал."""
+    slot = _slots.get(name)
+    if slot is not None and not apply(slot.index, operation):
+        return
+    key = sequence_key(name)
+    cache.add(key, 0, None)
+    try:
+        sequence = cache.incr(key)
+    except ValueError:
+        return
+    cache.set(
+        journal_key(name, sequence), (PROCESS, operation), JOURNAL_TIMEOUT
+    )
+
+
+def announce(name):
+    """Велит всем процессам пересобрать индекс, например после массовой
+    загрузки данных в обход сигналов."""
+    publish(name, (REBUILD,))
+
+
+def object_changed(name, instance, update_fields=None, deleted=False):
+    """Правит индекс по сигналу модели и рассылает правку.
+
+    Сохранение без полей индекса (например, last_login при входе)
+    ничего не меняет и в журнал не попадает.
+    """
+    fields, entry, _ = SOURCES[name]
+    if update_fields and not set(update_fields) & set(fields):
+        return
+    if deleted:
+        publish(name, (REMOVE, instance.pk))
+    else:
+        publish(name, (PUT, *entry(instance)))
+
+
+def shift_follower_ranks(author_ids, delta):
+    ranks = Counter()
+    for author_id in author_ids:
+        ranks[author_id] += delta
+    if ranks:
+        publish('users', (RANKS, dict(ranks)))
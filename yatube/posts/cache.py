@@ -0,0 +1,88 @@
+"""Ключи кэша карточек постов, штампы и счётчики лент."""
+import time
+from hashlib import md5
+
+from django.core.cache import cache
+
+CARD_TIMEOUT = 60 * 60 * 24
+COUNT_TIMEOUT = 60 * 60 * 24
+STAMP_PREFIX = 'posts:stamp'
+COUNT_PREFIX = 'posts:count'
+
+
+def card_key(post):
+    """Ключ карточки: id поста, время его последнего изменения, версия
+    HTML текста и отпечаток показанных в карточке имени и адресов автора
+    и группы — переименование не оставит ссылок на старый адрес."""
+    author = post.author
+    shown = [author.username, author.get_full_name()]
+    if post.group_id:
+        shown.append(post.group.slug)
+    digest = md5('\0'.join(shown).encode()).hexdigest()[:12]
+    return (
+        f'posts:card:{post.pk}:{post.updated.timestamp():.6f}:'
+        f'{post.renderer_version}:{digest}'
+    )
+
+
+def stamp_key(*parts):
+    return ':'.join([STAMP_PREFIX, *map(str, parts)])
+
+
+def feed_stamp(*parts):
+    """Текущий штамп ленты, входит в ключ кэша страницы-оболочки."""
+    key = stamp_key(*parts)
+    stamp = cache.get(key)
+    if stamp is None:
+        cache.add(key, time.time_ns(), None)
+        stamp = cache.get(key)
+    return stamp
+
+
+def feed_stamp_keys(post):
+    """Ключи штампов всех лент, в которые попадает пост."""
+    keys = [stamp_key('index'), stamp_key('author', post.author_id)]
+    if post.group_id:
+        keys.append(stamp_key('group', post.group_id))
+    return keys
+
+
+def touch_feeds(post):
+    """Сбрасывает оболочки страниц лент, в которые попадает пост."""
+    stamp = time.time_ns()
+    cache.set_many(dict.fromkeys(feed_stamp_keys(post), stamp), None)
+
+
+def count_key(*parts):
+    return ':'.join([COUNT_PREFIX, *map(str, parts)])
+
+
+def feed_count(queryset, *parts):
+    """Число постов ленты: COUNT(*) только при промахе кэша."""
+    key = count_key(*parts)
+    count = cache.get(key)
+    if count is None:
+        count = queryset.count()
+        cache.add(key, count, COUNT_TIMEOUT)
+    return count
+
+
+def feed_count_keys(post, follower_ids=()):
+    keys = [count_key('index'), count_key('author', post.author_id)]
+    if post.group_id:
+        keys.append(count_key('group', post.group_id))
+    keys.extend(count_key('follow', user_id) for user_id in follower_ids)
+    return keys
+
+
+def shift_feed_counts(keys, delta):
+    """Сдвигает уже закэшированные счётчики, отсутствующие не трогает."""
+    for key in cache.get_many(keys):
+        try:
+            cache.incr(key, delta)
+        except ValueError:
+            pass
+
+
+def forget_feed_counts(keys):
+    cache.delete_many(keys)
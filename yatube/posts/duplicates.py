@@ -0,0 +1,146 @@
+"""Поиск почти одинаковых постов через MinHash и LSH по полосам.
+
+Текст без пунктуации и регистра режется на символьные 4-граммы;
+MinHash-подпись из NUM_PERM минимумов оценивает долю общих 4-грамм двух
+текстов (коэффициент Жаккара) как долю совпавших позиций. Подпись
+делится на BANDS полос по ROWS значений, ключ каждой полосы лежит в
+отдельном индексе. Тексты с похожестью от MIN_SIMILARITY почти всегда
+совпадают хотя бы в одной полосе, случайные — почти никогда. Поэтому
+поиск — несколько точных совпадений по индексам и проверка подписей
+у ограниченного числа кандидатов, независимо от числа постов.
+
+Что делать с найденным дубликатом, задаёт DUPLICATE_POLICY:
+'flag' — отметить Post.duplicate_of, 'collapse' — ещё и убрать из лент,
+'reject' — PostForm не примет такой пост, '' — не проверять.
+"""
+import random
+import re
+import struct
+from functools import reduce
+from hashlib import blake2b
+from operator import or_
+
+from django.conf import settings
+from django.db.models import Q
+
+from .models import Fingerprint
+
+SHINGLE = 4
+MIN_SHINGLES = 16
+BANDS = 8
+ROWS = 4
+NUM_PERM = BANDS * ROWS
+MIN_SIMILARITY = 0.7
+MAX_CANDIDATES = 50
+PRIME = (1 << 61) - 1
+# Перестановки должны быть одинаковыми во всех процессах и запусках.
+_generator = random.Random(20240101)
+PERMUTATIONS = [
+    (_generator.randrange(1, PRIME), _generator.randrange(PRIME))
+    for _ in range(NUM_PERM)
+]
+SIGNATURE = struct.Struct(f'<{NUM_PERM}Q')
+BAND_SIZE = ROWS * 8
+WORD_RE = re.compile(r'\w+')
+
+
+def shingles(text):
+    normalized = ' '.join(WORD_RE.findall(text.lower()))
+    return {
+        normalized[start:start + SHINGLE]
+        for start in range(len(normalized) - SHINGLE + 1)
+    }
+
+
+def hash64(data):
+    return int.from_bytes(blake2b(data, digest_size=8).digest(), 'little')
+
+
+def minhash(text):
+    """Подпись текста; None для слишком коротких текстов."""
+    features = shingles(text)
+    if len(features) < MIN_SHINGLES:
+        return None
+    hashes = [hash64(feature.encode()) for feature in features]
+    return [
+        min((a * value + b) % PRIME for value in hashes)
+        for a, b in PERMUTATIONS
+    ]
+
+
+def band_keys(signature):
+    """Ключ каждой полосы подписи — 63-битный хэш её значений."""
+    packed = SIGNATURE.pack(*signature)
+    return [
+        hash64(packed[start:start + BAND_SIZE]) >> 1
+        for start in range(0, len(packed), BAND_SIZE)
+    ]
+
+
+def similarity(first, second):
+    return sum(a == b for a, b in zip(first, second)) / NUM_PERM
+
+
+def band_query(signature):
+    return reduce(or_, (
+        Q(**{f'band{number}': key})
+        for number, key in enumerate(band_keys(signature))
+    ))
+
+
+def find_duplicate(signature, post_id=None):
+    """Id раннего поста с похожей подписью или None.
+
+    Для уже сохранённого поста кандидаты — только посты раньше него:
+    иначе правка оригинала сделала бы его дубликатом собственной копии.
+    """
+    candidates = Fingerprint.objects.filter(band_query(signature))
+    if post_id is not None:
+        candidates = candidates.filter(post_id__lt=post_id)
+    candidates = candidates.order_by('post_id').values_list(
+        'post_id', 'signature'
+    )[:MAX_CANDIDATES]
+    for post_id, other in candidates:
+        if similarity(signature, SIGNATURE.unpack(other)) >= MIN_SIMILARITY:
+            return post_id
+    return None
+
+
+def fingerprint_fields(signature):
+    fields = {
+        f'band{number}': key
+        for number, key in enumerate(band_keys(signature))
+    }
+    fields['signature'] = SIGNATURE.pack(*signature)
+    return fields
+
+
+def mark_duplicate(post):
+    """Заполняет post.duplicate_of до сохранения, если проверка включена."""
+    if not settings.DUPLICATE_POLICY:
+        return
+    post.duplicate_of = None
+    post._signature = minhash(post.text)
+    if post._signature is not None:
+        post.duplicate_of = find_duplicate(post._signature, post.pk)
+
+
+def remember(post):
+    """Сохраняет отпечаток поста после записи самого поста."""
+    signature = getattr(post, '_signature', None)
+    if signature is None:
+        forget([post.pk])
+        return
+    Fingerprint.objects.update_or_create(
+        post_id=post.pk, defaults=fingerprint_fields(signature)
+    )
+
+
+def forget(post_ids):
+    Fingerprint.objects.filter(post_id__in=post_ids).delete()
+
+
+def is_collapsed(post):
+    return settings.DUPLICATE_POLICY == 'collapse' and bool(
+        post.duplicate_of
+    )
@@ -0,0 +1,126 @@
+"""Рассылка уведомлений о новых постах подключённым SSE-клиентам.
+
+Один диспетчер на процесс: слушатель подписывается на каналы
+('group', id) или ('author', id), новый пост раскладывается по очередям
+слушателей своих каналов. Очереди ограничены: медленный клиент теряет
+уведомления, но не задерживает остальных. Другие процессы сервера о
+посте не узнают, и их клиенты его не получат: Last-Event-ID при
+переподключении не учитывается, пропущенные события не досылаются.
+
+Каждый поток событий занимает синхронный воркер сервера на всё время
+соединения, то есть до STREAM_SECONDS; число одновременных подписчиков
+ограничено числом воркеров.
+"""
+import json
+import queue
+import threading
+import time
+
+QUEUE_SIZE = 100
+HEARTBEAT_SECONDS = 15
+STREAM_SECONDS = 300
+RETRY_MILLISECONDS = 3000
+
+
+class Listener:
+    def __init__(self, channels):
+        self.channels = channels
+        self.events = queue.Queue(QUEUE_SIZE)
+
+
+class Dispatcher:
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.listeners = {}
+        self.connections = 0
+        self.published = self.delivered = self.dropped = 0
+        self.last_fanout = self.max_fanout = 0.0
+
+    def subscribe(self, channels):
+        listener = Listener(channels)
+        with self.lock:
+            for channel in channels:
+                self.listeners.setdefault(channel, set()).add(listener)
+            self.connections += 1
+        return listener
+
+    def unsubscribe(self, listener):
+        with self.lock:
+            for channel in listener.channels:
+                subscribers = self.listeners.get(channel, set())
+                subscribers.discard(listener)
+                if not subscribers:
+                    self.listeners.pop(channel, None)
+            self.connections -= 1
+
+    def publish(self, channels, event):
+        """Кладёт событие всем слушателям каналов, каждому один раз."""
+        started = time.monotonic()
+        event = dict(event, published=time.time())
+        with self.lock:
+            listeners = set().union(*(
+                self.listeners.get(channel, ()) for channel in channels
+            ))
+        delivered = dropped = 0
+        for listener in listeners:
+            try:
+                listener.events.put_nowait(event)
+                delivered += 1
+            except queue.Full:
+                dropped += 1
+        fanout = time.monotonic() - started
+        with self.lock:
+            self.published += 1
+            self.delivered += delivered
+            self.dropped += dropped
+            self.last_fanout = fanout
+            self.max_fanout = max(self.max_fanout, fanout)
+
+    def stats(self):
+        with self.lock:
+            return {
+                'connections': self.connections,
+                'channels': len(self.listeners),
+                'published': self.published,
+                'delivered': self.delivered,
+                'dropped': self.dropped,
+                'last_fanout_ms': round(self.last_fanout * 1000, 3),
+                'max_fanout_ms': round(self.max_fanout * 1000, 3),
+            }
+
+
+dispatcher = Dispatcher()
+
+
+def post_channels(post):
+    channels = [('author', post.author_id)]
+    if post.group_id:
+        channels.append(('group', post.group_id))
+    return channels
+
+
+def publish_post(post):
+    dispatcher.publish(post_channels(post), {
+        'id': post.pk,
+        'author': post.author.username,
+        'group': post.group_id,
+        'text': post.text[:100],
+    })
+
+
+def stream(channels):
+    """Тело SSE-ответа; держит соединение не дольше STREAM_SECONDS."""
+    listener = dispatcher.subscribe(channels)
+    deadline = time.monotonic() + STREAM_SECONDS
+    try:
+        yield f'retry: {RETRY_MILLISECONDS}\n\n'
+        while time.monotonic() < deadline:
+            try:
+                event = listener.events.get(timeout=HEARTBEAT_SECONDS)
+            except queue.Empty:
+                yield ': keepalive\n\n'
+                continue
+            data = json.dumps(event, ensure_ascii=False)
+            yield f"id: {event['id']}\nevent: post\ndata: {data}\n\n"
+    finally:
+        dispatcher.unsubscribe(listener)
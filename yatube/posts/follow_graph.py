@@ -0,0 +1,92 @@
+"""Кэш графа подписок.
+
+Для каждого пользователя хранятся отсортированные id тех, на кого он
+подписан, и тех, кто подписан на него. Множества лежат в кэше как байты
+массива array('q'): восемь байт на связь вместо десятков у set из int,
+а проверка принадлежности делается бинарным поиском.
+"""
+from array import array
+from bisect import bisect_left
+
+from django.core.cache import cache
+
+from .models import Follow
+
+GRAPH_TIMEOUT = 60 * 60
+TYPECODE = 'q'
+FOLLOWEES = 'followees'
+FOLLOWERS = 'followers'
+
+
+def graph_key(direction, user_id):
+    return f'posts:follow:{direction}:{user_id}'
+
+
+def load_ids(direction, user_id):
+    """Загружает одно множество графа одним запросом."""
+    if direction == FOLLOWEES:
+        queryset = Follow.objects.filter(user_id=user_id).values_list(
+            'author_id', flat=True
+        ).order_by('author_id')
+    else:
+        queryset = Follow.objects.filter(author_id=user_id).values_list(
+            'user_id', flat=True
+        ).order_by('user_id')
+    return array(TYPECODE, queryset.distinct())
+
+
+def get_ids(direction, user_id):
+    key = graph_key(direction, user_id)
+    data = cache.get(key)
+    ids = array(TYPECODE)
+    if data is None:
+        ids = load_ids(direction, user_id)
+        cache.set(key, ids.tobytes(), GRAPH_TIMEOUT)
+    else:
+        ids.frombytes(data)
+    return ids
+
+
+def followee_ids(user_id):
+    return get_ids(FOLLOWEES, user_id)
+
+
+def follower_ids(user_id):
+    return get_ids(FOLLOWERS, user_id)
+
+
+def contains(ids, value):
+    index = bisect_left(ids, value)
+    return index < len(ids) and ids[index] == value
+
+
+def is_following(user, author_id):
+    """Подписан ли пользователь на автора."""
+    if not user.is_authenticated:
+        return False
+    return contains(followee_ids(user.pk), author_id)
+
+
+def followed_among(user, author_ids):
+    """Те id из author_ids, на которые подписан пользователь."""
+    if not user.is_authenticated:
+        return set()
+    ids = followee_ids(user.pk)
+    return {
+        author_id for author_id in set(author_ids)
+        if contains(ids, author_id)
+    }
+
+
+def forget(user_id, author_id):
+    """Сбрасывает обе стороны изменившейся связи."""
+    forget_many([(user_id, author_id)])
+
+
+def forget_many(pairs):
+    """То же для многих связей одним запросом к кэшу."""
+    keys = set()
+    for user_id, author_id in pairs:
+        keys.add(graph_key(FOLLOWEES, user_id))
+        keys.add(graph_key(FOLLOWERS, author_id))
+    cache.delete_many(list(keys))
@@ -0,0 +1,59 @@
+"""Массовые подписки: имена разрешаются одним запросом, связи пишутся
+bulk_create, а кэш графа и счётчиков сбрасывается одним проходом."""
+import csv
+import io
+
+from .autocomplete import shift_follower_ranks
+from .cache import count_key, forget_feed_counts
+from .follow_graph import followee_ids, forget_many
+from .models import Follow, User
+
+MAX_USERNAMES = 1000
+
+
+def parse_usernames(text):
+    """Имена через пробелы, запятые или переводы строк, без повторов."""
+    names = text.replace(',', ' ').split()
+    return list(dict.fromkeys(name.lstrip('@') for name in names))
+
+
+def read_csv_usernames(file):
+    """Первый столбец CSV; строка заголовка username пропускается."""
+    rows = csv.reader(io.TextIOWrapper(file, encoding='utf-8-sig'))
+    names = [row[0].strip().lstrip('@') for row in rows if row and row[0]]
+    if names and names[0].lower() == 'username':
+        names = names[1:]
+    return list(dict.fromkeys(names))
+
+
+def resolve_usernames(usernames):
+    return dict(User.objects.filter(username__in=usernames).values_list(
+        'username', 'pk'
+    ))
+
+
+def forget_follows(pairs):
+    pairs = list(pairs)
+    forget_many(pairs)
+    forget_feed_counts(list({count_key('follow', user) for user, _ in pairs}))
+
+
+def follow_many(user, author_ids):
+    """Подписывает на авторов; возвращает число новых подписок."""
+    new_ids = set(author_ids) - set(followee_ids(user.pk)) - {user.pk}
+    Follow.objects.bulk_create(
+        [Follow(user=user, author_id=author_id) for author_id in new_ids],
+        ignore_conflicts=True
+    )
+    forget_follows((user.pk, author_id) for author_id in new_ids)
+    shift_follower_ranks(new_ids, 1)
+    return len(new_ids)
+
+
+def unfollow_many(user, author_ids):
+    """Отписывает от авторов одним DELETE; кэши и ранги правит сигнал
+    post_delete каждой связи."""
+    deleted, _ = Follow.objects.filter(
+        user=user, author_id__in=set(author_ids)
+    ).delete()
+    return deleted
@@ -1,5 +1,9 @@
-from django.forms import ModelForm
+from django import forms
+from django.conf import settings
+from django.forms import ModelForm, ValidationError
 
+from .duplicates import find_duplicate, minhash
+from .follows import MAX_USERNAMES, parse_usernames, read_csv_usernames
 from .models import Post, Comment
 
 
@@ -16,6 +20,31 @@ class PostForm(ModelForm):
             'group': 'Выберите сообщество'
         }
 
+    def clean_text(self):
+        text = self.cleaned_data['text']
+        if settings.DUPLICATE_POLICY != 'reject':
+            return text
+        signature = minhash(text)
+        if signature and find_duplicate(signature, self.instance.pk):
+            raise ValidationError('Почти такой же пост уже опубликован.')
+        return text
+
+    def clean_image(self):
+        """Проверяет формат и размер по заголовку, не декодируя пиксели.
+
+        Поворот, метаданные и большие размеры исправляет normalize_images.
+        """
+        image = self.cleaned_data['image']
+        header = getattr(image, 'image', None)
+        if header is None:
+            return image
+        if header.format not in settings.IMAGE_FORMATS:
+            raise ValidationError('Неподдерживаемый формат картинки.')
+        width, height = header.size
+        if width * height > settings.IMAGE_MAX_PIXELS:
+            raise ValidationError('Слишком большая картинка.')
+        return image
+
 
 class CommentForm(ModelForm):
     class Meta:
@@ -27,3 +56,33 @@ class CommentForm(ModelForm):
         help_texts = {
             'text': 'Напишите комментарий',
         }
+
+
+class BulkFollowForm(forms.Form):
+    usernames = forms.CharField(
+        label='Имена пользователей',
+        help_text='Через пробел, запятую или с новой строки',
+        widget=forms.Textarea,
+        required=False
+    )
+    csv_file = forms.FileField(
+        label='Или CSV-файл',
+        help_text='Имена в первом столбце',
+        required=False
+    )
+    unfollow = forms.BooleanField(label='Отписаться от них', required=False)
+
+    def clean(self):
+        cleaned_data = super().clean()
+        names = parse_usernames(cleaned_data.get('usernames', ''))
+        if cleaned_data.get('csv_file'):
+            names += read_csv_usernames(cleaned_data['csv_file'])
+        names = list(dict.fromkeys(names))
+        if not names:
+            raise ValidationError('Укажите хотя бы одно имя.')
+        if len(names) > MAX_USERNAMES:
+            raise ValidationError(
+                f'За раз можно указать не больше {MAX_USERNAMES} имён.'
+            )
+        cleaned_data['names'] = names
+        return cleaned_data
@@ -0,0 +1,143 @@
+"""Лайки постов: уникальная отметка и шардированный счётчик.
+
+Одна строка-счётчик на пост стала бы горячей точкой: каждый лайк
+популярного поста ждал бы блокировку той же строки. Поэтому счётчик
+разбит на LIKE_COUNTER_SHARDS строк, лайк прибавляет единицу к случайной
+из них одним UPDATE, а число лайков — сумма строк, закэшированная рядом
+со счётчиками лент. Лайки и счётчики лежат в шарде поста.
+"""
+import random
+from collections import defaultdict
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db import IntegrityError, router, transaction
+from django.db.models import F, Sum
+
+from .cache import (
+    COUNT_TIMEOUT, count_key, forget_feed_counts, shift_feed_counts,
+)
+from .models import Like, LikeCounter
+from .sharding import db_for_post, read_db_for_post
+
+# Больше постов за один запрос состояния лайков не отдаём.
+MAX_POST_IDS = 100
+
+
+def like_key(post_id):
+    return count_key('likes', post_id)
+
+
+def likes_db(post_id):
+    return db_for_post(post_id)
+
+
+def by_db(post_ids):
+    """Id постов, разложенные по базам, откуда читаются их лайки."""
+    groups = defaultdict(list)
+    for post_id in post_ids:
+        groups[read_db_for_post(post_id)].append(post_id)
+    return groups.items()
+
+
+def bump(post_id, delta, using, shards=None):
+    """Сдвигает случайную строку счётчика, создавая её при первом лайке."""
+    shard = random.randrange(shards or settings.LIKE_COUNTER_SHARDS)
+    counters = LikeCounter.objects.using(using).filter(
+        post_id=post_id, shard=shard
+    )
+    if counters.update(count=F('count') + delta):
+        return
+    LikeCounter.objects.using(using).bulk_create(
+        [LikeCounter(post_id=post_id, shard=shard)], ignore_conflicts=True
+    )
+    counters.update(count=F('count') + delta)
+
+
+def like(user, post_id, shards=None):
+    """Ставит лайк; False, если он уже стоял."""
+    using = likes_db(post_id)
+    try:
+        with transaction.atomic(using=using):
+            Like.objects.using(using).create(user=user, post_id=post_id)
+            bump(post_id, 1, using, shards)
+    except IntegrityError:
+        return False
+    shift_feed_counts([like_key(post_id)], 1)
+    return True
+
+
+def unlike(user, post_id):
+    """Снимает лайк; False, если его не было."""
+    using = likes_db(post_id)
+    with transaction.atomic(using=using):
+        deleted, _ = Like.objects.using(using).filter(
+            user=user, post_id=post_id
+        ).delete()
+        if deleted:
+            bump(post_id, -1, using)
+    if deleted:
+        shift_feed_counts([like_key(post_id)], -1)
+    return bool(deleted)
+
+
+def forget_user_likes(user):
+    """Снимает все лайки пользователя, сдвигая счётчики постов."""
+    databases = settings.POST_SHARDS or [router.db_for_write(Like)]
+    for using in databases:
+        likes = Like.objects.using(using).filter(user=user)
+        post_ids = list(likes.values_list('post_id', flat=True))
+        if not post_ids:
+            continue
+        with transaction.atomic(using=using):
+            likes.delete()
+            for post_id in post_ids:
+                bump(post_id, -1, using)
+        forget_feed_counts([like_key(post_id) for post_id in post_ids])
+
+
+def like_counts(post_ids):
+    """Лайки постов страницы: из кэша, промахи — одним запросом на базу."""
+    keys = {like_key(post_id): post_id for post_id in post_ids}
+    counts = {
+        keys[key]: count for key, count in cache.get_many(keys).items()
+    }
+    missing = dict.fromkeys(
+        [post_id for post_id in post_ids if post_id not in counts], 0
+    )
+    for using, ids in by_db(missing):
+        missing.update(
+            LikeCounter.objects.using(using).filter(
+                post_id__in=ids
+            ).values('post_id').annotate(
+                total=Sum('count')
+            ).values_list('post_id', 'total')
+        )
+    for post_id, count in missing.items():
+        cache.add(like_key(post_id), count, COUNT_TIMEOUT)
+    counts.update(missing)
+    return counts
+
+
+def liked_among(user, post_ids):
+    """Какие из постов пользователь лайкнул — одним запросом на базу."""
+    if not user.is_authenticated:
+        return set()
+    liked = set()
+    for using, ids in by_db(post_ids):
+        liked.update(
+            Like.objects.using(using).filter(
+                user=user, post_id__in=ids
+            ).values_list('post_id', flat=True)
+        )
+    return liked
+
+
+def like_states(user, post_ids):
+    """Число лайков и отметка пользователя для страницы постов."""
+    counts = like_counts(post_ids)
+    liked = liked_among(user, post_ids)
+    return {
+        post_id: {'count': counts[post_id], 'liked': post_id in liked}
+        for post_id in post_ids
+    }
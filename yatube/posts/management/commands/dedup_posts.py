@@ -0,0 +1,132 @@
+import heapq
+from collections import defaultdict
+
+from django.core.management.base import BaseCommand
+from django.db import transaction
+
+from posts.cache import feed_count_keys, forget_feed_counts, touch_feeds
+from posts.duplicates import (
+    MAX_CANDIDATES, MIN_SIMILARITY, band_keys, fingerprint_fields, minhash,
+    similarity,
+)
+from posts.follow_graph import follower_ids
+from posts.models import Fingerprint, Post
+from posts.sharding import post_databases
+
+
+def posts_by_pk(using, chunk_size):
+    """Посты базы по возрастанию id, пачками по chunk_size."""
+    last_pk = 0
+    while True:
+        chunk = list(
+            Post.objects.using(using).filter(pk__gt=last_pk).order_by(
+                'pk'
+            ).only('pk', 'text', 'duplicate_of', 'author', 'group')[
+                :chunk_size
+            ]
+        )
+        if not chunk:
+            return
+        last_pk = chunk[-1].pk
+        yield from chunk
+
+
+class Index:
+    """LSH-полосы всех уже просмотренных постов в памяти."""
+
+    def __init__(self):
+        self.buckets = defaultdict(list)
+
+    def find(self, signature, keys):
+        seen = set()
+        for key in keys:
+            for post_id, other in self.buckets[key][:MAX_CANDIDATES]:
+                if post_id in seen:
+                    continue
+                seen.add(post_id)
+                if similarity(signature, other) >= MIN_SIMILARITY:
+                    return post_id
+        return None
+
+    def add(self, post_id, signature, keys):
+        for key in keys:
+            self.buckets[key].append((post_id, signature))
+
+
+class Command(BaseCommand):
+    help = (
+        'Пересчитывает отпечатки всех постов и отметки дубликатов: посты '
+        'идут по возрастанию id, ранний пост из группы похожих считается '
+        'оригиналом. Индекс полос строится в памяти, отпечатки и отметки '
+        'пишутся пачками, не опустошая индекс в базе.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--chunk-size', type=int, default=1000)
+        parser.add_argument(
+            '--dry-run', action='store_true',
+            help='Только посчитать дубликаты, ничего не записывая.'
+        )
+
+    def handle(self, *args, chunk_size, dry_run, **options):
+        self.dry_run = dry_run
+        self.last_pk = 0
+        index = Index()
+        fingerprints = []
+        changed = []
+        duplicates = changes = 0
+        posts = heapq.merge(
+            *(posts_by_pk(using, chunk_size) for using in post_databases()),
+            key=lambda post: post.pk
+        )
+        post = None
+        for number, post in enumerate(posts, 1):
+            signature = minhash(post.text)
+            duplicate_of = None
+            if signature is not None:
+                keys = list(enumerate(band_keys(signature)))
+                duplicate_of = index.find(signature, keys)
+                index.add(post.pk, signature, keys)
+                fingerprints.append(Fingerprint(
+                    post_id=post.pk, **fingerprint_fields(signature)
+                ))
+            duplicates += duplicate_of is not None
+            if duplicate_of != post.duplicate_of:
+                post.duplicate_of = duplicate_of
+                changed.append(post)
+            if number % chunk_size == 0:
+                changes += self.flush(fingerprints, changed, post.pk)
+                fingerprints, changed = [], []
+        if post is not None:
+            changes += self.flush(fingerprints, changed, post.pk)
+        self.stdout.write(
+            f'Дубликатов: {duplicates}, изменено отметок: {changes}'
+        )
+
+    def flush(self, fingerprints, changed, last_pk):
+        """Заменяет отпечатки диапазона id (прошлая пачка, last_pk] и
+        пишет отметки пачки. Остальной индекс тем временем цел, и проверка
+        новых постов продолжает работать."""
+        if self.dry_run:
+            return len(changed)
+        stale = Fingerprint.objects.filter(
+            post_id__gt=self.last_pk, post_id__lte=last_pk
+        )
+        self.last_pk = last_pk
+        with transaction.atomic():
+            stale.delete()
+            Fingerprint.objects.bulk_create(fingerprints)
+        self.save(changed)
+        return len(changed)
+
+    def save(self, posts):
+        by_db = defaultdict(list)
+        for post in posts:
+            by_db[post._state.db].append(post)
+        for using, group in by_db.items():
+            Post.objects.using(using).bulk_update(group, ['duplicate_of'])
+        for post in posts:
+            touch_feeds(post)
+            forget_feed_counts(feed_count_keys(
+                post, follower_ids=follower_ids(post.author_id)
+            ))
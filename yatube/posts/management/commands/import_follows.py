@@ -0,0 +1,78 @@
+import csv
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db import transaction
+
+from posts.autocomplete import announce
+from posts.follows import forget_follows
+from posts.models import Follow, User
+
+
+def chunks(rows, size):
+    chunk = []
+    for row in rows:
+        chunk.append(row)
+        if len(chunk) >= size:
+            yield chunk
+            chunk = []
+    if chunk:
+        yield chunk
+
+
+class Command(BaseCommand):
+    help = (
+        'Загружает граф подписок из CSV со столбцами user,author (имена). '
+        'Каждая пачка — один запрос имён и один bulk_create; уже '
+        'существующие подписки пропускаются.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('path')
+        parser.add_argument('--chunk-size', type=int, default=1000)
+
+    def handle(self, *args, path, chunk_size, **options):
+        created = missing = 0
+        with open(path, newline='', encoding='utf-8-sig') as source:
+            reader = csv.DictReader(source)
+            if not {'user', 'author'} <= set(reader.fieldnames or ()):
+                raise CommandError(
+                    'В заголовке CSV нужны столбцы user и author.'
+                )
+            for chunk in chunks(reader, chunk_size):
+                pairs, new_pairs = self.import_chunk(chunk)
+                missing += len(chunk) - pairs
+                created += new_pairs
+        if created:
+            # Ранги по подписчикам живут в процессах сайта: запись журнала
+            # велит им пересобрать индексы автодополнения.
+            announce('users')
+        self.stdout.write(
+            f'Обработано подписок: {created}, пропущено строк: {missing}'
+        )
+
+    def import_chunk(self, chunk):
+        """Пишет новые подписки пачки; возвращает число годных пар и
+        число новых среди них."""
+        rows = [
+            (row['user'].strip(), row['author'].strip()) for row in chunk
+            if row['user'] and row['author']
+        ]
+        names = {name for pair in rows for name in pair}
+        ids = dict(User.objects.filter(
+            username__in=names
+        ).values_list('username', 'pk'))
+        pairs = {
+            (ids[user], ids[author]) for user, author in rows
+            if user in ids and author in ids and user != author
+        }
+        new_pairs = pairs - set(Follow.objects.filter(
+            user_id__in={user for user, _ in pairs},
+            author_id__in={author for _, author in pairs},
+        ).values_list('user_id', 'author_id'))
+        with transaction.atomic():
+            Follow.objects.bulk_create(
+                [Follow(user_id=u, author_id=a) for u, a in new_pairs],
+                ignore_conflicts=True
+            )
+        forget_follows(new_pairs)
+        return len(pairs), len(new_pairs)
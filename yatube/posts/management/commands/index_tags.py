@@ -0,0 +1,34 @@
+from django.core.management.base import BaseCommand
+
+from posts.models import Post
+from posts.sharding import post_databases
+from posts.tags import index_posts
+
+
+class Command(BaseCommand):
+    help = (
+        'Пересобирает индекс хэштегов и упоминаний для уже сохранённых '
+        'постов. Посты идут пачками по id; повторный запуск безопасен.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--chunk-size', type=int, default=500)
+
+    def handle(self, *args, chunk_size, **options):
+        indexed = 0
+        for using in post_databases():
+            last_pk = 0
+            while True:
+                chunk = list(
+                    Post.objects.using(using).filter(
+                        pk__gt=last_pk
+                    ).order_by('pk').only('pk', 'text', 'pub_date')[
+                        :chunk_size
+                    ]
+                )
+                if not chunk:
+                    break
+                last_pk = chunk[-1].pk
+                index_posts(chunk)
+                indexed += len(chunk)
+        self.stdout.write(f'Проиндексировано постов: {indexed}')
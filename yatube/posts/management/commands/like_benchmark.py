@@ -0,0 +1,113 @@
+import threading
+import time
+
+from django.conf import settings
+from django.contrib.auth.hashers import make_password
+from django.core.management.base import BaseCommand
+from django.db import OperationalError, connections
+from django.db.models import Sum
+
+from posts.likes import like, likes_db
+from posts.models import Like, LikeCounter, Post, User
+
+PREFIX = 'like-benchmark-'
+
+
+def work(users, post_id, shards, stop, counters, lock):
+    try:
+        for user in users:
+            if stop.is_set():
+                break
+            try:
+                like(user, post_id, shards)
+                result = 'likes'
+            except OperationalError:
+                result = 'errors'
+            with lock:
+                counters[result] += 1
+    finally:
+        connections.close_all()
+
+
+def run(users, post_id, shards, writers, duration):
+    """Лайки и ошибки блокировок от writers потоков и время прогона."""
+    stop = threading.Event()
+    lock = threading.Lock()
+    counters = {'likes': 0, 'errors': 0}
+    threads = [
+        threading.Thread(
+            target=work,
+            args=(users[number::writers], post_id, shards, stop, counters,
+                  lock)
+        )
+        for number in range(writers)
+    ]
+    started = time.monotonic()
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join(max(0, started + duration - time.monotonic()))
+    stop.set()
+    for thread in threads:
+        thread.join()
+    return counters, time.monotonic() - started
+
+
+def consistent(post_id):
+    """Сумма строк счётчика совпадает с числом лайков."""
+    using = likes_db(post_id)
+    total = LikeCounter.objects.using(using).filter(
+        post_id=post_id
+    ).aggregate(total=Sum('count'))['total'] or 0
+    return total == Like.objects.using(using).filter(post_id=post_id).count()
+
+
+def cleanup():
+    users = User.objects.filter(username__startswith=PREFIX)
+    for using in settings.POST_SHARDS or [Post.objects.db]:
+        Post.objects.using(using).filter(author__in=list(users)).delete()
+    users.delete()
+
+
+class Command(BaseCommand):
+    help = (
+        'Измеряет пропускную способность лайков одного поста при '
+        'конкурентных писателях с разным числом строк счётчика. '
+        'Временные пользователи и посты удаляются после прогона.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--writers', type=int, default=4)
+        parser.add_argument('--users', type=int, default=2000)
+        parser.add_argument('--duration', type=float, default=5)
+        parser.add_argument(
+            '--shards', type=int, nargs='+',
+            default=[1, settings.LIKE_COUNTER_SHARDS]
+        )
+
+    def handle(self, *args, writers, users, duration, shards, **options):
+        cleanup()
+        try:
+            User.objects.bulk_create([
+                User(
+                    username=f'{PREFIX}{number}', password=make_password(None)
+                )
+                for number in range(users + 1)
+            ])
+            likers = list(
+                User.objects.filter(username__startswith=PREFIX).order_by('pk')
+            )
+            author = likers.pop()
+            for count in shards:
+                post = Post.objects.create(author=author, text=PREFIX)
+                counters, elapsed = run(
+                    likers, post.pk, count, writers, duration
+                )
+                self.stdout.write(
+                    f'строк счётчика {count}: '
+                    f'лайков/с {counters["likes"] / elapsed:.0f}, '
+                    f'ошибок {counters["errors"]}, '
+                    f'сумма сходится: {consistent(post.pk)}'
+                )
+        finally:
+            cleanup()
@@ -0,0 +1,133 @@
+import heapq
+import os
+import posixpath
+import time
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db import transaction
+from sorl.thumbnail import default as thumbnail
+from sorl.thumbnail.images import ImageFile
+
+from posts.models import Post
+from posts.sharding import post_databases
+
+
+def walk_sorted(storage, directory):
+    """Файлы каталога в порядке сравнения полных путей как строк.
+
+    В памяти только содержимое одного каталога: подкаталог сортируется
+    по имени со слэшем, тогда его файлы идут подряд и на своём месте.
+    """
+    try:
+        entries = list(os.scandir(storage.path(directory)))
+    except FileNotFoundError:
+        return
+    entries.sort(key=lambda entry: entry.name + (
+        '/' if entry.is_dir(follow_symlinks=False) else ''
+    ))
+    for entry in entries:
+        name = posixpath.join(directory, entry.name)
+        if entry.is_dir(follow_symlinks=False):
+            yield from walk_sorted(storage, name)
+        elif entry.is_file(follow_symlinks=False):
+            yield name, entry.stat(follow_symlinks=False).st_mtime
+
+
+def referenced_names(chunk_size):
+    """Имена картинок из всех шардов одним отсортированным потоком."""
+    streams = [
+        Post.objects.using(db).exclude(image='').order_by('image').values_list(
+            'image', flat=True
+        ).distinct().iterator(chunk_size=chunk_size)
+        for db in post_databases()
+    ]
+    previous = ''
+    for name in heapq.merge(*streams):
+        if name < previous:
+            raise CommandError(
+                'База сортирует имена не по кодам символов, '
+                'слияние с деревом файлов невозможно.'
+            )
+        previous = name
+        yield name
+
+
+def orphans(files, referenced):
+    """Merge-join двух отсортированных потоков: файлы без ссылок."""
+    current = next(referenced, None)
+    for name, mtime in files:
+        while current is not None and current < name:
+            current = next(referenced, None)
+        if name != current:
+            yield name, mtime
+
+
+class Command(BaseCommand):
+    help = (
+        'Удаляет картинки постов, на которые не ссылается ни один пост, '
+        'вместе с их миниатюрами. Дерево файлов и столбец image идут '
+        'сортированными потоками, поэтому память не растёт с числом файлов.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--chunk-size', type=int, default=500)
+        parser.add_argument(
+            '--pause', type=float, default=0.1,
+            help='Пауза между пачками удалений в секундах.'
+        )
+        parser.add_argument(
+            '--min-age', type=int, default=3600,
+            help='Не трогать файлы моложе стольких секунд.'
+        )
+        parser.add_argument('--dry-run', action='store_true')
+
+    def handle(self, *args, chunk_size, pause, min_age, dry_run, **options):
+        field = Post._meta.get_field('image')
+        self.storage = field.storage
+        self.cutoff = time.time() - min_age
+        files = walk_sorted(self.storage, field.upload_to.rstrip('/'))
+        found = deleted = 0
+        batch = []
+        for name, mtime in orphans(files, referenced_names(chunk_size)):
+            if mtime >= self.cutoff:
+                continue
+            found += 1
+            if dry_run:
+                self.stdout.write(name)
+                continue
+            batch.append(name)
+            if len(batch) >= chunk_size:
+                deleted += self.delete(batch)
+                batch = []
+                time.sleep(pause)
+        if batch:
+            deleted += self.delete(batch)
+        if dry_run:
+            self.stdout.write(f'Будет удалено файлов: {found}')
+        else:
+            self.stdout.write(f'Удалено файлов: {deleted}')
+
+    def delete(self, names):
+        """Перепроверяет пачку под блокировкой и удаляет файлы с миниатюрами.
+
+        Пока шёл обход, файл мог снова понадобиться: новый пост с той же
+        картинкой ссылается на него и обновляет mtime.
+        """
+        with transaction.atomic():
+            live = set()
+            for db in post_databases():
+                live.update(Post.objects.using(db).filter(
+                    image__in=names
+                ).values_list('image', flat=True))
+            deleted = 0
+            for name in names:
+                try:
+                    mtime = os.path.getmtime(self.storage.path(name))
+                except FileNotFoundError:
+                    continue
+                if name in live or mtime >= self.cutoff:
+                    continue
+                thumbnail.kvstore.delete(ImageFile(name, self.storage))
+                self.storage.purge(name)
+                deleted += 1
+        return deleted
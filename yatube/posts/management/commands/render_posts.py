@@ -0,0 +1,56 @@
+import time
+
+from django.core.management.base import BaseCommand
+from django.db import transaction
+
+from posts.models import Post
+from posts.rendering import RENDERER_VERSION, render_posts
+from posts.sharding import post_databases
+
+
+class Command(BaseCommand):
+    help = (
+        'Фоновая перерисовка HTML постов, отрендеренных прежней версией '
+        'RENDERER_VERSION или ещё не отрендеренных. С --interval работает '
+        'постоянно.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--interval', type=float, default=0,
+            help='Пауза между проходами в секундах; 0 - один проход.'
+        )
+        parser.add_argument('--chunk-size', type=int, default=500)
+
+    def handle(self, *args, interval, chunk_size, **options):
+        while True:
+            processed = sum(
+                self.process(using, chunk_size) for using in post_databases()
+            )
+            if processed:
+                self.stdout.write(f'Перерисовано постов: {processed}')
+            if not interval:
+                break
+            time.sleep(interval)
+
+    def process(self, using, chunk_size):
+        """Все устаревшие посты базы, пачками по id."""
+        processed = 0
+        last_pk = 0
+        while True:
+            # Блокировка строк не даёт затереть HTML поста, который
+            # отредактировали между чтением и записью пачки.
+            with transaction.atomic(using=using):
+                chunk = list(
+                    Post.objects.using(using).select_for_update().filter(
+                        renderer_version__lt=RENDERER_VERSION, pk__gt=last_pk
+                    ).order_by('pk').only('pk', 'text')[:chunk_size]
+                )
+                if not chunk:
+                    return processed
+                render_posts(chunk)
+                Post.objects.using(using).bulk_update(
+                    chunk, ['text_html', 'renderer_version']
+                )
+            last_pk = chunk[-1].pk
+            processed += len(chunk)
@@ -0,0 +1,188 @@
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+from django.core.management.color import no_style
+from django.db import DEFAULT_DB_ALIAS, connections, transaction
+from django.db.models import Case, IntegerField, Max, Value, When
+
+from posts.cache import touch_feeds
+from posts.models import (
+    Comment, Fingerprint, Like, LikeCounter, Mention, Notification, Post,
+    PostIdSequence, TaggedPost,
+)
+from posts.sharding import allocate_post_id, bucket_for, shard_for_author
+
+RELATED_MODELS = (Comment, Like, LikeCounter)
+# Ссылки на посты по id в основной базе.
+REFERENCING_MODELS = (TaggedPost, Mention, Fingerprint, Notification)
+
+
+def raw_delete(model, ids, using):
+    """DELETE без сигналов: строки переезжают, а не удаляются."""
+    connection = connections[using]
+    table = connection.ops.quote_name(model._meta.db_table)
+    column = 'id' if model is Post else 'post_id'
+    placeholders = ', '.join(['%s'] * len(ids))
+    with connection.cursor() as cursor:
+        cursor.execute(
+            f'DELETE FROM {table} WHERE {column} IN ({placeholders})', ids
+        )
+
+
+def copy_rows(model, objects, using):
+    """INSERT строк как есть, без auto_now и сигналов bulk_create."""
+    connection = connections[using]
+    fields = model._meta.concrete_fields
+    quote = connection.ops.quote_name
+    columns = ', '.join(quote(field.column) for field in fields)
+    placeholders = ', '.join(['%s'] * len(fields))
+    params = [
+        [
+            field.get_db_prep_save(getattr(obj, field.attname), connection)
+            for field in fields
+        ]
+        for obj in objects
+    ]
+    with connection.cursor() as cursor:
+        cursor.executemany(
+            f'INSERT INTO {quote(model._meta.db_table)} ({columns}) '
+            f'VALUES ({placeholders})',
+            params
+        )
+
+
+def remap(queryset, field, mapping):
+    """Переписывает id постов в поле по словарю старый id → новый."""
+    queryset.filter(**{f'{field}__in': list(mapping)}).update(**{
+        field: Case(
+            *[
+                When(**{field: old}, then=Value(new))
+                for old, new in mapping.items()
+            ],
+            output_field=IntegerField()
+        )
+    })
+
+
+def seed_post_ids(databases):
+    """Сдвигает PostIdSequence за самый большой id поста, чтобы новые id
+    не совпали с выданными автоинкрементом до шардирования."""
+    top = max(
+        Post.objects.using(db).aggregate(top=Max('pk'))['top'] or 0
+        for db in databases
+    )
+    needed = top // settings.POST_SHARD_BUCKETS + 1
+    sequences = PostIdSequence.objects.using(DEFAULT_DB_ALIAS)
+    if sequences.filter(pk__gte=needed).exists():
+        return
+    sequences.create(pk=needed)
+    connection = connections[DEFAULT_DB_ALIAS]
+    with connection.cursor() as cursor:
+        for sql in connection.ops.sequence_reset_sql(
+            no_style(), [PostIdSequence]
+        ):
+            cursor.execute(sql)
+
+
+def is_legacy(post):
+    """Id поста без шардов выдал автоинкремент, и по нему шард не найти."""
+    return bucket_for(post.pk) != bucket_for(post.author_id)
+
+
+def rekey(posts, related):
+    """Выдаёт старым постам id из бакета автора; старый id → новый."""
+    mapping = {
+        post.pk: allocate_post_id(post.author_id)
+        for post in posts if is_legacy(post)
+    }
+    for post in posts:
+        post.pk = mapping.get(post.pk, post.pk)
+    for _, objects in related:
+        for obj in objects:
+            obj.post_id = mapping.get(obj.post_id, obj.post_id)
+    return mapping
+
+
+class Command(BaseCommand):
+    help = (
+        'Переносит посты с комментариями и лайками между шардами после '
+        'изменения POST_SHARDS. Строки идут пачками по id; повторный '
+        'запуск безопасен. Посты, созданные до шардирования, получают '
+        'новый id из бакета автора, и их адреса меняются.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--from', dest='old_shards', nargs='+', required=True,
+            help='Список шардов до изменения, в прежнем порядке.'
+        )
+        parser.add_argument('--chunk-size', type=int, default=500)
+
+    def handle(self, *args, old_shards, chunk_size, **options):
+        unknown = set(old_shards) - set(connections.databases)
+        if unknown or not settings.POST_SHARDS:
+            raise CommandError('Шарды должны быть описаны в DATABASES.')
+        seed_post_ids(set(old_shards) | set(settings.POST_SHARDS))
+        moved = 0
+        for source in old_shards:
+            moved += self.reshard(source, chunk_size)
+        self.stdout.write(f'Перенесено постов: {moved}')
+
+    def reshard(self, source, chunk_size):
+        moved = 0
+        last_pk = 0
+        while True:
+            chunk = list(
+                Post.objects.using(source).filter(
+                    pk__gt=last_pk
+                ).order_by('pk')[:chunk_size]
+            )
+            if not chunk:
+                return moved
+            last_pk = chunk[-1].pk
+            targets = {}
+            for post in chunk:
+                target = shard_for_author(post.author_id)
+                if target != source or is_legacy(post):
+                    targets.setdefault(target, []).append(post)
+            for target, posts in targets.items():
+                self.move(posts, source, target)
+                moved += len(posts)
+
+    def move(self, posts, source, target):
+        ids = [post.pk for post in posts]
+        related = [] if source == target else [
+            (model, list(model.objects.using(source).filter(post_id__in=ids)))
+            for model in RELATED_MODELS
+        ]
+        mapping = rekey(posts, related)
+        new_ids = [post.pk for post in posts]
+        with transaction.atomic(using=DEFAULT_DB_ALIAS), \
+                transaction.atomic(using=source), \
+                transaction.atomic(using=target):
+            if source != target:
+                # Остатки прерванного запуска.
+                for model in RELATED_MODELS:
+                    raw_delete(model, new_ids, target)
+                raw_delete(Post, new_ids, target)
+            copy_rows(Post, posts, target)
+            if source == target:
+                # Пост остаётся в шарде и только меняет id: комментарии
+                # и лайки не копируются, в них переписывается ссылка.
+                for model in RELATED_MODELS:
+                    remap(model.objects.using(target), 'post_id', mapping)
+            else:
+                for model, objects in related:
+                    copy_rows(model, objects, target)
+                    raw_delete(model, ids, source)
+            raw_delete(Post, ids, source)
+            if mapping:
+                self.remap_references(mapping)
+        if mapping:
+            for post in posts:
+                touch_feeds(post)
+
+    def remap_references(self, mapping):
+        for model in REFERENCING_MODELS:
+            remap(model.objects.using(DEFAULT_DB_ALIAS), 'post_id', mapping)
+        for db in settings.POST_SHARDS:
+            remap(Post.objects.using(db), 'duplicate_of', mapping)
@@ -0,0 +1,85 @@
+import time
+
+from django.conf import settings
+from django.core.mail import send_mass_mail
+from django.core.management.base import BaseCommand
+from django.db.models import Count, Max
+from django.utils import timezone
+
+from posts.models import Notification
+
+
+def digest_text(rows):
+    total = sum(row['comments'] for row in rows)
+    lines = [f'Новых комментариев к вашим постам: {total}.', '']
+    for row in rows:
+        lines.append(
+            f"Пост {settings.SITE_URL}/posts/{row['post_id']}/ — "
+            f"комментариев: {row['comments']}, "
+            f"комментаторов: {row['actors']}"
+        )
+    return '\n'.join(lines)
+
+
+class Command(BaseCommand):
+    help = (
+        'Рассылает по одному письму на пользователя со сводкой новых '
+        'комментариев. Получатели идут пачками, сводка по пачке считается '
+        'одним агрегирующим запросом.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--chunk-size', type=int, default=500)
+        parser.add_argument(
+            '--interval', type=float, default=0,
+            help='Пауза между рассылками в секундах; 0 - один раз.'
+        )
+
+    def handle(self, *args, chunk_size, interval, **options):
+        while True:
+            sent = self.send(chunk_size)
+            self.stdout.write(f'Отправлено сводок: {sent}')
+            if not interval:
+                break
+            time.sleep(interval)
+
+    def send(self, chunk_size):
+        cutoff = timezone.now()
+        pending = Notification.objects.filter(
+            emailed=False, created__lte=cutoff
+        )
+        sent = 0
+        last_id = 0
+        while True:
+            recipients = list(pending.filter(
+                recipient_id__gt=last_id
+            ).order_by('recipient_id').values_list(
+                'recipient_id', flat=True
+            ).distinct()[:chunk_size])
+            if not recipients:
+                return sent
+            last_id = recipients[-1]
+            batch = pending.filter(recipient_id__in=recipients)
+            sent += self.send_batch(batch)
+            batch.update(emailed=True)
+
+    def send_batch(self, batch):
+        rows = batch.exclude(recipient__email='').values(
+            'recipient_id', 'recipient__email', 'post_id'
+        ).annotate(
+            comments=Count('id'),
+            actors=Count('actor_id', distinct=True),
+            latest=Max('created')
+        ).order_by('recipient_id', '-latest')
+        digests = {}
+        for row in rows:
+            digests.setdefault(row['recipient__email'], []).append(row)
+        return send_mass_mail([
+            (
+                'Новые комментарии на Yatube',
+                digest_text(user_rows),
+                settings.DEFAULT_FROM_EMAIL,
+                [email]
+            )
+            for email, user_rows in digests.items()
+        ])
@@ -0,0 +1,30 @@
+# Generated by Django 2.2.16 on 2026-10-19 10:41
+
+from django.db import migrations, models
+from django.db.models import Min
+
+
+def remove_duplicate_follows(apps, schema_editor):
+    Follow = apps.get_model('posts', 'Follow')
+    db = schema_editor.connection.alias
+    keep = Follow.objects.using(db).values('user', 'author').annotate(
+        keep=Min('id')
+    ).values_list('keep', flat=True)
+    Follow.objects.using(db).exclude(id__in=list(keep)).delete()
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('posts', '0009_notification'),
+    ]
+
+    operations = [
+        migrations.RunPython(
+            remove_duplicate_follows, migrations.RunPython.noop
+        ),
+        migrations.AddConstraint(
+            model_name='follow',
+            constraint=models.UniqueConstraint(fields=('user', 'author'), name='unique_follow'),
+        ),
+    ]
@@ -0,0 +1,60 @@
+# Generated by Django 2.2.16 on 2026-10-19 10:42
+
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+SEGMENT = 8
+ALPHABET = '0123456789abcdefghijklmnopqrstuvwxyz'
+
+
+def encode(pk):
+    chars = []
+    for _ in range(SEGMENT):
+        pk, digit = divmod(pk, len(ALPHABET))
+        chars.append(ALPHABET[digit])
+    return ''.join(reversed(chars))
+
+
+def fill_paths(apps, schema_editor):
+    """Прежние комментарии становятся корнями веток."""
+    Comment = apps.get_model('posts', 'Comment')
+    comments = Comment.objects.using(schema_editor.connection.alias)
+    batch = []
+    for comment in comments.only('pk').iterator(chunk_size=1000):
+        comment.path = encode(comment.pk)
+        batch.append(comment)
+        if len(batch) == 1000:
+            comments.bulk_update(batch, ['path'])
+            batch = []
+    comments.bulk_update(batch, ['path'])
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('posts', '0010_follow_unique'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='comment',
+            name='depth',
+            field=models.PositiveSmallIntegerField(default=0, editable=False),
+        ),
+        migrations.AddField(
+            model_name='comment',
+            name='parent',
+            field=models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.CASCADE, related_name='replies', to='posts.Comment', verbose_name='Ответ на'),
+        ),
+        migrations.AddField(
+            model_name='comment',
+            name='path',
+            field=models.CharField(default='', editable=False, max_length=64),
+        ),
+        migrations.RunPython(fill_paths, migrations.RunPython.noop),
+        migrations.AddIndex(
+            model_name='comment',
+            index=models.Index(fields=['post', 'path'], name='posts_comme_post_id_abd11d_idx'),
+        ),
+    ]
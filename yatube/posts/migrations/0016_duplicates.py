@@ -0,0 +1,34 @@
+# Generated by Django 2.2.16 on 2026-10-19 10:56
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('posts', '0015_post_text_html'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='Fingerprint',
+            fields=[
+                ('id', models.AutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('post_id', models.PositiveIntegerField(unique=True, verbose_name='Пост')),
+                ('signature', models.BinaryField()),
+                ('band0', models.BigIntegerField(db_index=True)),
+                ('band1', models.BigIntegerField(db_index=True)),
+                ('band2', models.BigIntegerField(db_index=True)),
+                ('band3', models.BigIntegerField(db_index=True)),
+                ('band4', models.BigIntegerField(db_index=True)),
+                ('band5', models.BigIntegerField(db_index=True)),
+                ('band6', models.BigIntegerField(db_index=True)),
+                ('band7', models.BigIntegerField(db_index=True)),
+            ],
+        ),
+        migrations.AddField(
+            model_name='post',
+            name='duplicate_of',
+            field=models.PositiveIntegerField(blank=True, editable=False, null=True, verbose_name='Дубликат поста'),
+        ),
+    ]
@@ -1,6 +1,8 @@
 from django.db import models
 from django.contrib.auth import get_user_model
 
+from core.storage import media_storage
+
 User = get_user_model()
 
 
@@ -13,6 +15,16 @@ class Group(models.Model):
         return self.title
 
 
+class ShardedQuerySet(models.QuerySet):
+    def create(self, **kwargs):
+        """Без явного using базу выбирает роутер по самому объекту."""
+        if self._db is not None:
+            return super().create(**kwargs)
+        obj = self.model(**kwargs)
+        obj.save(force_insert=True)
+        return obj
+
+
 class Post(models.Model):
     text = models.TextField(
         'Текст поста',
@@ -22,11 +34,18 @@ class Post(models.Model):
         'Дата публикации',
         auto_now_add=True
     )
+    updated = models.DateTimeField(
+        'Дата изменения',
+        auto_now=True
+    )
+    # Посты могут жить в шардах без таблиц пользователей и групп,
+    # поэтому внешние ключи на них проверяются только в Django.
     author = models.ForeignKey(
         User,
         on_delete=models.CASCADE,
         verbose_name='Автор',
-        related_name='posts'
+        related_name='posts',
+        db_constraint=False
     )
     group = models.ForeignKey(
         Group,
@@ -34,6 +53,7 @@ class Post(models.Model):
         related_name='posts',
         blank=True,
         null=True,
+        db_constraint=False,
         verbose_name='Группа',
         help_text='Выберите группу'
     )
@@ -41,8 +61,30 @@ class Post(models.Model):
     image = models.ImageField(
         'Картинка',
         upload_to='posts/',
+        storage=media_storage,
         blank=True
     )
+    # HTML текста и версия рендерера, см. posts.rendering.
+    text_html = models.TextField(editable=False, default='')
+    renderer_version = models.PositiveSmallIntegerField(
+        editable=False, default=0, db_index=True
+    )
+    # Ранний почти такой же пост, см. posts.duplicates.
+    duplicate_of = models.PositiveIntegerField(
+        'Дубликат поста',
+        null=True,
+        blank=True,
+        editable=False
+    )
+    # Пишется только пачками из posts.view_counts.
+    views = models.PositiveIntegerField(
+        'Просмотры',
+        default=0,
+        editable=False,
+        db_index=True
+    )
+
+    objects = ShardedQuerySet.as_manager()
 
     class Meta:
         ordering = ['-pub_date']
@@ -50,6 +92,19 @@ class Post(models.Model):
     def __str__(self):
         return self.text[:15]
 
+    def save(self, *args, **kwargs):
+        """Редактирование не перезаписывает накопленные просмотры."""
+        if not self._state.adding and kwargs.get('update_fields') is None:
+            kwargs['update_fields'] = [
+                field.name for field in self._meta.concrete_fields
+                if not field.primary_key and field.name != 'views'
+            ]
+        super().save(*args, **kwargs)
+
+
+class PostIdSequence(models.Model):
+    """Автоинкремент основной базы, из которого берутся id постов шардов."""
+
 
 class Comment(models.Model):
     post = models.ForeignKey(
@@ -60,7 +115,8 @@ class Comment(models.Model):
     author = models.ForeignKey(
         User,
         on_delete=models.CASCADE,
-        related_name='comments'
+        related_name='comments',
+        db_constraint=False
     )
     text = models.TextField(
         'Текст',
@@ -69,6 +125,22 @@ class Comment(models.Model):
     created = models.DateTimeField(
         auto_now_add=True
     )
+    parent = models.ForeignKey(
+        'self',
+        on_delete=models.CASCADE,
+        related_name='replies',
+        blank=True,
+        null=True,
+        verbose_name='Ответ на'
+    )
+    # Материализованный путь, см. posts.threads.
+    path = models.CharField(max_length=64, editable=False, default='')
+    depth = models.PositiveSmallIntegerField(editable=False, default=0)
+
+    objects = ShardedQuerySet.as_manager()
+
+    class Meta:
+        indexes = [models.Index(fields=['post', 'path'])]
 
     def __str__(self):
         return self.text
@@ -86,5 +158,149 @@ class Follow(models.Model):
         related_name='following'
     )
 
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(
+                fields=['user', 'author'], name='unique_follow'
+            ),
+        ]
+
     def __str__(self):
         return f'{self.user} follows {self.author}'
+
+
+class Notification(models.Model):
+    recipient = models.ForeignKey(
+        User,
+        on_delete=models.CASCADE,
+        related_name='notifications',
+        verbose_name='Получатель'
+    )
+    actor = models.ForeignKey(
+        User,
+        on_delete=models.CASCADE,
+        related_name='+',
+        verbose_name='Автор комментария'
+    )
+    # Пост может лежать в шарде, поэтому хранится только его id.
+    post_id = models.PositiveIntegerField('Пост')
+    text = models.CharField('Комментарий', max_length=200)
+    created = models.DateTimeField(auto_now_add=True, db_index=True)
+    is_read = models.BooleanField(default=False)
+    emailed = models.BooleanField(default=False)
+
+    class Meta:
+        ordering = ['-created']
+        indexes = [
+            models.Index(fields=['recipient', 'is_read']),
+            models.Index(fields=['emailed', 'recipient']),
+        ]
+
+    def __str__(self):
+        return f'{self.actor} → {self.recipient}: {self.text[:15]}'
+
+
+class Like(models.Model):
+    post = models.ForeignKey(
+        Post,
+        on_delete=models.CASCADE,
+        related_name='likes'
+    )
+    user = models.ForeignKey(
+        User,
+        on_delete=models.CASCADE,
+        related_name='likes',
+        db_constraint=False
+    )
+    created = models.DateTimeField(auto_now_add=True)
+
+    objects = ShardedQuerySet.as_manager()
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(
+                fields=['user', 'post'], name='unique_like'
+            ),
+        ]
+
+    def __str__(self):
+        return f'{self.user} likes {self.post_id}'
+
+
+class LikeCounter(models.Model):
+    """Одна из строк счётчика лайков поста, см. posts.likes."""
+    post = models.ForeignKey(
+        Post,
+        on_delete=models.CASCADE,
+        related_name='like_counters'
+    )
+    shard = models.PositiveSmallIntegerField()
+    # Может уйти в минус: снятие лайка вычитается из любой строки.
+    count = models.IntegerField(default=0)
+
+    objects = ShardedQuerySet.as_manager()
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(
+                fields=['post', 'shard'], name='unique_like_counter'
+            ),
+        ]
+
+
+class Tag(models.Model):
+    name = models.CharField('Тег', max_length=50, unique=True)
+
+    def __str__(self):
+        return f'#{self.name}'
+
+
+class TaggedPost(models.Model):
+    """Строка индекса тега; дата поста нужна для ленты без JOIN."""
+    tag = models.ForeignKey(
+        Tag,
+        on_delete=models.CASCADE,
+        related_name='entries'
+    )
+    post_id = models.PositiveIntegerField('Пост')
+    pub_date = models.DateTimeField()
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(
+                fields=['tag', 'post_id'], name='unique_tagged_post'
+            ),
+        ]
+        indexes = [models.Index(fields=['tag', '-pub_date', '-post_id'])]
+
+
+class Mention(models.Model):
+    user = models.ForeignKey(
+        User,
+        on_delete=models.CASCADE,
+        related_name='mentions'
+    )
+    post_id = models.PositiveIntegerField('Пост')
+    pub_date = models.DateTimeField()
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(
+                fields=['user', 'post_id'], name='unique_mention'
+            ),
+        ]
+        indexes = [models.Index(fields=['user', '-pub_date', '-post_id'])]
+
+
+class Fingerprint(models.Model):
+    """MinHash-подпись поста и ключи её полос, см. posts.duplicates."""
+    post_id = models.PositiveIntegerField('Пост', unique=True)
+    signature = models.BinaryField()
+    band0 = models.BigIntegerField(db_index=True)
+    band1 = models.BigIntegerField(db_index=True)
+    band2 = models.BigIntegerField(db_index=True)
+    band3 = models.BigIntegerField(db_index=True)
+    band4 = models.BigIntegerField(db_index=True)
+    band5 = models.BigIntegerField(db_index=True)
+    band6 = models.BigIntegerField(db_index=True)
+    band7 = models.BigIntegerField(db_index=True)
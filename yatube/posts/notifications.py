@@ -0,0 +1,36 @@
+"""Уведомления о комментариях: входящие со счётчиком непрочитанных."""
+from .cache import count_key, feed_count, forget_feed_counts, shift_feed_counts
+from .models import Notification
+
+TEXT_LENGTH = 200
+
+
+def unread_key(user_id):
+    return count_key('unread', user_id)
+
+
+def unread_count(user):
+    return feed_count(
+        user.notifications.filter(is_read=False), 'unread', user.pk
+    )
+
+
+def notify_comment(comment):
+    """Одно уведомление автору поста, если комментарий не его."""
+    recipient_id = comment.post.author_id
+    if recipient_id == comment.author_id:
+        return
+    Notification.objects.create(
+        recipient_id=recipient_id,
+        actor_id=comment.author_id,
+        post_id=comment.post_id,
+        text=comment.text[:TEXT_LENGTH]
+    )
+    shift_feed_counts([unread_key(recipient_id)], 1)
+
+
+def mark_read(user, notification_ids):
+    Notification.objects.filter(
+        recipient=user, pk__in=notification_ids, is_read=False
+    ).update(is_read=True)
+    forget_feed_counts([unread_key(user.pk)])
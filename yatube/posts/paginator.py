@@ -0,0 +1,47 @@
+from django.core.paginator import Paginator
+from django.utils.functional import cached_property
+
+from .cache import feed_count
+
+POSTS_PER_PAGE = 10
+
+
+class FeedPaginator(Paginator):
+    """Пагинатор ленты с кэшированным счётчиком постов."""
+
+    ELLIPSIS = '…'
+
+    def __init__(self, object_list, per_page, feed=(), **kwargs):
+        super().__init__(object_list, per_page, **kwargs)
+        self.feed = feed
+
+    @cached_property
+    def count(self):
+        if not self.feed:
+            return super().count
+        return feed_count(self.object_list, *self.feed)
+
+    def get_elided_page_range(self, number=1, *, on_each_side=3, on_ends=2):
+        """Окно страниц вокруг текущей, остальные заменены многоточием."""
+        number = self.validate_number(number)
+        if self.num_pages <= (on_each_side + on_ends) * 2:
+            yield from self.page_range
+            return
+        if number > 1 + on_each_side + on_ends + 1:
+            yield from range(1, on_ends + 1)
+            yield self.ELLIPSIS
+            yield from range(number - on_each_side, number + 1)
+        else:
+            yield from range(1, number + 1)
+        if number < self.num_pages - on_each_side - on_ends - 1:
+            yield from range(number + 1, number + on_each_side + 1)
+            yield self.ELLIPSIS
+            yield from range(self.num_pages - on_ends + 1, self.num_pages + 1)
+        else:
+            yield from range(number + 1, self.num_pages + 1)
+
+
+def get_page_obj(request, post_list, *feed):
+    """Страница ленты; feed задаёт ключ её счётчика в кэше."""
+    paginator = FeedPaginator(post_list, POSTS_PER_PAGE, feed=feed)
+    return paginator.get_page(request.GET.get('page'))
@@ -0,0 +1,80 @@
+"""Текст поста в HTML: абзацы, переносы, ссылки, теги и упоминания.
+
+HTML считается один раз при сохранении и хранится в Post.text_html
+вместе с версией рендерера, ленты выводят его как есть. Текст
+экранируется целиком, теги добавляет только сам рендерер, поэтому
+отдельный санитайзер не нужен. После изменения правил поднимите
+RENDERER_VERSION: render_posts перерисует старые посты в фоне.
+"""
+import re
+
+from django.urls import reverse
+from django.utils.html import escape, format_html
+
+from .models import User
+from .tags import MENTION_RE, TAG_RE, parse_mentions
+
+RENDERER_VERSION = 1
+PARAGRAPH_RE = re.compile(r'\n\s*\n')
+TOKEN_RE = re.compile('|'.join([
+    r'(?P<url>https?://[^\s<>"\']*[^\s<>"\'.,;:!?)])',
+    f'(?P<tag>{TAG_RE.pattern})',
+    f'(?P<mention>{MENTION_RE.pattern})',
+]))
+
+
+def link(match, usernames):
+    token = match.group()
+    if match.group('url'):
+        return format_html(
+            '<a href="{}" rel="nofollow noopener">{}</a>', token, token
+        )
+    if match.group('tag'):
+        url = reverse('posts:tag_posts', args=[token[1:].lower()])
+        return format_html('<a href="{}">{}</a>', url, token)
+    name = token[1:].rstrip('.')
+    if name not in usernames:
+        return escape(token)
+    url = reverse('posts:profile', args=[name])
+    return format_html('<a href="{}">@{}</a>', url, name) + escape(
+        token[len(name) + 1:]
+    )
+
+
+def render_line(line, usernames):
+    parts = []
+    position = 0
+    for match in TOKEN_RE.finditer(line):
+        parts.append(escape(line[position:match.start()]))
+        parts.append(link(match, usernames))
+        position = match.end()
+    parts.append(escape(line[position:]))
+    return ''.join(parts)
+
+
+def render_text(text, usernames=()):
+    """HTML текста; упоминания становятся ссылками только из usernames."""
+    paragraphs = PARAGRAPH_RE.split(text.replace('\r\n', '\n').strip())
+    return ''.join(
+        '<p>{}</p>'.format('<br>'.join(
+            render_line(line, usernames) for line in paragraph.split('\n')
+        ))
+        for paragraph in paragraphs if paragraph
+    )
+
+
+def existing_usernames(texts):
+    names = {name for text in texts for name in parse_mentions(text)}
+    if not names:
+        return set()
+    return set(User.objects.filter(username__in=names).values_list(
+        'username', flat=True
+    ))
+
+
+def render_posts(posts):
+    """Заполняет text_html постов; пользователи — одним запросом."""
+    usernames = existing_usernames(post.text for post in posts)
+    for post in posts:
+        post.text_html = render_text(post.text, usernames)
+        post.renderer_version = RENDERER_VERSION
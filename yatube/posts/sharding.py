@@ -0,0 +1,206 @@
+"""Шардирование постов и комментариев по автору.
+
+Автор попадает в один из POST_SHARD_BUCKETS виртуальных бакетов
+(author_id % POST_SHARD_BUCKETS), бакеты распределены по базам из
+POST_SHARDS. Комментарии и лайки лежат в шарде своего поста. Id поста
+сравним с id автора по модулю числа бакетов, поэтому по одному id можно
+найти шард поста, а при решардинге бакеты переезжают целиком и id не
+меняются.
+
+Ленты по всем авторам собираются scatter-gather: каждый шард отдаёт
+первые строки в порядке ленты, они сливаются k-way merge по pub_date,
+авторы и группы страницы подгружаются из основной базы двумя запросами.
+Пока POST_SHARDS пуст, всё работает с основной базой как раньше.
+"""
+import heapq
+from itertools import islice
+
+from django.conf import settings
+from django.db import DEFAULT_DB_ALIAS, router
+
+from .models import (
+    Comment, Group, Like, LikeCounter, Post, PostIdSequence, User,
+)
+
+SHARDED_MODELS = (Post, Comment, Like, LikeCounter)
+
+
+def is_sharded():
+    return bool(settings.POST_SHARDS)
+
+
+def post_databases():
+    return settings.POST_SHARDS or [DEFAULT_DB_ALIAS]
+
+
+def bucket_for(author_id):
+    return author_id % settings.POST_SHARD_BUCKETS
+
+
+def shard_for_bucket(bucket, shards=None):
+    shards = shards or settings.POST_SHARDS
+    return shards[bucket % len(shards)]
+
+
+def shard_for_author(author_id, shards=None):
+    return shard_for_bucket(bucket_for(author_id), shards)
+
+
+def shard_for_post(post_id):
+    """Шард поста по его id: id и автор поста в одном бакете."""
+    return shard_for_bucket(bucket_for(post_id))
+
+
+def db_for_post(post_id):
+    """База, в которой пишутся пост и его лайки."""
+    if is_sharded():
+        return shard_for_post(post_id)
+    return router.db_for_write(Post)
+
+
+def read_db_for_post(post_id):
+    """База для чтения лайков поста: без шардов её выбирает роутер
+    чтения, и чтение не закрепляет пользователя за основной базой."""
+    if is_sharded():
+        return shard_for_post(post_id)
+    return router.db_for_read(Post)
+
+
+def allocate_post_id(author_id):
+    """Глобально уникальный id поста из бакета автора."""
+    sequence = PostIdSequence.objects.using(DEFAULT_DB_ALIAS).create()
+    return sequence.pk * settings.POST_SHARD_BUCKETS + bucket_for(author_id)
+
+
+def posts_by_id(post_id):
+    """Queryset постов, в котором искать пост с данным id."""
+    if is_sharded():
+        return Post.objects.using(shard_for_post(post_id))
+    return Post.objects.select_related('author', 'group')
+
+
+def attach_relations(posts):
+    """Авторы и группы постов из шардов: по запросу к основной базе."""
+    authors = User.objects.in_bulk({post.author_id for post in posts})
+    groups = Group.objects.in_bulk(
+        {post.group_id for post in posts if post.group_id}
+    )
+    for post in posts:
+        post.author = authors[post.author_id]
+        post.group = groups.get(post.group_id)
+    return posts
+
+
+def posts_in_order(post_ids):
+    """Посты с данными id в том же порядке, каждый из своей базы."""
+    if not is_sharded():
+        found = Post.objects.select_related('author', 'group').in_bulk(
+            post_ids
+        )
+    else:
+        by_shard = {}
+        for post_id in post_ids:
+            by_shard.setdefault(shard_for_post(post_id), []).append(post_id)
+        found = {
+            post.pk: post
+            for shard, ids in by_shard.items()
+            for post in Post.objects.using(shard).filter(pk__in=ids)
+        }
+        attach_relations(list(found.values()))
+    return [found[post_id] for post_id in post_ids if post_id in found]
+
+
+def merge_feeds(feeds, stop):
+    """k-way merge отсортированных по ленте итераторов."""
+    return islice(
+        heapq.merge(
+            *feeds, key=lambda post: (post.pub_date, post.pk), reverse=True
+        ),
+        stop
+    )
+
+
+class ShardedFeed:
+    """Лента постов поверх шардов для FeedPaginator."""
+
+    def __init__(self, author_ids=None, **filters):
+        self.filters = filters
+        if author_ids is None:
+            self.shards = {shard: None for shard in settings.POST_SHARDS}
+        else:
+            self.shards = {}
+            for author_id in author_ids:
+                self.shards.setdefault(
+                    shard_for_author(author_id), []
+                ).append(author_id)
+
+    def queryset(self, shard):
+        queryset = Post.objects.using(shard).filter(**self.filters)
+        author_ids = self.shards[shard]
+        if author_ids is not None:
+            queryset = queryset.filter(author_id__in=author_ids)
+        return queryset.order_by('-pub_date', '-pk')
+
+    def count(self):
+        return sum(self.queryset(shard).count() for shard in self.shards)
+
+    def __len__(self):
+        return self.count()
+
+    def __getitem__(self, page):
+        if not isinstance(page, slice):
+            raise TypeError('ShardedFeed поддерживает только срезы')
+        start, stop = page.start or 0, page.stop
+        feeds = [self.queryset(shard)[:stop] for shard in self.shards]
+        posts = list(islice(merge_feeds(feeds, stop), start, None))
+        return attach_relations(posts)
+
+
+def feed(queryset, author_ids=None, **filters):
+    """queryset без шардов, ShardedFeed с теми же условиями при шардах.
+
+    Свёрнутые дубликаты (DUPLICATE_POLICY = 'collapse') в ленты не идут.
+    """
+    if settings.DUPLICATE_POLICY == 'collapse':
+        queryset = queryset.filter(duplicate_of__isnull=True)
+        filters['duplicate_of__isnull'] = True
+    if not is_sharded():
+        return queryset
+    return ShardedFeed(author_ids, **filters)
+
+
+class ShardRouter:
+    """Отправляет посты, комментарии и лайки в шард автора поста."""
+
+    def shard_from_hints(self, model, hints):
+        instance = hints.get('instance')
+        if instance is None:
+            return None
+        if isinstance(instance, SHARDED_MODELS):
+            if instance._state.db in settings.POST_SHARDS:
+                return instance._state.db
+            if isinstance(instance, Comment):
+                return shard_for_author(instance.post.author_id)
+            if isinstance(instance, (Like, LikeCounter)):
+                return shard_for_post(instance.post_id)
+            return shard_for_author(instance.author_id)
+        if isinstance(instance, User) and model is Post:
+            return shard_for_author(instance.pk)
+        return None
+
+    def db_for_read(self, model, **hints):
+        if is_sharded() and model in SHARDED_MODELS:
+            return self.shard_from_hints(model, hints)
+        return None
+
+    db_for_write = db_for_read
+
+    def allow_relation(self, obj1, obj2, **hints):
+        return True
+
+    def allow_migrate(self, db, app_label, model_name=None, **hints):
+        if db in settings.POST_SHARDS:
+            return app_label == 'posts' and model_name in (
+                'post', 'comment', 'like', 'likecounter'
+            )
+        return None
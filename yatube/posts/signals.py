@@ -0,0 +1,179 @@
+from django.conf import settings
+from django.core.signals import request_finished
+from django.db.models.signals import (
+    post_delete, post_save, pre_delete, pre_save,
+)
+from django.dispatch import receiver
+
+from core.caching import objects as object_cache
+
+from .autocomplete import object_changed, shift_follower_ranks
+from .cache import (
+    count_key, feed_count_keys, forget_feed_counts, shift_feed_counts,
+    touch_feeds,
+)
+from .duplicates import forget as forget_fingerprints
+from .duplicates import is_collapsed, mark_duplicate, remember
+from .events import publish_post
+from .follow_graph import follower_ids, forget
+from .likes import forget_user_likes, like_key
+from .models import Comment, Follow, Group, Post, Tag, User
+from .notifications import notify_comment
+from .rendering import render_posts
+from .sharding import allocate_post_id, is_sharded
+from .tags import forget_posts, index_post
+from .threads import MAX_DEPTH, encode
+from .view_counts import buffer as view_buffer
+
+object_cache.register(Group, 'slug')
+object_cache.register(Tag, 'name')
+
+
+@receiver(pre_save, sender=Post)
+def post_saving(sender, instance, using, **kwargs):
+    """Рендерит текст и ищет дубликат, выдаёт id новому посту в шарде,
+    у старого запоминает группу, картинку, текст и отметку дубликата."""
+    render_posts([instance])
+    if instance._state.adding:
+        if is_sharded() and instance.pk is None:
+            instance.pk = allocate_post_id(instance.author_id)
+        mark_duplicate(instance)
+        return
+    (
+        instance._old_group_id, instance._old_image, instance._old_text,
+        instance._old_duplicate_of,
+    ) = Post.objects.using(using).filter(pk=instance.pk).values_list(
+        'group_id', 'image', 'text', 'duplicate_of'
+    ).first() or (
+        instance.group_id, instance.image.name, instance.text,
+        instance.duplicate_of,
+    )
+    if instance._old_text != instance.text:
+        mark_duplicate(instance)
+
+
+def announce_post(post, delta):
+    """Сдвигает ленты, в которые попадает пост; новый уходит в SSE."""
+    touch_feeds(post)
+    shift_feed_counts(
+        feed_count_keys(post, follower_ids=follower_ids(post.author_id)),
+        delta
+    )
+    if delta > 0:
+        publish_post(post)
+
+
+@receiver(post_save, sender=Post)
+def post_saved(sender, instance, created, **kwargs):
+    """Новый пост сбрасывает оболочки лент (карточки остаются в кэше)
+    и уходит подписчикам SSE, если не свёрнут как дубликат. Теги и
+    отпечаток пересчитываются при смене текста."""
+    if created or getattr(instance, '_old_text', None) != instance.text:
+        index_post(instance, created)
+        remember(instance)
+    if not created:
+        post_edited(instance)
+    elif not is_collapsed(instance):
+        announce_post(instance, 1)
+
+
+def post_edited(post):
+    old_image = getattr(post, '_old_image', post.image.name)
+    if old_image and old_image != post.image.name:
+        post.image.storage.delete(old_image)
+    old_group_id = getattr(post, '_old_group_id', post.group_id)
+    if old_group_id != post.group_id:
+        if old_group_id:
+            shift_feed_counts([count_key('group', old_group_id)], -1)
+        if post.group_id:
+            shift_feed_counts([count_key('group', post.group_id)], 1)
+    old_duplicate_of = getattr(post, '_old_duplicate_of', post.duplicate_of)
+    if settings.DUPLICATE_POLICY == 'collapse' and (
+        bool(old_duplicate_of) != bool(post.duplicate_of)
+    ):
+        # Пост свернулся или развернулся: счётчики лент пересчитаются.
+        touch_feeds(post)
+        forget_feed_counts(feed_count_keys(
+            post, follower_ids=follower_ids(post.author_id)
+        ))
+
+
+@receiver(post_delete, sender=Post)
+def post_deleted(sender, instance, **kwargs):
+    if instance.image:
+        instance.image.storage.delete(instance.image.name)
+    if not is_collapsed(instance):
+        announce_post(instance, -1)
+    forget_feed_counts([like_key(instance.pk)])
+    forget_posts([instance.pk])
+    forget_fingerprints([instance.pk])
+
+
+@receiver(pre_save, sender=Comment)
+def comment_saving(sender, instance, **kwargs):
+    """Ответ глубже MAX_DEPTH становится ответом на родителя."""
+    parent = instance.parent
+    if not instance._state.adding or parent is None:
+        return
+    if parent.depth >= MAX_DEPTH:
+        parent = instance.parent = parent.parent
+    instance.depth = parent.depth + 1
+
+
+@receiver(post_save, sender=Comment)
+def comment_saved(sender, instance, created, using, **kwargs):
+    """Путь включает собственный id, поэтому пишется после вставки."""
+    if not created:
+        return
+    parent_path = instance.parent.path if instance.parent_id else ''
+    instance.path = parent_path + encode(instance.pk)
+    Comment.objects.using(using).filter(pk=instance.pk).update(
+        path=instance.path
+    )
+    notify_comment(instance)
+
+
+@receiver(post_save, sender=Follow)
+@receiver(post_delete, sender=Follow)
+def follow_changed(sender, instance, signal, created=False, **kwargs):
+    forget(instance.user_id, instance.author_id)
+    forget_feed_counts([count_key('follow', instance.user_id)])
+    if created or signal is post_delete:
+        shift_follower_ranks([instance.author_id], 1 if created else -1)
+
+
+@receiver(post_save, sender=User)
+@receiver(post_delete, sender=User)
+def user_changed(sender, instance, signal, update_fields=None, **kwargs):
+    object_changed('users', instance, update_fields, signal is post_delete)
+
+
+@receiver(post_save, sender=Group)
+@receiver(post_delete, sender=Group)
+def group_changed(sender, instance, signal, update_fields=None, **kwargs):
+    object_changed('groups', instance, update_fields, signal is post_delete)
+
+
+@receiver(pre_delete, sender=User)
+def user_deleting(sender, instance, **kwargs):
+    """Снимает лайки пользователя со счётчиков; каскад удаления автора
+    до его постов и комментариев в шардах."""
+    forget_user_likes(instance)
+    for shard in settings.POST_SHARDS:
+        Comment.objects.using(shard).filter(author_id=instance.pk).delete()
+        Post.objects.using(shard).filter(author_id=instance.pk).delete()
+
+
+@receiver(pre_delete, sender=Group)
+def group_deleting(sender, instance, **kwargs):
+    for shard in settings.POST_SHARDS:
+        Post.objects.using(shard).filter(group_id=instance.pk).update(
+            group=None
+        )
+
+
+@receiver(request_finished)
+def request_done(sender, **kwargs):
+    """Просмотры сбрасываются уже после отправки ответа."""
+    if view_buffer.due():
+        view_buffer.flush()
@@ -0,0 +1,132 @@
+"""Хэштеги и упоминания в тексте постов.
+
+Теги и упоминания разбираются при сохранении поста и лежат в основной
+базе вместе с датой поста, поэтому лента тега — это проход по индексу
+(tag, -pub_date, -post_id) без JOIN, а сами посты берутся по первичному
+ключу из своих шардов. Страницы листаются курсором по (pub_date,
+post_id): стоимость не растёт с номером страницы.
+"""
+import re
+from datetime import datetime, timedelta, timezone
+
+from django.db import transaction
+from django.db.models import Q
+
+from .models import Mention, Tag, TaggedPost, User
+from .paginator import POSTS_PER_PAGE
+from .sharding import posts_in_order
+
+TAG_RE = re.compile(r'(?<![\w&])#(\w{1,50})')
+MENTION_RE = re.compile(r'(?<![\w@])@([\w.+-]{1,150})')
+MAX_PER_POST = 20
+EPOCH = datetime(1970, 1, 1, tzinfo=timezone.utc)
+MICROSECOND = timedelta(microseconds=1)
+# Предел PositiveIntegerField, в котором лежат id постов индекса.
+MAX_POST_ID = 2 ** 31 - 1
+
+
+def parse_tags(text):
+    tags = dict.fromkeys(match.lower() for match in TAG_RE.findall(text))
+    return list(tags)[:MAX_PER_POST]
+
+
+def parse_mentions(text):
+    names = dict.fromkeys(
+        match.rstrip('.') for match in MENTION_RE.findall(text)
+    )
+    return list(names)[:MAX_PER_POST]
+
+
+def tag_ids(names):
+    """Id тегов по именам, недостающие создаются одной вставкой."""
+    if not names:
+        return {}
+    found = dict(Tag.objects.filter(name__in=names).values_list('name', 'pk'))
+    missing = [name for name in names if name not in found]
+    if missing:
+        Tag.objects.bulk_create(
+            [Tag(name=name) for name in missing], ignore_conflicts=True
+        )
+        found.update(
+            Tag.objects.filter(name__in=missing).values_list('name', 'pk')
+        )
+    return found
+
+
+def index_posts(posts):
+    """Пересобирает теги и упоминания пачки постов за несколько запросов."""
+    parsed = [
+        (post, parse_tags(post.text), parse_mentions(post.text))
+        for post in posts
+    ]
+    tags = tag_ids({name for _, names, _ in parsed for name in names})
+    usernames = {name for _, _, names in parsed for name in names}
+    users = dict(
+        User.objects.filter(username__in=usernames).values_list(
+            'username', 'pk'
+        )
+    ) if usernames else {}
+    with transaction.atomic(using=TaggedPost.objects.db):
+        forget_posts([post.pk for post in posts])
+        TaggedPost.objects.bulk_create([
+            TaggedPost(
+                tag_id=tags[name], post_id=post.pk, pub_date=post.pub_date
+            )
+            for post, names, _ in parsed for name in names
+        ])
+        Mention.objects.bulk_create([
+            Mention(
+                user_id=users[name], post_id=post.pk, pub_date=post.pub_date
+            )
+            for post, _, names in parsed for name in names if name in users
+        ])
+
+
+def index_post(post, created=False):
+    """Новый пост без тегов и упоминаний не трогает индекс вовсе."""
+    if created and not (TAG_RE.search(post.text)
+                        or MENTION_RE.search(post.text)):
+        return
+    index_posts([post])
+
+
+def forget_posts(post_ids):
+    TaggedPost.objects.filter(post_id__in=post_ids).delete()
+    Mention.objects.filter(post_id__in=post_ids).delete()
+
+
+def encode_cursor(pub_date, post_id):
+    return f'{(pub_date - EPOCH) // MICROSECOND}.{post_id}'
+
+
+def decode_cursor(cursor):
+    """Позиция из курсора; None для испорченного, и лента с начала."""
+    try:
+        microseconds, post_id = map(int, cursor.split('.'))
+        pub_date = EPOCH + microseconds * MICROSECOND
+    except (ValueError, OverflowError):
+        return None
+    if not 0 < post_id <= MAX_POST_ID:
+        return None
+    return pub_date, post_id
+
+
+def keyset_page(entries, cursor=''):
+    """Посты страницы индекса после курсора и курсор следующей."""
+    position = decode_cursor(cursor)
+    if position:
+        pub_date, post_id = position
+        entries = entries.filter(
+            Q(pub_date__lt=pub_date)
+            | Q(pub_date=pub_date, post_id__lt=post_id)
+        )
+    rows = list(
+        entries.order_by('-pub_date', '-post_id').values_list(
+            'pub_date', 'post_id'
+        )[:POSTS_PER_PAGE + 1]
+    )
+    next_cursor = None
+    if len(rows) > POSTS_PER_PAGE:
+        rows = rows[:POSTS_PER_PAGE]
+        next_cursor = encode_cursor(*rows[-1])
+    return posts_in_order([post_id for _, post_id in rows]), next_cursor
@@ -0,0 +1,10 @@
+from django import template
+
+register = template.Library()
+
+
+@register.simple_tag
+def elided_page_range(page_obj):
+    return list(
+        page_obj.paginator.get_elided_page_range(page_obj.number)
+    )
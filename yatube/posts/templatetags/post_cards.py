@@ -0,0 +1,25 @@
+from django import template
+from django.core.cache import cache
+from django.template.loader import render_to_string
+from django.utils.safestring import mark_safe
+
+from posts.cache import CARD_TIMEOUT, card_key
+
+register = template.Library()
+
+CARD_TEMPLATE = 'posts/includes/post_card.html'
+
+
+@register.simple_tag
+def post_cards(posts):
+    """Собирает карточки страницы одним get_many, рендерит только промахи."""
+    keys = [(card_key(post), post) for post in posts]
+    cards = cache.get_many([key for key, _ in keys])
+    missing = {}
+    for key, post in keys:
+        if key not in cards:
+            missing[key] = render_to_string(CARD_TEMPLATE, {'post': post})
+    if missing:
+        cache.set_many(missing, CARD_TIMEOUT)
+        cards.update(missing)
+    return [mark_safe(cards[key]) for key, _ in keys]
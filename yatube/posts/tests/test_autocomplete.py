@@ -0,0 +1,137 @@
+from unittest import mock
+
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.test import TestCase, override_settings
+from django.urls import reverse
+
+from .. import autocomplete
+from ..follows import follow_many
+from ..models import Follow, Group, Post
+
+User = get_user_model()
+
+
+class AutocompleteTests(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.anna = User.objects.create_user(
+            username='anna', first_name='Анна'
+        )
+        cls.andrey = User.objects.create_user(username='andrey')
+        cls.fans = [
+            User.objects.create_user(username=f'fan{number}')
+            for number in range(2)
+        ]
+        for fan in cls.fans:
+            Follow.objects.create(user=fan, author=cls.andrey)
+        cls.cats = Group.objects.create(title='Коты', slug='cats')
+        cls.cars = Group.objects.create(title='Машины', slug='cars')
+        Post.objects.create(author=cls.anna, group=cls.cars, text='Текст')
+
+    def setUp(self):
+        cache.clear()
+        autocomplete.reset()
+        self.client.force_login(self.anna)
+
+    def suggest(self, kind, prefix):
+        response = self.client.get(
+            reverse('posts:autocomplete', args=[kind]), {'q': prefix}
+        )
+        return [item['value'] for item in response.json()['results']]
+
+    def test_users_ranked_by_followers(self):
+        self.assertEqual(self.suggest('users', 'an'), ['andrey', 'anna'])
+        self.assertEqual(self.suggest('users', 'анн'), ['anna'])
+        self.assertEqual(self.suggest('groups', 'ca'), ['cars', 'cats'])
+        self.assertEqual(self.suggest('groups', 'кот'), ['cats'])
+        self.assertEqual(
+            self.client.get(
+                reverse('posts:autocomplete', args=['posts'])
+            ).status_code,
+            404
+        )
+
+    def test_lookup_makes_no_queries(self):
+        self.suggest('users', 'a')
+        with self.assertNumQueries(0):
+            autocomplete.search('users', 'an')
+
+    def test_signals_keep_index_current(self):
+        self.suggest('users', 'a')
+        fan = User.objects.create_user(username='ann_fan')
+        self.assertIn('ann_fan', self.suggest('users', 'ann'))
+        follow_many(self.fans[0], [self.anna.pk])
+        Follow.objects.create(user=self.fans[1], author=self.anna)
+        Follow.objects.create(user=fan, author=self.anna)
+        self.assertEqual(self.suggest('users', 'an')[0], 'anna')
+        fan.delete()
+        self.assertNotIn('ann_fan', self.suggest('users', 'ann'))
+
+    def values(self, name, prefix):
+        return [value for _, value, _ in autocomplete.search(name, prefix)]
+
+    def other_process(self, name, operation):
+        """Запись журнала, как её оставил бы другой процесс."""
+        sequence = autocomplete.current_sequence(name) + 1
+        cache.set(autocomplete.sequence_key(name), sequence, None)
+        cache.set(
+            autocomplete.journal_key(name, sequence), ('other', operation)
+        )
+
+    @override_settings(AUTOCOMPLETE_CHECK_SECONDS=0)
+    def test_other_process_changes_come_from_journal(self):
+        self.suggest('groups', 'c')
+        self.suggest('users', 'a')
+        index = autocomplete.get_index('groups')
+        self.other_process(
+            'groups', (autocomplete.PUT, self.cats.pk, ['Кошки'], 'cats', '')
+        )
+        self.other_process('users', (
+            autocomplete.RANKS, {self.anna.pk: 5}
+        ))
+        with self.assertNumQueries(0):
+            self.assertEqual(self.values('groups', 'кош'), ['cats'])
+            self.assertEqual(self.values('users', 'an'), ['anna', 'andrey'])
+        self.assertIs(autocomplete.get_index('groups'), index)
+
+    @override_settings(AUTOCOMPLETE_CHECK_SECONDS=0)
+    def test_lost_journal_rebuilds_in_background(self):
+        self.suggest('groups', 'c')
+        index = autocomplete.get_index('groups')
+        Group.objects.filter(pk=self.cats.pk).update(title='Кошки')
+        cache.set(autocomplete.sequence_key('groups'), 10 ** 6, None)
+        started = []
+        with mock.patch.object(
+            autocomplete.threading, 'Thread',
+            lambda target, args, daemon: mock.Mock(
+                start=lambda: started.append(args)
+            )
+        ):
+            # Пока идёт сборка, поиск отвечает по старому индексу.
+            self.assertEqual(self.suggest('groups', 'кош'), [])
+        self.assertEqual(len(started), 1)
+        with mock.patch.object(autocomplete.connections, 'close_all'):
+            autocomplete.rebuild(*started[0])
+        self.assertIsNot(autocomplete.get_index('groups'), index)
+        self.assertEqual(self.suggest('groups', 'кош'), ['cats'])
+
+    def test_login_does_not_publish_change(self):
+        self.suggest('users', 'a')
+        sequence = autocomplete.current_sequence('users')
+        self.anna.save(update_fields=['last_login'])
+        self.assertEqual(autocomplete.current_sequence('users'), sequence)
+
+    def test_admin_autocomplete_uses_index(self):
+        admin = User.objects.create_superuser(
+            username='admin', email='admin@yatube.ru', password='pass'
+        )
+        self.client.force_login(admin)
+        response = self.client.get(
+            reverse('admin:auth_user_autocomplete'), {'term': 'an'}
+        )
+        self.assertEqual(
+            [item['text'] for item in response.json()['results']],
+            ['andrey', 'anna']
+        )
@@ -0,0 +1,101 @@
+from io import StringIO
+
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.core.management import call_command
+from django.test import TestCase, override_settings
+from django.urls import reverse
+
+from ..duplicates import (
+    MIN_SIMILARITY, fingerprint_fields, minhash, similarity,
+)
+from ..models import Fingerprint, Post
+
+User = get_user_model()
+
+SPAM = (
+    'Только сегодня скидки на всё до девяноста процентов, переходите по '
+    'ссылке и забирайте подарок, количество подарков ограничено'
+)
+VARIANT = SPAM.replace('сегодня', 'сегодня!!!').replace('забирайте', 'берите')
+OTHER = (
+    'Сегодня ходили в поход по горам, вечером сварили уху на костре и '
+    'до ночи пели песни под гитару'
+)
+
+
+class DuplicateTests(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.author = User.objects.create_user(username='author')
+        cls.bot = User.objects.create_user(username='bot')
+
+    def setUp(self):
+        cache.clear()
+
+    def test_minhash_is_close_for_variants_only(self):
+        spam = minhash(SPAM)
+        self.assertGreaterEqual(
+            similarity(spam, minhash(VARIANT)), MIN_SIMILARITY
+        )
+        self.assertLess(similarity(spam, minhash(OTHER)), MIN_SIMILARITY)
+        self.assertIsNone(minhash('Привет'))
+
+    def test_save_flags_near_duplicate(self):
+        original = Post.objects.create(author=self.author, text=SPAM)
+        other = Post.objects.create(author=self.author, text=OTHER)
+        copy = Post.objects.create(author=self.bot, text=VARIANT)
+        self.assertIsNone(original.duplicate_of)
+        self.assertIsNone(other.duplicate_of)
+        self.assertEqual(copy.duplicate_of, original.pk)
+        self.assertEqual(Fingerprint.objects.count(), 3)
+        copy.text = 'Исправленный текст без спама, совсем другой и длинный'
+        copy.save()
+        self.assertIsNone(copy.duplicate_of)
+
+    @override_settings(DUPLICATE_POLICY='collapse')
+    def test_editing_original_keeps_it_original(self):
+        original = Post.objects.create(author=self.author, text=SPAM)
+        copy = Post.objects.create(author=self.bot, text=VARIANT)
+        self.assertEqual(copy.duplicate_of, original.pk)
+        original.text = SPAM.replace('подарок', 'подарок!')
+        original.save()
+        self.assertIsNone(original.duplicate_of)
+        response = self.client.get(reverse('posts:index'))
+        self.assertEqual(list(response.context['page_obj']), [original])
+
+    @override_settings(DUPLICATE_POLICY='reject')
+    def test_form_rejects_duplicate(self):
+        Post.objects.create(author=self.author, text=SPAM)
+        self.client.force_login(self.bot)
+        response = self.client.post(
+            reverse('posts:post_create'), {'text': VARIANT}
+        )
+        self.assertFormError(
+            response, 'form', 'text', 'Почти такой же пост уже опубликован.'
+        )
+        self.assertEqual(Post.objects.count(), 1)
+
+    @override_settings(DUPLICATE_POLICY='collapse')
+    def test_collapsed_duplicates_leave_feeds(self):
+        original = Post.objects.create(author=self.author, text=SPAM)
+        Post.objects.create(author=self.bot, text=VARIANT)
+        response = self.client.get(reverse('posts:index'))
+        self.assertEqual(list(response.context['page_obj']), [original])
+        self.assertEqual(response.context['page_obj'].paginator.count, 1)
+
+    def test_dedup_command_marks_historical_posts(self):
+        with override_settings(DUPLICATE_POLICY=''):
+            original = Post.objects.create(author=self.author, text=SPAM)
+            copy = Post.objects.create(author=self.bot, text=VARIANT)
+            Post.objects.create(author=self.author, text=OTHER)
+        self.assertFalse(Fingerprint.objects.exists())
+        # Отпечаток поста, созданного уже во время прохода.
+        Fingerprint.objects.create(
+            post_id=10 ** 6, **fingerprint_fields(minhash(OTHER))
+        )
+        call_command('dedup_posts', chunk_size=2, stdout=StringIO())
+        copy.refresh_from_db()
+        self.assertEqual(copy.duplicate_of, original.pk)
+        self.assertEqual(Fingerprint.objects.count(), 4)
@@ -0,0 +1,93 @@
+import json
+from unittest import mock
+
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.test import TestCase
+from django.urls import reverse
+
+from ..events import Dispatcher, dispatcher
+from ..models import Follow, Group, Post
+
+User = get_user_model()
+
+
+def parse(chunk):
+    fields = dict(
+        line.split(': ', 1) for line in chunk.decode().strip().splitlines()
+    )
+    fields['data'] = json.loads(fields['data'])
+    return fields
+
+
+class EventStreamTests(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.author = User.objects.create_user(username='sse_author')
+        cls.reader = User.objects.create_user(username='sse_reader')
+        cls.group = Group.objects.create(
+            title='Группа', slug='sse-group', description='Описание'
+        )
+        Follow.objects.create(user=cls.reader, author=cls.author)
+
+    def setUp(self):
+        cache.clear()
+        self.client.force_login(self.reader)
+
+    def open_stream(self, url):
+        response = self.client.get(url)
+        self.addCleanup(response.close)
+        self.assertEqual(response['Content-Type'], 'text/event-stream')
+        chunks = iter(response.streaming_content)
+        self.assertTrue(next(chunks).startswith(b'retry:'))
+        return chunks
+
+    def test_group_stream_receives_new_post(self):
+        chunks = self.open_stream(
+            reverse('posts:group_events', args=[self.group.slug])
+        )
+        post = Post.objects.create(
+            author=self.author, group=self.group, text='Новый пост'
+        )
+        event = parse(next(chunks))
+        self.assertEqual(event['event'], 'post')
+        self.assertEqual(event['id'], str(post.pk))
+        self.assertEqual(event['data']['author'], 'sse_author')
+
+    def test_follow_stream_only_gets_followed_authors(self):
+        chunks = self.open_stream(reverse('posts:follow_events'))
+        Post.objects.create(author=self.reader, text='Свой пост')
+        post = Post.objects.create(author=self.author, text='Избранный')
+        self.assertEqual(parse(next(chunks))['data']['id'], post.pk)
+
+    @mock.patch('posts.events.HEARTBEAT_SECONDS', 0.01)
+    def test_keepalive_and_unsubscribe_on_close(self):
+        connections = dispatcher.stats()['connections']
+        response = self.client.get(reverse('posts:follow_events'))
+        chunks = iter(response.streaming_content)
+        next(chunks)
+        self.assertEqual(next(chunks), b': keepalive\n\n')
+        self.assertEqual(dispatcher.stats()['connections'], connections + 1)
+        response.close()
+        self.assertEqual(dispatcher.stats()['connections'], connections)
+
+    def test_stats_are_staff_only(self):
+        url = reverse('posts:event_stats')
+        self.assertEqual(self.client.get(url).status_code, 302)
+        self.client.force_login(User.objects.create_user(
+            username='sse_staff', is_staff=True
+        ))
+        self.assertIn('max_fanout_ms', self.client.get(url).json())
+
+
+class DispatcherTests(TestCase):
+    @mock.patch('posts.events.QUEUE_SIZE', 1)
+    def test_full_queue_drops_instead_of_blocking(self):
+        events = Dispatcher()
+        listener = events.subscribe([('group', 1), ('author', 2)])
+        events.publish([('group', 1), ('author', 2)], {'id': 1})
+        events.publish([('group', 1)], {'id': 2})
+        stats = events.stats()
+        self.assertEqual((stats['delivered'], stats['dropped']), (1, 1))
+        self.assertEqual(listener.events.get_nowait()['id'], 1)
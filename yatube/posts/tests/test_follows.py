@@ -0,0 +1,132 @@
+import tempfile
+from io import StringIO
+
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.core.management import CommandError, call_command
+from django.test import TestCase
+from django.urls import reverse
+
+from ..autocomplete import current_sequence
+from ..follow_graph import followee_ids, follower_ids
+from ..follows import follow_many, resolve_usernames
+from ..models import Follow
+
+User = get_user_model()
+
+
+class BulkFollowTests(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.user = User.objects.create_user(username='reader')
+        cls.authors = [
+            User.objects.create_user(username=f'author{number}')
+            for number in range(5)
+        ]
+
+    def setUp(self):
+        cache.clear()
+        self.client.force_login(self.user)
+
+    def test_bulk_follow_resolves_names_and_skips_existing(self):
+        Follow.objects.create(user=self.user, author=self.authors[0])
+        self.assertEqual(len(follower_ids(self.authors[1].pk)), 0)
+        response = self.client.post(reverse('posts:follow_bulk'), {
+            'usernames': 'author0, @author1 author2\nreader ghost',
+        })
+        self.assertEqual(response.context['result'], {
+            'changed': 2, 'missing': ['ghost'],
+        })
+        self.assertEqual(
+            list(followee_ids(self.user.pk)),
+            [author.pk for author in self.authors[:3]]
+        )
+        self.assertEqual(
+            list(follower_ids(self.authors[1].pk)), [self.user.pk]
+        )
+
+    def test_follow_many_queries(self):
+        """Имена, граф подписок и вставка — по одному запросу."""
+        names = [author.username for author in self.authors]
+        with self.assertNumQueries(3):
+            follow_many(self.user, resolve_usernames(names).values())
+        self.assertEqual(Follow.objects.filter(user=self.user).count(), 5)
+
+    def test_bulk_unfollow(self):
+        for author in self.authors:
+            Follow.objects.create(user=self.user, author=author)
+        response = self.client.post(reverse('posts:follow_bulk'), {
+            'usernames': 'author0 author1', 'unfollow': 'on',
+        })
+        self.assertEqual(response.context['result']['changed'], 2)
+        self.assertEqual(
+            list(followee_ids(self.user.pk)),
+            [author.pk for author in self.authors[2:]]
+        )
+
+    def test_csv_upload(self):
+        csv_file = SimpleUploadedFile(
+            'follows.csv', 'username\nauthor3\nauthor4\n'.encode()
+        )
+        response = self.client.post(
+            reverse('posts:follow_bulk'), {'csv_file': csv_file}
+        )
+        self.assertEqual(response.context['result']['changed'], 2)
+        self.assertEqual(
+            self.user.follower.filter(
+                author__username__in=['author3', 'author4']
+            ).count(),
+            2
+        )
+
+    def test_empty_form_is_rejected(self):
+        response = self.client.post(
+            reverse('posts:follow_bulk'), {'usernames': ' '}
+        )
+        self.assertFormError(
+            response, 'form', None, 'Укажите хотя бы одно имя.'
+        )
+
+    def test_import_follows_command(self):
+        Follow.objects.create(user=self.authors[0], author=self.authors[1])
+        followee_ids(self.authors[0].pk)
+        stamp = current_sequence('users')
+        with tempfile.NamedTemporaryFile('w', suffix='.csv') as source:
+            source.write(
+                'user,author\n'
+                'author0,author1\nauthor0,author2\n'
+                'author1,author0\nauthor1,ghost\nauthor2,author2\n'
+                'author3\n'
+            )
+            source.flush()
+            out = StringIO()
+            call_command(
+                'import_follows', source.name, chunk_size=2, stdout=out
+            )
+        self.assertIn(
+            'Обработано подписок: 2, пропущено строк: 3', out.getvalue()
+        )
+        self.assertEqual(Follow.objects.count(), 3)
+        self.assertGreater(current_sequence('users'), stamp)
+        self.assertEqual(
+            list(followee_ids(self.authors[0].pk)),
+            [self.authors[1].pk, self.authors[2].pk]
+        )
+
+    def import_follows(self, text):
+        with tempfile.NamedTemporaryFile('w', suffix='.csv') as source:
+            source.write(text)
+            source.flush()
+            call_command('import_follows', source.name, stdout=StringIO())
+
+    def test_import_follows_rejects_bad_header(self):
+        with self.assertRaisesMessage(CommandError, 'user и author'):
+            self.import_follows('username,author\nauthor0,author1\n')
+
+    def test_import_of_existing_follows_announces_nothing(self):
+        Follow.objects.create(user=self.authors[0], author=self.authors[1])
+        sequence = current_sequence('users')
+        self.import_follows('user,author\nauthor0,author1\n')
+        self.assertEqual(current_sequence('users'), sequence)
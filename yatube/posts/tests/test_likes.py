@@ -0,0 +1,106 @@
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.db.models import Sum
+from django.test import TestCase, override_settings
+from django.urls import reverse
+
+from core.db.routers import wrote_to_primary
+
+from ..likes import like, like_counts, like_states, liked_among, unlike
+from ..models import Like, LikeCounter, Post
+
+User = get_user_model()
+
+
+class LikeTests(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.author = User.objects.create_user(username='author')
+        cls.reader = User.objects.create_user(username='reader')
+        cls.post = Post.objects.create(author=cls.author, text='Пост')
+        cls.other = Post.objects.create(author=cls.author, text='Другой')
+
+    def setUp(self):
+        cache.clear()
+
+    def test_like_is_unique_per_user_and_post(self):
+        self.assertTrue(like(self.reader, self.post.pk))
+        self.assertFalse(like(self.reader, self.post.pk))
+        self.assertEqual(Like.objects.count(), 1)
+        self.assertEqual(like_counts([self.post.pk]), {self.post.pk: 1})
+
+    @override_settings(LIKE_COUNTER_SHARDS=4)
+    def test_counter_rows_sum_to_likes(self):
+        for number in range(20):
+            user = User.objects.create_user(username=f'user{number}')
+            like(user, self.post.pk)
+        unlike(User.objects.get(username='user0'), self.post.pk)
+        self.assertLessEqual(LikeCounter.objects.count(), 4)
+        total = LikeCounter.objects.aggregate(total=Sum('count'))['total']
+        self.assertEqual(total, 19)
+        self.assertEqual(like_counts([self.post.pk])[self.post.pk], 19)
+
+    def test_cached_count_follows_likes(self):
+        self.assertEqual(like_counts([self.post.pk])[self.post.pk], 0)
+        like(self.reader, self.post.pk)
+        like(self.author, self.post.pk)
+        unlike(self.author, self.post.pk)
+        self.assertFalse(unlike(self.author, self.post.pk))
+        with self.assertNumQueries(0):
+            self.assertEqual(like_counts([self.post.pk])[self.post.pk], 1)
+
+    def test_page_state_in_one_query_each(self):
+        like(self.reader, self.other.pk)
+        ids = [self.post.pk, self.other.pk]
+        with self.assertNumQueries(1):
+            self.assertEqual(liked_among(self.reader, ids), {self.other.pk})
+        with self.assertNumQueries(1):
+            self.assertEqual(
+                like_counts(ids), {self.post.pk: 0, self.other.pk: 1}
+            )
+
+    def test_deleting_user_releases_likes(self):
+        user = User.objects.create_user(username='leaving')
+        like(user, self.post.pk)
+        like(self.reader, self.post.pk)
+        like_counts([self.post.pk])
+        user.delete()
+        self.assertEqual(like_counts([self.post.pk])[self.post.pk], 1)
+
+    def test_reading_likes_does_not_pin_primary(self):
+        token = wrote_to_primary.set(False)
+        try:
+            like_states(self.reader, [self.post.pk, self.other.pk])
+            self.assertFalse(wrote_to_primary.get())
+        finally:
+            wrote_to_primary.reset(token)
+
+    def test_like_views(self):
+        self.client.force_login(self.reader)
+        response = self.client.post(
+            reverse('posts:post_like', args=[self.post.pk])
+        )
+        self.assertRedirects(
+            response, reverse('posts:post_detail', args=[self.post.pk])
+        )
+        response = self.client.get(
+            reverse('posts:likes'), {'ids': f'{self.post.pk},{self.other.pk}'}
+        )
+        self.assertEqual(response.json()['posts'], {
+            str(self.post.pk): {'count': 1, 'liked': True},
+            str(self.other.pk): {'count': 0, 'liked': False},
+        })
+        response = self.client.post(
+            reverse('posts:post_unlike', args=[self.post.pk]),
+            HTTP_X_REQUESTED_WITH='XMLHttpRequest'
+        )
+        self.assertEqual(response.json(), {'count': 0, 'liked': False})
+        response = self.client.post(reverse('posts:post_like', args=[0]))
+        self.assertEqual(response.status_code, 404)
+
+    def test_feed_includes_like_script_once(self):
+        content = self.client.get(reverse('posts:index')).content.decode()
+        title = content.split('<title>')[1].split('</title>')[0]
+        self.assertNotIn('<script>', title)
+        self.assertEqual(content.count(reverse('posts:likes')), 1)
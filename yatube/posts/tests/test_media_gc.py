@@ -0,0 +1,106 @@
+import os
+import shutil
+import tempfile
+from io import StringIO
+
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.core.management import call_command
+from django.test import TestCase, override_settings
+from sorl.thumbnail import get_thumbnail
+
+from core.models import StoredFile
+from core.storage import media_storage
+
+from ..management.commands.media_gc import orphans, walk_sorted
+from ..models import Post
+
+User = get_user_model()
+
+TEMP_MEDIA_ROOT = tempfile.mkdtemp()
+SMALL_GIF = (
+    b'\x47\x49\x46\x38\x39\x61\x01\x00'
+    b'\x01\x00\x00\x00\x00\x21\xf9\x04'
+    b'\x01\x0a\x00\x01\x00\x2c\x00\x00'
+    b'\x00\x00\x01\x00\x01\x00\x00\x02'
+    b'\x02\x4c\x01\x00\x3b'
+)
+HOUR_AGO = 3700
+
+
+def make_old(name):
+    path = media_storage.path(name)
+    past = os.path.getmtime(path) - HOUR_AGO
+    os.utime(path, (past, past))
+
+
+@override_settings(MEDIA_ROOT=TEMP_MEDIA_ROOT)
+class MediaGcTests(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.user = User.objects.create_user(username='gc_user')
+
+    @classmethod
+    def tearDownClass(cls):
+        shutil.rmtree(TEMP_MEDIA_ROOT, ignore_errors=True)
+        super().tearDownClass()
+
+    def setUp(self):
+        cache.clear()
+        self.live = Post.objects.create(
+            author=self.user, text='Живой',
+            image=SimpleUploadedFile('live.gif', SMALL_GIF)
+        )
+        leaked = Post.objects.create(
+            author=self.user, text='Потерянный',
+            image=SimpleUploadedFile('leaked.gif', SMALL_GIF + b'\x00')
+        )
+        self.thumbnail = get_thumbnail(leaked.image, '10x10')
+        self.leaked = leaked.image.name
+        # Ссылка пропала мимо сигналов, как при старом post_edit.
+        Post.objects.filter(pk=leaked.pk).update(image='')
+        self.legacy = 'posts/legacy.gif'
+        with open(media_storage.path(self.legacy), 'wb') as image:
+            image.write(SMALL_GIF)
+        for name in (self.live.image.name, self.leaked, self.legacy):
+            make_old(name)
+
+    def tearDown(self):
+        shutil.rmtree(os.path.join(TEMP_MEDIA_ROOT, 'posts'))
+
+    def test_merge_join_order(self):
+        files = [name for name, _ in walk_sorted(media_storage, 'posts')]
+        self.assertEqual(files, sorted(files))
+        found = orphans(
+            ((name, 0) for name in ['a', 'b/c', 'b-d', 'e']),
+            iter(['b/c', 'e'])
+        )
+        self.assertEqual([name for name, _ in found], ['a', 'b-d'])
+
+    def test_dry_run_only_lists(self):
+        out = StringIO()
+        call_command('media_gc', dry_run=True, stdout=out)
+        self.assertIn(self.leaked, out.getvalue())
+        self.assertIn(self.legacy, out.getvalue())
+        self.assertIn('Будет удалено файлов: 2', out.getvalue())
+        self.assertTrue(media_storage.exists(self.leaked))
+
+    def test_deletes_orphans_with_thumbnails(self):
+        out = StringIO()
+        call_command('media_gc', chunk_size=1, pause=0, stdout=out)
+        self.assertIn('Удалено файлов: 2', out.getvalue())
+        self.assertTrue(media_storage.exists(self.live.image.name))
+        self.assertFalse(media_storage.exists(self.leaked))
+        self.assertFalse(media_storage.exists(self.legacy))
+        self.assertFalse(self.thumbnail.storage.exists(self.thumbnail.name))
+        self.assertFalse(StoredFile.objects.filter(name=self.leaked).exists())
+
+    def test_recent_and_reused_files_are_kept(self):
+        Post.objects.create(
+            author=self.user, text='Снова та же картинка',
+            image=SimpleUploadedFile('again.gif', SMALL_GIF + b'\x00')
+        )
+        call_command('media_gc', stdout=StringIO())
+        self.assertTrue(media_storage.exists(self.leaked))
@@ -0,0 +1,87 @@
+from io import StringIO
+
+from django.contrib.auth import get_user_model
+from django.core import mail
+from django.core.cache import cache
+from django.core.management import call_command
+from django.test import TestCase
+from django.urls import reverse
+
+from ..models import Comment, Notification, Post
+from ..notifications import unread_count
+
+User = get_user_model()
+
+
+class NotificationTests(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.author = User.objects.create_user(
+            username='author', email='author@yatube.ru'
+        )
+        cls.first = User.objects.create_user(
+            username='first', email='first@yatube.ru'
+        )
+        cls.second = User.objects.create_user(username='second')
+        cls.post = Post.objects.create(author=cls.author, text='Пост')
+
+    def setUp(self):
+        cache.clear()
+
+    def comment(self, user, text='Комментарий'):
+        self.client.force_login(user)
+        self.client.post(
+            reverse('posts:add_comment', args=[self.post.pk]), {'text': text}
+        )
+
+    def test_comment_notifies_only_post_author(self):
+        self.comment(self.first)
+        self.comment(self.second)
+        self.comment(self.author)
+        recipients = Notification.objects.values_list(
+            'recipient__username', 'actor__username'
+        )
+        self.assertCountEqual(
+            recipients, [('author', 'first'), ('author', 'second')]
+        )
+
+    def test_unread_count_follows_new_and_read_notifications(self):
+        self.assertEqual(unread_count(self.author), 0)
+        self.comment(self.first)
+        self.comment(self.second)
+        self.assertEqual(unread_count(self.author), 2)
+        self.client.force_login(self.author)
+        response = self.client.get(reverse('posts:notifications'))
+        self.assertEqual(len(response.context['page_obj']), 2)
+        self.assertContains(response, 'Комментарий')
+        self.assertEqual(unread_count(self.author), 0)
+
+    def test_header_shows_unread_badge(self):
+        self.comment(self.first)
+        self.client.force_login(self.author)
+        response = self.client.get(reverse('posts:index'))
+        self.assertContains(response, 'badge bg-danger">1<')
+
+    def test_digest_groups_comments_into_one_email(self):
+        for number in range(3):
+            self.comment(self.first, f'Комментарий {number}')
+        self.comment(self.second)
+        Comment.objects.create(
+            post=Post.objects.create(author=self.author, text='Второй'),
+            author=self.first, text='Ещё'
+        )
+        # На пачку: получатели, сводка, отметка; и пустая пачка в конце.
+        with self.assertNumQueries(4):
+            call_command('send_digests', chunk_size=1, stdout=StringIO())
+        self.assertEqual(len(mail.outbox), 1)
+        digest, = mail.outbox
+        self.assertEqual(digest.to, ['author@yatube.ru'])
+        self.assertIn('Новых комментариев к вашим постам: 5.', digest.body)
+        self.assertIn(
+            f'/posts/{self.post.pk}/ — комментариев: 4, комментаторов: 2',
+            digest.body
+        )
+        self.assertFalse(Notification.objects.filter(emailed=False).exists())
+        call_command('send_digests', stdout=StringIO())
+        self.assertEqual(len(mail.outbox), 1)
@@ -0,0 +1,77 @@
+from io import StringIO
+
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.core.management import call_command
+from django.test import TestCase
+from django.urls import reverse
+
+from ..models import Post
+from ..rendering import RENDERER_VERSION, render_text
+
+User = get_user_model()
+
+
+class RenderingTests(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.author = User.objects.create_user(username='author')
+
+    def setUp(self):
+        cache.clear()
+
+    def test_paragraphs_and_line_breaks(self):
+        self.assertEqual(
+            render_text('Первый\nабзац\r\n\r\nВторой'),
+            '<p>Первый<br>абзац</p><p>Второй</p>'
+        )
+
+    def test_markup_is_escaped(self):
+        self.assertEqual(
+            render_text('<script>alert(1)</script> & "x"'),
+            '<p>&lt;script&gt;alert(1)&lt;/script&gt; &amp; &quot;x&quot;</p>'
+        )
+
+    def test_links_tags_and_known_mentions(self):
+        html = render_text(
+            'См. https://yatube.ru/a?b=1&c=2. #Django @author, @ghost',
+            {'author'}
+        )
+        self.assertIn(
+            '<a href="https://yatube.ru/a?b=1&amp;c=2" '
+            'rel="nofollow noopener">https://yatube.ru/a?b=1&amp;c=2</a>.',
+            html
+        )
+        self.assertIn(
+            f'<a href="{reverse("posts:tag_posts", args=["django"])}">'
+            '#Django</a>',
+            html
+        )
+        self.assertIn(
+            f'<a href="{reverse("posts:profile", args=["author"])}">'
+            '@author</a>,',
+            html
+        )
+        self.assertIn(' @ghost</p>', html)
+
+    def test_save_stores_html_and_version(self):
+        post = Post.objects.create(author=self.author, text='Привет, @author')
+        self.assertEqual(post.renderer_version, RENDERER_VERSION)
+        self.assertIn('@author</a>', post.text_html)
+        response = self.client.get(
+            reverse('posts:post_detail', args=[post.pk])
+        )
+        self.assertContains(response, post.text_html)
+
+    def test_render_posts_command_updates_old_versions(self):
+        post = Post.objects.create(author=self.author, text='Текст')
+        Post.objects.filter(pk=post.pk).update(
+            text_html='', renderer_version=0
+        )
+        call_command('render_posts', chunk_size=1, stdout=StringIO())
+        post.refresh_from_db()
+        self.assertEqual(
+            (post.text_html, post.renderer_version),
+            ('<p>Текст</p>', RENDERER_VERSION)
+        )
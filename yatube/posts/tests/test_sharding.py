@@ -0,0 +1,114 @@
+from io import StringIO
+
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.core.management import call_command
+from django.test import TestCase, override_settings
+from django.urls import reverse
+
+from ..models import Comment, Post, TaggedPost
+from ..sharding import (
+    ShardedFeed, bucket_for, posts_in_order, shard_for_post,
+)
+
+User = get_user_model()
+
+
+@override_settings(POST_SHARDS=['default'], POST_SHARD_BUCKETS=16)
+class ShardingTests(TestCase):
+    """Шардирование на единственном шарде, которым служит основная база."""
+
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.first = User.objects.create_user(username='first_author')
+        cls.second = User.objects.create_user(username='second_author')
+
+    def setUp(self):
+        cache.clear()
+
+    def test_post_id_points_to_author_bucket(self):
+        """По id поста находится бакет, а значит и шард, его автора."""
+        post = Post.objects.create(author=self.first, text='Текст')
+        self.assertEqual(bucket_for(post.pk), bucket_for(self.first.pk))
+        self.assertEqual(shard_for_post(post.pk), 'default')
+
+    def test_feed_is_merged_by_pub_date(self):
+        """Scatter-gather лента идёт по убыванию даты с авторами."""
+        for number in range(6):
+            Post.objects.create(
+                author=(self.first, self.second)[number % 2],
+                text=f'Пост {number}'
+            )
+        feed = ShardedFeed()
+        self.assertEqual(feed.count(), 6)
+        with self.assertNumQueries(2):
+            posts = feed[2:5]
+            authors = [post.author.username for post in posts]
+        self.assertEqual(
+            [post.text for post in posts], ['Пост 3', 'Пост 2', 'Пост 1']
+        )
+        self.assertEqual(
+            authors, ['second_author', 'first_author', 'second_author']
+        )
+        self.assertEqual(ShardedFeed(author_ids=[self.first.pk]).count(), 3)
+
+    def test_posts_in_order_keeps_requested_order(self):
+        """Посты по списку id — в порядке списка, с авторами."""
+        posts = [
+            Post.objects.create(author=author, text='Пост')
+            for author in (self.first, self.second, self.first)
+        ]
+        ids = [posts[1].pk, posts[2].pk, 0, posts[0].pk]
+        with self.assertNumQueries(2):
+            found = posts_in_order(ids)
+            self.assertEqual(found[0].author, self.second)
+        self.assertEqual(found, [posts[1], posts[2], posts[0]])
+
+    def test_views_read_from_shards(self):
+        post = Post.objects.create(author=self.first, text='Текст шарда')
+        for url in (
+            reverse('posts:index'),
+            reverse('posts:profile', kwargs={'username': 'first_author'}),
+            reverse('posts:post_detail', kwargs={'post_id': post.pk}),
+        ):
+            with self.subTest(url=url):
+                self.assertContains(self.client.get(url), 'Текст шарда')
+
+    def test_reshard_rekeys_posts_created_before_sharding(self):
+        """Старые id получают бакет автора вместе со ссылками на них."""
+        with override_settings(POST_SHARDS=[]):
+            posts = [
+                Post.objects.create(
+                    author=(self.first, self.second)[number % 2],
+                    text=f'Пост {number} #старое'
+                )
+                for number in range(4)
+            ]
+            Comment.objects.create(
+                post=posts[1], author=self.first, text='Комментарий'
+            )
+            Post.objects.filter(pk=posts[3].pk).update(
+                duplicate_of=posts[1].pk
+            )
+        top = max(post.pk for post in posts)
+        call_command('reshard_posts', '--from', 'default', stdout=StringIO())
+        moved = {post.text: post for post in Post.objects.all()}
+        self.assertEqual(len(moved), 4)
+        for post in moved.values():
+            self.assertEqual(bucket_for(post.pk), bucket_for(post.author_id))
+            self.assertEqual(
+                self.client.get(
+                    reverse('posts:post_detail', args=[post.pk])
+                ).status_code,
+                200
+            )
+        second = moved['Пост 1 #старое']
+        self.assertEqual(Comment.objects.get().post_id, second.pk)
+        self.assertEqual(moved['Пост 3 #старое'].duplicate_of, second.pk)
+        self.assertEqual(
+            set(TaggedPost.objects.values_list('post_id', flat=True)),
+            {post.pk for post in moved.values()}
+        )
+        post = Post.objects.create(author=self.first, text='Новый')
+        self.assertGreater(post.pk, top)
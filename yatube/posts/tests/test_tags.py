@@ -0,0 +1,99 @@
+from io import StringIO
+
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.core.management import call_command
+from django.test import TestCase
+from django.urls import reverse
+
+from ..models import Mention, Post, TaggedPost
+from ..paginator import POSTS_PER_PAGE
+from ..tags import parse_mentions, parse_tags
+
+User = get_user_model()
+
+
+class TagTests(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.author = User.objects.create_user(username='author')
+        cls.reader = User.objects.create_user(username='reader')
+
+    def setUp(self):
+        cache.clear()
+
+    def test_parse(self):
+        text = 'Про #Django и #джанго, #django ещё раз; a@b.ru и @reader.'
+        self.assertEqual(parse_tags(text), ['django', 'джанго'])
+        self.assertEqual(parse_mentions(text), ['reader'])
+
+    def test_form_save_indexes_and_edit_reindexes(self):
+        self.client.force_login(self.author)
+        self.client.post(
+            reverse('posts:post_create'), {'text': '#один для @reader'}
+        )
+        post = Post.objects.get()
+        self.assertEqual(
+            list(TaggedPost.objects.values_list('tag__name', 'post_id')),
+            [('один', post.pk)]
+        )
+        self.assertTrue(Mention.objects.filter(user=self.reader).exists())
+        self.client.post(
+            reverse('posts:post_edit', args=[post.pk]), {'text': '#два'}
+        )
+        self.assertEqual(
+            list(TaggedPost.objects.values_list('tag__name', flat=True)),
+            ['два']
+        )
+        self.assertFalse(Mention.objects.exists())
+        post.delete()
+        self.assertFalse(TaggedPost.objects.exists())
+
+    def test_tag_feed_pages_by_cursor(self):
+        posts = [
+            Post.objects.create(author=self.author, text=f'#лента {number}')
+            for number in range(POSTS_PER_PAGE + 2)
+        ]
+        Post.objects.create(author=self.author, text='без тегов')
+        response = self.client.get(reverse('posts:tag_posts', args=['Лента']))
+        self.assertEqual(
+            response.context['posts'], posts[::-1][:POSTS_PER_PAGE]
+        )
+        response = self.client.get(
+            reverse('posts:tag_posts', args=['лента']),
+            {'after': response.context['next_cursor']}
+        )
+        self.assertEqual(response.context['posts'], posts[1::-1])
+        self.assertIsNone(response.context['next_cursor'])
+        response = self.client.get(reverse('posts:tag_posts', args=['нет']))
+        self.assertEqual(response.status_code, 404)
+
+    def test_broken_cursor_shows_first_page(self):
+        post = Post.objects.create(author=self.author, text='#курсор')
+        for cursor in (
+            'мусор', '99999999999999999999.1', '1.99999999999999999999999',
+            '1.-5',
+        ):
+            with self.subTest(cursor=cursor):
+                response = self.client.get(
+                    reverse('posts:tag_posts', args=['курсор']),
+                    {'after': cursor}
+                )
+                self.assertEqual(response.context['posts'], [post])
+
+    def test_mentions_feed(self):
+        post = Post.objects.create(author=self.author, text='Привет, @reader')
+        response = self.client.get(
+            reverse('posts:mentions', args=['reader'])
+        )
+        self.assertEqual(response.context['posts'], [post])
+
+    def test_index_tags_command_indexes_old_posts(self):
+        post = Post.objects.create(author=self.author, text='старый')
+        Post.objects.filter(pk=post.pk).update(text='старый #архив')
+        call_command('index_tags', chunk_size=1, stdout=StringIO())
+        self.assertEqual(
+            list(TaggedPost.objects.values_list('tag__name', flat=True)),
+            ['архив']
+        )
@@ -0,0 +1,94 @@
+from unittest import mock
+
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.test import TestCase
+from django.urls import reverse
+
+from ..models import Comment, Post
+from ..threads import MAX_DEPTH, encode, subtree_page, thread_page
+
+User = get_user_model()
+
+
+class CommentThreadTests(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.user = User.objects.create_user(username='commenter')
+        cls.post = Post.objects.create(author=cls.user, text='Пост')
+
+    def setUp(self):
+        cache.clear()
+
+    def reply(self, parent=None, text='Ответ'):
+        return Comment.objects.create(
+            post=self.post, author=self.user, parent=parent, text=text
+        )
+
+    def test_path_and_depth(self):
+        root = self.reply()
+        child = self.reply(root)
+        self.assertEqual(root.path, encode(root.pk))
+        self.assertEqual(child.path, root.path + encode(child.pk))
+        self.assertEqual((root.depth, child.depth), (0, 1))
+        self.assertEqual(encode(35), '0000000z')
+
+    def test_depth_limit_attaches_to_parent(self):
+        comment = self.reply()
+        for _ in range(MAX_DEPTH + 2):
+            comment = self.reply(comment)
+        self.assertEqual(comment.depth, MAX_DEPTH)
+        self.assertEqual(comment.parent.depth, MAX_DEPTH - 1)
+
+    @mock.patch('posts.threads.THREADS_PER_PAGE', 2)
+    @mock.patch('posts.threads.REPLIES_PER_THREAD', 2)
+    def test_thread_page_in_one_query(self):
+        first = self.reply(text='первая')
+        first_replies = [self.reply(first) for _ in range(3)]
+        nested = self.reply(first_replies[0])
+        second = self.reply(text='вторая')
+        third = self.reply(text='третья')
+        with self.assertNumQueries(2):
+            page, cursor = thread_page(self.post)
+            [comment.author for comment in page]
+        self.assertEqual(
+            [comment.pk for comment in page],
+            [first.pk, first_replies[0].pk, nested.pk, second.pk]
+        )
+        self.assertTrue(page[0].more)
+        self.assertFalse(hasattr(page[3], 'more'))
+        page, cursor = thread_page(self.post, cursor)
+        self.assertEqual([comment.pk for comment in page], [third.pk])
+        self.assertIsNone(cursor)
+
+    @mock.patch('posts.threads.COMMENTS_PER_PAGE', 2)
+    def test_subtree_cursor_pagination(self):
+        root = self.reply()
+        child = self.reply(root)
+        grandchild = self.reply(child)
+        sibling = self.reply(root)
+        self.reply()
+        page, cursor = subtree_page(root)
+        self.assertEqual(page, [root, child])
+        page, cursor = subtree_page(root, cursor)
+        self.assertEqual(page, [grandchild, sibling])
+        self.assertIsNone(cursor)
+
+    def test_reply_through_view(self):
+        root = self.reply()
+        self.client.force_login(self.user)
+        self.client.post(
+            reverse('posts:add_comment', args=[self.post.pk]),
+            {'text': 'Ответ из формы', 'parent': root.pk}
+        )
+        reply = Comment.objects.get(text='Ответ из формы')
+        self.assertEqual(reply.parent, root)
+        response = self.client.get(
+            reverse('posts:comment_thread', args=[self.post.pk, root.pk])
+        )
+        self.assertEqual(response.context['comments'], [root, reply])
+        response = self.client.get(
+            reverse('posts:post_detail', args=[self.post.pk])
+        )
+        self.assertContains(response, 'Ответ из формы')
@@ -0,0 +1,74 @@
+from unittest import mock
+
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.test import TestCase, override_settings
+from django.urls import reverse
+
+from ..models import Post
+from ..view_counts import buffer, count_view, flush_at_exit, popular_posts
+
+User = get_user_model()
+
+
+class ViewCountTests(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.author = User.objects.create_user(username='author')
+        cls.post = Post.objects.create(author=cls.author, text='Пост')
+        cls.other = Post.objects.create(author=cls.author, text='Другой')
+
+    def setUp(self):
+        cache.clear()
+        buffer.take()
+
+    def test_views_are_buffered_until_flush(self):
+        for _ in range(3):
+            count_view(self.post.pk)
+        count_view(self.other.pk)
+        self.post.refresh_from_db()
+        self.assertEqual(self.post.views, 0)
+        # Два UPDATE и точка сохранения транзакции теста вокруг них.
+        with self.assertNumQueries(4):
+            self.assertEqual(buffer.flush(), 4)
+        self.assertEqual(
+            dict(Post.objects.values_list('pk', 'views')),
+            {self.post.pk: 3, self.other.pk: 1}
+        )
+
+    def test_equal_counts_share_one_update(self):
+        count_view(self.post.pk)
+        count_view(self.other.pk)
+        with self.assertNumQueries(3):
+            buffer.flush()
+
+    @mock.patch('posts.view_counts.atexit.register')
+    def test_worker_exit_flushes_buffer(self, register):
+        flush_at_exit()
+        register.assert_called_once_with(buffer.flush)
+
+    @override_settings(VIEW_FLUSH_SIZE=1)
+    def test_detail_page_flushes_after_response(self):
+        self.client.get(reverse('posts:post_detail', args=[self.post.pk]))
+        self.post.refresh_from_db()
+        self.assertEqual(self.post.views, 1)
+        self.assertFalse(buffer.pending)
+
+    def test_edit_keeps_flushed_views(self):
+        post = Post.objects.get(pk=self.post.pk)
+        count_view(self.post.pk)
+        buffer.flush()
+        post.text = 'Новый текст'
+        post.save()
+        post.refresh_from_db()
+        self.assertEqual((post.text, post.views), ('Новый текст', 1))
+
+    def test_popular_posts_sorted_by_views(self):
+        count_view(self.other.pk)
+        buffer.flush()
+        self.assertEqual(popular_posts(), [self.other, self.post])
+        response = self.client.get(reverse('posts:popular'))
+        self.assertEqual(list(response.context['page_obj']), [
+            self.other, self.post
+        ])
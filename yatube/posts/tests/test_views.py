@@ -8,8 +8,16 @@ from django.test import Client, TestCase, override_settings
 from django.urls import reverse
 from django.core.files.uploadedfile import SimpleUploadedFile
 from django.core.cache import cache
+from django.http import Http404
 
+from core.caching.objects import cached_get_object_or_404
+
+from ..cache import card_key, count_key
 from ..models import Post, Group, Follow
+from ..follow_graph import (
+    followed_among, followee_ids, follower_ids, is_following,
+)
+from ..paginator import FeedPaginator
 
 User = get_user_model()
 
@@ -308,3 +316,187 @@ class FollowViewsTest(TestCase):
             'posts:follow_index'
         ))
         self.assertNotIn(post, response.context['page_obj'].object_list)
+
+
+class PostCardCacheTests(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.user = User.objects.create_user(username='card_author')
+        cls.post = Post.objects.create(author=cls.user, text='Старый пост')
+
+    def setUp(self):
+        cache.clear()
+        self.guest_client = Client()
+
+    def test_card_is_cached_by_update_stamp(self):
+        """Карточка поста кэшируется по id и времени изменения."""
+        self.guest_client.get(reverse('posts:index'))
+        self.assertIsNotNone(cache.get(card_key(self.post)))
+        self.post.text = 'Новый текст'
+        self.post.save()
+        self.assertIsNone(cache.get(card_key(self.post)))
+
+    def test_card_follows_author_and_group_renames(self):
+        """Смена имени автора или адреса группы меняет ключ карточки."""
+        author = User.objects.create_user(username='old_name')
+        group = Group.objects.create(title='Группа', slug='old-slug')
+        post = Post.objects.create(author=author, group=group, text='Пост')
+        old_card = card_key(Post.objects.get(pk=post.pk))
+        author.username = 'new_name'
+        author.save()
+        renamed = card_key(Post.objects.get(pk=post.pk))
+        self.assertNotEqual(renamed, old_card)
+        group.slug = 'new-slug'
+        group.save()
+        self.assertNotEqual(card_key(Post.objects.get(pk=post.pk)), renamed)
+
+    def test_new_post_resets_page_shell(self):
+        """Новый пост сбрасывает оболочку страницы, карточки остаются."""
+        first_state = self.guest_client.get(reverse('posts:index'))
+        old_card = card_key(Post.objects.get(pk=self.post.pk))
+        Post.objects.create(author=self.user, text='Свежий пост')
+        second_state = self.guest_client.get(reverse('posts:index'))
+        self.assertNotEqual(first_state.content, second_state.content)
+        self.assertContains(second_state, 'Свежий пост')
+        self.assertIsNotNone(cache.get(old_card))
+
+
+class FeedPaginatorTests(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.user = User.objects.create_user(username='count_author')
+        cls.group = Group.objects.create(
+            title='count_group',
+            slug='count_slug',
+            description='Тестовое описание',
+        )
+
+    def setUp(self):
+        cache.clear()
+        self.guest_client = Client()
+
+    def test_elided_page_range(self):
+        """Ссылки на страницы ограничены окном вокруг текущей."""
+        paginator = FeedPaginator(range(5000), 10)
+        self.assertEqual(
+            list(paginator.get_elided_page_range(250)),
+            [1, 2, '…', 247, 248, 249, 250, 251, 252, 253, '…', 499, 500]
+        )
+        self.assertEqual(
+            list(FeedPaginator(range(30), 10).get_elided_page_range(2)),
+            [1, 2, 3]
+        )
+
+    def test_feed_count_is_cached_and_maintained(self):
+        """Счётчик ленты считается один раз и сдвигается сигналами."""
+        Post.objects.create(author=self.user, text='Пост', group=self.group)
+        self.guest_client.get(
+            reverse('posts:group_list', kwargs={'slug': 'count_slug'})
+        )
+        self.assertEqual(cache.get(count_key('group', self.group.pk)), 1)
+        post = Post.objects.create(
+            author=self.user, text='Ещё пост', group=self.group
+        )
+        self.assertEqual(cache.get(count_key('group', self.group.pk)), 2)
+        post.group = None
+        post.save()
+        self.assertEqual(cache.get(count_key('group', self.group.pk)), 1)
+        with self.assertNumQueries(0):
+            FeedPaginator(
+                Post.objects.all(), 10, feed=('group', self.group.pk)
+            ).count
+
+
+class FollowGraphTests(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.reader = User.objects.create_user(username='reader')
+        cls.author = User.objects.create_user(username='writer')
+        cls.other = User.objects.create_user(username='other_writer')
+
+    def setUp(self):
+        cache.clear()
+        self.reader_client = Client()
+        self.reader_client.force_login(self.reader)
+
+    def test_profile_shows_following(self):
+        """Профиль знает, подписан ли на автора текущий пользователь."""
+        url = reverse('posts:profile', kwargs={'username': 'writer'})
+        self.assertFalse(self.reader_client.get(url).context['following'])
+        self.reader_client.get(
+            reverse('posts:profile_follow', kwargs={'username': 'writer'})
+        )
+        self.assertTrue(self.reader_client.get(url).context['following'])
+        self.reader_client.get(
+            reverse('posts:profile_unfollow', kwargs={'username': 'writer'})
+        )
+        self.assertFalse(self.reader_client.get(url).context['following'])
+
+    def test_graph_is_cached_and_batch_queryable(self):
+        """Граф грузится одним запросом, проверка пачки авторов без БД."""
+        Follow.objects.create(user=self.reader, author=self.author)
+        with self.assertNumQueries(1):
+            followee_ids(self.reader.pk)
+        with self.assertNumQueries(0):
+            self.assertEqual(
+                followed_among(
+                    self.reader, [self.author.pk, self.other.pk]
+                ),
+                {self.author.pk}
+            )
+            self.assertTrue(is_following(self.reader, self.author.pk))
+        self.assertEqual(list(follower_ids(self.author.pk)), [self.reader.pk])
+
+
+class ObjectCacheTests(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.user = User.objects.create_user(username='cached_author')
+        cls.group = Group.objects.create(
+            title='cached_group',
+            slug='cached_slug',
+            description='Тестовое описание',
+        )
+
+    def setUp(self):
+        cache.clear()
+
+    def test_lookup_is_read_through(self):
+        """Повторный поиск группы и автора не обращается к базе."""
+        cached_get_object_or_404(Group, slug='cached_slug')
+        cached_get_object_or_404(User, username='cached_author')
+        with self.assertNumQueries(0):
+            group = cached_get_object_or_404(Group, slug='cached_slug')
+            author = cached_get_object_or_404(User, username='cached_author')
+        self.assertEqual(group, self.group)
+        self.assertEqual(author, self.user)
+
+    def test_save_and_delete_invalidate(self):
+        """Сохранение и удаление сбрасывают закэшированный объект."""
+        cached_get_object_or_404(Group, slug='cached_slug')
+        self.group.title = 'Новое название'
+        self.group.save()
+        self.assertEqual(
+            cached_get_object_or_404(Group, slug='cached_slug').title,
+            'Новое название'
+        )
+        self.group.slug = 'renamed_slug'
+        self.group.save()
+        with self.assertRaises(Http404):
+            cached_get_object_or_404(Group, slug='cached_slug')
+        Group.objects.get(pk=self.group.pk).delete()
+        with self.assertRaises(Http404):
+            cached_get_object_or_404(Group, slug='renamed_slug')
+
+    def test_missing_object_is_cached(self):
+        """Несуществующий адрес кэшируется, созданный объект виден сразу."""
+        url = reverse('posts:group_list', kwargs={'slug': 'new_slug'})
+        self.assertEqual(self.client.get(url).status_code, 404)
+        with self.assertNumQueries(0):
+            self.assertEqual(self.client.get(url).status_code, 404)
+        Group.objects.create(title='new', slug='new_slug', description='-')
+        self.assertEqual(self.client.get(url).status_code, 200)
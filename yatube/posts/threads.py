@@ -0,0 +1,96 @@
+"""Ветки комментариев на материализованном пути.
+
+Путь комментария — id всех предков и его собственный, каждый записан
+SEGMENT символами base36. Сортировка по пути даёт обход дерева в глубину,
+поддерево — это диапазон [path, path + '~'), так что любая выборка —
+один запрос по индексу (post, path). Ветка — корневой комментарий и
+всё под ним; страницы веток листаются курсором по пути корня.
+"""
+from django.db import connections
+from django.db.models import prefetch_related_objects
+
+from .models import Comment
+
+SEGMENT = 8
+ALPHABET = '0123456789abcdefghijklmnopqrstuvwxyz'
+# Больше любого символа ALPHABET: path + AFTER_ALL ограничивает поддерево.
+AFTER_ALL = '~'
+MAX_DEPTH = 4
+THREADS_PER_PAGE = 10
+REPLIES_PER_THREAD = 3
+COMMENTS_PER_PAGE = 50
+
+
+def encode(pk):
+    chars = []
+    for _ in range(SEGMENT):
+        pk, digit = divmod(pk, len(ALPHABET))
+        chars.append(ALPHABET[digit])
+    return ''.join(reversed(chars))
+
+
+def thread_page(post, after=''):
+    """Первые THREADS_PER_PAGE веток после курсора, в каждой — корень и
+    первые REPLIES_PER_THREAD ответов; одним запросом, который читает
+    только ветки страницы и корень следующей.
+
+    Возвращает комментарии в порядке пути и курсор следующей страницы.
+    У корня обрезанной ветки выставлен атрибут more.
+    """
+    connection = connections[post._state.db]
+    table = connection.ops.quote_name(Comment._meta.db_table)
+    root = f'substr(path, 1, {SEGMENT})'
+    # Оконные функции считаются только по веткам страницы: сначала
+    # берутся пути её корней, потом диапазон от первого до конца последнего.
+    comments = list(Comment.objects.raw(
+        f'WITH roots AS ('
+        f'SELECT path FROM {table} '
+        f'WHERE post_id = %s AND depth = 0 AND path > %s '
+        f'ORDER BY path LIMIT %s'
+        f') '
+        f'SELECT * FROM ('
+        f'SELECT *, '
+        f'DENSE_RANK() OVER (ORDER BY {root}) AS thread_rank, '
+        f'ROW_NUMBER() OVER (PARTITION BY {root} ORDER BY path) AS position '
+        f'FROM {table} WHERE post_id = %s '
+        f'AND path >= (SELECT MIN(path) FROM roots) '
+        f'AND path < (SELECT MAX(path) FROM roots) || %s'
+        f') ranked '
+        f'WHERE position <= %s ORDER BY path',
+        [
+            post.pk, after, THREADS_PER_PAGE + 1,
+            post.pk, AFTER_ALL, REPLIES_PER_THREAD + 2,
+        ]
+    ).using(post._state.db))
+    next_cursor = None
+    if comments and comments[-1].thread_rank > THREADS_PER_PAGE:
+        comments = [c for c in comments if c.thread_rank <= THREADS_PER_PAGE]
+        next_cursor = comments[-1].path[:SEGMENT]
+    page = []
+    for comment in comments:
+        if comment.position == 1:
+            thread = comment
+        if comment.position > REPLIES_PER_THREAD + 1:
+            thread.more = True
+        else:
+            page.append(comment)
+    prefetch_related_objects(page, 'author')
+    return page, next_cursor
+
+
+def subtree_page(root, after=''):
+    """Ветка целиком, по COMMENTS_PER_PAGE комментариев за запрос."""
+    comments = Comment.objects.using(root._state.db).filter(
+        post_id=root.post_id, path__lt=root.path + AFTER_ALL
+    )
+    if after:
+        comments = comments.filter(path__gt=max(after, root.path))
+    else:
+        comments = comments.filter(path__gte=root.path)
+    comments = list(comments.order_by('path')[:COMMENTS_PER_PAGE + 1])
+    prefetch_related_objects(comments, 'author')
+    next_cursor = None
+    if len(comments) > COMMENTS_PER_PAGE:
+        comments = comments[:COMMENTS_PER_PAGE]
+        next_cursor = comments[-1].path
+    return comments, next_cursor
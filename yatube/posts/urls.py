@@ -7,9 +7,38 @@ app_name = 'posts'
 urlpatterns = [
     path('', views.index, name='index'),
     path('group/<slug:slug>/', views.group_posts, name='group_list'),
+    path(
+        'group/<slug:slug>/events/',
+        views.group_events,
+        name='group_events'
+    ),
     path('profile/<str:username>/', views.profile, name='profile'),
+    path(
+        'profile/<str:username>/mentions/',
+        views.mentions,
+        name='mentions'
+    ),
+    path('tags/<str:name>/', views.tag_posts, name='tag_posts'),
     path('posts/<int:post_id>/', views.post_detail, name='post_detail'),
     path('posts/<int:post_id>/edit/', views.post_edit, name='post_edit'),
+    path(
+        'posts/<int:post_id>/comments/<int:comment_id>/',
+        views.comment_thread,
+        name='comment_thread'
+    ),
+    path('posts/<int:post_id>/like/', views.post_like, name='post_like'),
+    path(
+        'posts/<int:post_id>/unlike/',
+        views.post_unlike,
+        name='post_unlike'
+    ),
+    path('likes/', views.likes, name='likes'),
+    path('popular/', views.popular, name='popular'),
+    path(
+        'autocomplete/<str:kind>/',
+        views.autocomplete,
+        name='autocomplete'
+    ),
     path('create/', views.post_create, name="post_create"),
     path(
         'posts/<int:post_id>/comment/',
@@ -17,6 +46,10 @@ urlpatterns = [
         name='add_comment'
     ),
     path('follow/', views.follow_index, name='follow_index'),
+    path('follow/events/', views.follow_events, name='follow_events'),
+    path('follow/bulk/', views.follow_bulk, name='follow_bulk'),
+    path('events/stats/', views.event_stats, name='event_stats'),
+    path('notifications/', views.notifications, name='notifications'),
     path(
         'profile/<str:username>/follow/',
         views.profile_follow,
@@ -0,0 +1,112 @@
+"""Просмотры постов с отложенной записью.
+
+Просмотр только увеличивает счётчик в памяти процесса, запрос на чтение
+остаётся чтением. После ответа, если прошло VIEW_FLUSH_SECONDS или в
+буфере набралось VIEW_FLUSH_SIZE постов, буфер сбрасывается пачкой
+UPDATE ... SET views = views + n — по запросу на каждое различное n в
+базе поста. Воркеры пишут независимо: прибавление не затирает чужое.
+
+Сброс проверяется только по окончании запроса, поэтому у простаивающего
+воркера просмотры лежат в памяти до следующего запроса. При обычном
+завершении процесса буфер сбрасывает обработчик atexit (его ставит
+wsgi.py через flush_at_exit); пропадают только просмотры с последнего
+сброса при аварийном завершении (SIGKILL, падение). Ошибка базы при
+сбросе возвращает счётчики в буфер до следующей попытки.
+"""
+import atexit
+import heapq
+import threading
+import time
+from collections import Counter, defaultdict
+
+from django.conf import settings
+from django.db import DatabaseError, transaction
+from django.db.models import F
+
+from .models import Post
+from .sharding import attach_relations, db_for_post, is_sharded
+
+POPULAR_LIMIT = 50
+
+
+class ViewBuffer:
+    """Несброшенные просмотры процесса, общие для всех потоков."""
+
+    def __init__(self):
+        self.pending = Counter()
+        self.lock = threading.Lock()
+        self.next_flush = time.monotonic() + settings.VIEW_FLUSH_SECONDS
+
+    def add(self, post_id):
+        with self.lock:
+            self.pending[post_id] += 1
+
+    def due(self):
+        return self.pending and (
+            len(self.pending) >= settings.VIEW_FLUSH_SIZE
+            or time.monotonic() >= self.next_flush
+        )
+
+    def take(self):
+        with self.lock:
+            pending, self.pending = self.pending, Counter()
+            self.next_flush = time.monotonic() + settings.VIEW_FLUSH_SECONDS
+        return pending
+
+    def flush(self):
+        """Пишет буфер в базы; возвращает число записанных просмотров."""
+        batches = defaultdict(lambda: defaultdict(list))
+        for post_id, count in self.take().items():
+            batches[db_for_post(post_id)][count].append(post_id)
+        written = 0
+        for using, by_count in batches.items():
+            try:
+                write(using, by_count)
+            except DatabaseError:
+                with self.lock:
+                    for count, post_ids in by_count.items():
+                        for post_id in post_ids:
+                            self.pending[post_id] += count
+                continue
+            written += sum(
+                count * len(post_ids) for count, post_ids in by_count.items()
+            )
+        return written
+
+
+def write(using, by_count):
+    with transaction.atomic(using=using):
+        for count, post_ids in by_count.items():
+            Post.objects.using(using).filter(pk__in=post_ids).update(
+                views=F('views') + count
+            )
+
+
+buffer = ViewBuffer()
+
+
+def count_view(post_id):
+    buffer.add(post_id)
+
+
+def flush_at_exit():
+    """Сбрасывает буфер при завершении процесса-воркера."""
+    atexit.register(buffer.flush)
+
+
+def popular_posts(limit=POPULAR_LIMIT):
+    """Самые просматриваемые посты; при шардах — слияние топов шардов."""
+    if not is_sharded():
+        return list(
+            Post.objects.select_related('author', 'group').order_by(
+                '-views', '-pk'
+            )[:limit]
+        )
+    tops = [
+        Post.objects.using(shard).order_by('-views', '-pk')[:limit]
+        for shard in settings.POST_SHARDS
+    ]
+    posts = heapq.merge(
+        *tops, key=lambda post: (post.views, post.pk), reverse=True
+    )
+    return attach_relations(list(posts)[:limit])
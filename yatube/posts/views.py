@@ -1,65 +1,145 @@
+from django.contrib.admin.views.decorators import staff_member_required
 from django.contrib.auth.decorators import login_required
-from django.core.paginator import Paginator
+from django.http import Http404, JsonResponse, StreamingHttpResponse
+from django.views.decorators.csrf import ensure_csrf_cookie
+from django.views.decorators.http import require_POST
 from django.shortcuts import render, get_object_or_404, redirect
 
-from .models import Post, Group, User, Follow
-from .forms import PostForm, CommentForm
+from core.caching.objects import cached_get_object_or_404
+from .autocomplete import SOURCES, search
+from .cache import feed_count, feed_stamp
+from .events import dispatcher, stream
+from .follow_graph import followee_ids, is_following
+from .models import Comment, Post, Group, Tag, User, Follow
+from .notifications import mark_read
+from .follows import follow_many, resolve_usernames, unfollow_many
+from .likes import MAX_POST_IDS, like, like_states, unlike
+from .forms import BulkFollowForm, PostForm, CommentForm
+from .paginator import get_page_obj
+from .sharding import feed, posts_by_id
+from .tags import keyset_page
+from .threads import subtree_page, thread_page
+from .view_counts import count_view, popular_posts
+
+# Дальше этой границы ленту подписок выбираем через JOIN, а не IN (...).
+FOLLOW_IN_LIMIT = 500
 
 
 def index(request):
-    post_list = Post.objects.all()
-    paginator = Paginator(post_list, 10)
-    page_number = request.GET.get('page')
-    page_obj = paginator.get_page(page_number)
+    post_list = feed(Post.objects.select_related('author', 'group'))
+    page_obj = get_page_obj(request, post_list, 'index')
     context = {
         'page_obj': page_obj,
+        'feed_stamp': feed_stamp('index'),
+        'index': True,
     }
     return render(request, 'posts/index.html', context)
 
 
 def group_posts(request, slug):
-    group = get_object_or_404(Group, slug=slug)
-    post_list = group.posts.all()
-    paginator = Paginator(post_list, 10)
-    page_number = request.GET.get('page')
-    page_obj = paginator.get_page(page_number)
+    group = cached_get_object_or_404(Group, slug=slug)
+    post_list = feed(
+        group.posts.select_related('author', 'group'), group_id=group.pk
+    )
+    page_obj = get_page_obj(request, post_list, 'group', group.pk)
     context = {
         'group': group,
         'page_obj': page_obj,
+        'feed_stamp': feed_stamp('group', group.pk),
     }
 
     return render(request, 'posts/group_list.html', context)
 
 
 def profile(request, username):
-    author = get_object_or_404(User, username=username)
-    paginator = Paginator(author.posts.all(), 10)
-    page_number = request.GET.get('page')
-    page_obj = paginator.get_page(page_number)
+    author = cached_get_object_or_404(User, username=username)
+    post_list = feed(
+        author.posts.select_related('author', 'group'),
+        author_ids=[author.pk]
+    )
+    page_obj = get_page_obj(request, post_list, 'author', author.pk)
     context = {
         'author': author,
         'page_obj': page_obj,
+        'feed_stamp': feed_stamp('author', author.pk),
+        'following': is_following(request.user, author.pk),
     }
     return render(request, 'posts/profile.html', context)
 
 
 def post_detail(request, post_id):
-    post = get_object_or_404(Post, pk=post_id)
-    posts_count = Post.objects.filter(author=post.author).count
+    post = get_object_or_404(posts_by_id(post_id), pk=post_id)
+    count_view(post.pk)
+    posts_count = feed_count(
+        post.author.posts.all(), 'author', post.author_id
+    )
     form = CommentForm()
-    comments = post.comments.all()
+    comments, next_cursor = thread_page(post, request.GET.get('after', ''))
     context = {
         'post': post,
         'posts_count': posts_count,
         'comments': comments,
+        'next_cursor': next_cursor,
         'form': form,
+        'likes': like_states(request.user, [post.pk])[post.pk],
     }
     return render(request, 'posts/post_detail.html', context)
 
 
+def tag_posts(request, name):
+    """Лента тега, листается курсором."""
+    tag = cached_get_object_or_404(Tag, name=name.lower())
+    posts, next_cursor = keyset_page(
+        tag.entries.all(), request.GET.get('after', '')
+    )
+    context = {
+        'title': f'Записи с тегом #{tag.name}',
+        'posts': posts,
+        'next_cursor': next_cursor,
+    }
+    return render(request, 'posts/keyset_feed.html', context)
+
+
+def mentions(request, username):
+    """Посты, в которых упомянут пользователь."""
+    user = cached_get_object_or_404(User, username=username)
+    posts, next_cursor = keyset_page(
+        user.mentions.all(), request.GET.get('after', '')
+    )
+    context = {
+        'title': f'Упоминания @{user.username}',
+        'posts': posts,
+        'next_cursor': next_cursor,
+    }
+    return render(request, 'posts/keyset_feed.html', context)
+
+
+def popular(request):
+    """Самые просматриваемые посты."""
+    page_obj = get_page_obj(request, popular_posts())
+    return render(request, 'posts/popular.html', {'page_obj': page_obj})
+
+
+def comment_thread(request, post_id, comment_id):
+    """Ветка комментариев целиком, с курсором по пути."""
+    post = get_object_or_404(posts_by_id(post_id), pk=post_id)
+    root = get_object_or_404(
+        Comment.objects.using(post._state.db), pk=comment_id, post_id=post.pk
+    )
+    comments, next_cursor = subtree_page(root, request.GET.get('after', ''))
+    context = {
+        'post': post,
+        'root': root,
+        'comments': comments,
+        'next_cursor': next_cursor,
+        'form': CommentForm(),
+    }
+    return render(request, 'posts/comment_thread.html', context)
+
+
 @login_required
 def post_create(request):
-    form = PostForm(request.POST or None)
+    form = PostForm(request.POST or None, files=request.FILES or None)
     if form.is_valid():
         post = form.save(commit=False)
         post.author = request.user
@@ -70,7 +150,7 @@ def post_create(request):
 
 @login_required
 def post_edit(request, post_id):
-    edit_post = get_object_or_404(Post, id=post_id)
+    edit_post = get_object_or_404(posts_by_id(post_id), id=post_id)
     if request.user != edit_post.author:
         return redirect('posts:post_detail', post_id)
 
@@ -88,12 +168,15 @@ def post_edit(request, post_id):
 
 @login_required
 def add_comment(request, post_id):
-    post = get_object_or_404(Post, id=post_id)
+    post = get_object_or_404(posts_by_id(post_id), id=post_id)
     form = CommentForm(request.POST or None)
     if form.is_valid():
         comment = form.save(commit=False)
         comment.author = request.user
         comment.post = post
+        parent_id = request.POST.get('parent', '')
+        if parent_id.isdigit():
+            comment.parent = post.comments.filter(pk=parent_id).first()
         comment.save()
         return redirect('posts:post_detail', post.id)
     return render(
@@ -111,10 +194,15 @@ def follow_index(request):
     """
     Метод страницы постов авторов.
     """
-    posts = Post.objects.filter(author__following__user=request.user)
-    paginator = Paginator(posts, 10)
-    page_number = request.GET.get('page')
-    page_obj = paginator.get_page(page_number)
+    author_ids = followee_ids(request.user.pk)
+    if len(author_ids) <= FOLLOW_IN_LIMIT:
+        posts = Post.objects.filter(author_id__in=list(author_ids))
+    else:
+        posts = Post.objects.filter(author__following__user=request.user)
+    posts = feed(
+        posts.select_related('author', 'group'), author_ids=author_ids
+    )
+    page_obj = get_page_obj(request, posts, 'follow', request.user.pk)
     context = {
         'page_obj': page_obj,
         'index': False,
@@ -127,7 +215,7 @@ def follow_index(request):
 def profile_follow(request, username):
     """Делает подписку на автора."""
     user = request.user
-    author = get_object_or_404(User, username=username)
+    author = cached_get_object_or_404(User, username=username)
     if author != user:
         user.follower.get_or_create(
             user=user,
@@ -141,9 +229,120 @@ def profile_unfollow(request, username):
     """
     Метод отписки от автора.
     """
-    author = get_object_or_404(User, username=username)
+    author = cached_get_object_or_404(User, username=username)
     Follow.objects.filter(
         user=request.user,
         author=author
     ).delete()
     return redirect('posts:follow_index')
+
+
+@login_required
+def follow_bulk(request):
+    """Подписка на список пользователей или отписка от него."""
+    form = BulkFollowForm(request.POST or None, files=request.FILES or None)
+    result = None
+    if form.is_valid():
+        names = form.cleaned_data['names']
+        found = resolve_usernames(names)
+        action = unfollow_many if form.cleaned_data['unfollow'] else (
+            follow_many
+        )
+        result = {
+            'changed': action(request.user, found.values()),
+            'missing': [name for name in names if name not in found],
+        }
+    return render(
+        request, 'posts/follow_bulk.html', {'form': form, 'result': result}
+    )
+
+
+def event_stream(channels):
+    response = StreamingHttpResponse(
+        stream(channels), content_type='text/event-stream'
+    )
+    response['Cache-Control'] = 'no-cache'
+    response['X-Accel-Buffering'] = 'no'
+    return response
+
+
+@login_required
+def follow_events(request):
+    """SSE-поток о новых постах авторов, на которых подписан пользователь."""
+    return event_stream(
+        [('author', author_id) for author_id in followee_ids(request.user.pk)]
+    )
+
+
+def group_events(request, slug):
+    """SSE-поток о новых постах сообщества."""
+    group = cached_get_object_or_404(Group, slug=slug)
+    return event_stream([('group', group.pk)])
+
+
+@staff_member_required
+def event_stats(request):
+    """Подключения и задержка рассылки в этом процессе."""
+    return JsonResponse(dispatcher.stats())
+
+
+@login_required
+def notifications(request):
+    """Входящие уведомления; показанная страница считается прочитанной."""
+    page_obj = get_page_obj(
+        request, request.user.notifications.select_related('actor')
+    )
+    unread = [item.pk for item in page_obj if not item.is_read]
+    if unread:
+        mark_read(request.user, unread)
+    return render(
+        request, 'posts/notifications.html', {'page_obj': page_obj}
+    )
+
+
+def change_like(request, post_id, action):
+    if not posts_by_id(post_id).filter(pk=post_id).exists():
+        raise Http404
+    action(request.user, post_id)
+    if request.is_ajax():
+        return JsonResponse(like_states(request.user, [post_id])[post_id])
+    return redirect('posts:post_detail', post_id)
+
+
+@login_required
+@require_POST
+def post_like(request, post_id):
+    return change_like(request, post_id, like)
+
+
+@login_required
+@require_POST
+def post_unlike(request, post_id):
+    return change_like(request, post_id, unlike)
+
+
+@ensure_csrf_cookie
+def likes(request):
+    """Лайки и отметки пользователя для постов страницы ленты;
+    заодно ставит cookie с CSRF-токеном для кнопок лайка."""
+    post_ids = [
+        int(value) for value in request.GET.get('ids', '').split(',')
+        if value.isdigit()
+    ][:MAX_POST_IDS]
+    return JsonResponse({
+        'authenticated': request.user.is_authenticated,
+        'posts': like_states(request.user, post_ids),
+    })
+
+
+@login_required
+def autocomplete(request, kind):
+    """Подсказки для формы поста: kind — users или groups, ?q= — начало
+    имени. Ищутся в индексе процесса, без запросов к базе."""
+    if kind not in SOURCES:
+        raise Http404
+    prefix = request.GET.get('q', '').strip()[:150]
+    return JsonResponse({'results': [
+        {'id': pk, 'value': value, 'label': label}
+        for pk, value, label in search(kind, prefix)
+    ]})
@@ -0,0 +1,25 @@
+from django.contrib.auth import get_user_model
+from django.contrib.auth.backends import ModelBackend
+from django.core.cache import cache
+
+from core.caching.objects import OBJECT_TIMEOUT, object_key
+
+User = get_user_model()
+
+
+class CachedModelBackend(ModelBackend):
+    """ModelBackend, который берёт пользователя сессии из кэша.
+
+    Запись общая с кэшем объектов core.caching и сбрасывается при
+    сохранении пользователя, в том числе при смене пароля.
+    """
+
+    def get_user(self, user_id):
+        key = object_key(User, user_id)
+        user = cache.get(key)
+        if user is None:
+            user = super().get_user(user_id)
+            if user is not None:
+                cache.set(key, user, OBJECT_TIMEOUT)
+            return user
+        return user if self.user_can_authenticate(user) else None
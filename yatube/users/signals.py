@@ -0,0 +1,16 @@
+from django.contrib.auth import get_user_model, user_logged_out
+from django.core.cache import cache
+from django.dispatch import receiver
+
+from core.caching import objects as object_cache
+
+User = get_user_model()
+
+object_cache.register(User, 'username')
+
+
+@receiver(user_logged_out)
+def forget_logged_out_user(sender, request, user, **kwargs):
+    """После выхода пользователь сессии снова читается из базы."""
+    if user is not None:
+        cache.delete(object_cache.object_key(User, user.pk))
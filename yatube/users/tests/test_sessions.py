@@ -0,0 +1,74 @@
+from datetime import timedelta
+from io import StringIO
+
+from django.contrib.auth import get_user_model
+from django.contrib.sessions.models import Session
+from django.core.cache import cache
+from django.core.management import call_command
+from django.test import Client, TestCase
+from django.urls import reverse
+from django.utils import timezone
+
+from core.caching.objects import object_key
+from users.backends import CachedModelBackend
+
+User = get_user_model()
+
+
+class AuthFastPathTests(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.user = User.objects.create_user(
+            username='session_user', password='old_password'
+        )
+
+    def setUp(self):
+        cache.clear()
+        self.authorized_client = Client()
+        self.authorized_client.force_login(self.user)
+
+    def test_cached_auth_needs_no_queries(self):
+        """Сессия и пользователь при попадании в кэш не читаются из БД."""
+        url = reverse('about:author')
+        self.authorized_client.get(url)
+        with self.assertNumQueries(0):
+            response = self.authorized_client.get(url)
+        self.assertEqual(response.context['user'], self.user)
+
+    def test_password_change_and_logout_invalidate(self):
+        """Смена пароля и выход сбрасывают закэшированного пользователя."""
+        backend = CachedModelBackend()
+        backend.get_user(self.user.pk)
+        self.assertIsNotNone(cache.get(object_key(User, self.user.pk)))
+        self.user.set_password('new_password')
+        self.user.save()
+        self.assertIsNone(cache.get(object_key(User, self.user.pk)))
+        self.authorized_client.force_login(self.user)
+        self.authorized_client.get(reverse('about:author'))
+        self.assertIsNotNone(cache.get(object_key(User, self.user.pk)))
+        self.authorized_client.get(reverse('users:logout'))
+        self.assertIsNone(cache.get(object_key(User, self.user.pk)))
+
+
+class ClearExpiredSessionsTests(TestCase):
+    def test_only_expired_sessions_are_deleted(self):
+        now = timezone.now()
+        for number in range(5):
+            Session.objects.create(
+                session_key=f'expired{number}',
+                session_data='',
+                expire_date=now - timedelta(days=1),
+            )
+        Session.objects.create(
+            session_key='alive',
+            session_data='',
+            expire_date=now + timedelta(days=1),
+        )
+        call_command(
+            'clear_expired_sessions', chunk_size=2, pause=0, stdout=StringIO()
+        )
+        self.assertEqual(
+            list(Session.objects.values_list('session_key', flat=True)),
+            ['alive']
+        )
@@ -38,12 +38,14 @@ INSTALLED_APPS = [
 
 MIDDLEWARE = [
     'django.middleware.security.SecurityMiddleware',
+    'core.middleware.StaticFilesMiddleware',
     'django.contrib.sessions.middleware.SessionMiddleware',
     'django.middleware.common.CommonMiddleware',
     'django.middleware.csrf.CsrfViewMiddleware',
     'django.contrib.auth.middleware.AuthenticationMiddleware',
     'django.contrib.messages.middleware.MessageMiddleware',
     'django.middleware.clickjacking.XFrameOptionsMiddleware',
+    'core.middleware.ReadReplicaMiddleware',
 ]
 
 ROOT_URLCONF = 'yatube.urls'
@@ -60,6 +62,7 @@ TEMPLATES = [
                 'django.contrib.auth.context_processors.auth',
                 'django.contrib.messages.context_processors.messages',
                 'core.context_processors.year.year',
+                'core.context_processors.notifications.unread_notifications',
             ],
         },
     },
@@ -73,11 +76,60 @@ WSGI_APPLICATION = 'yatube.wsgi.application'
 
 DATABASES = {
     'default': {
-        'ENGINE': 'django.db.backends.sqlite3',
+        # sqlite3 с PRAGMA из OPTIONS и повтором при «database is locked».
+        'ENGINE': 'core.db.sqlite3',
         'NAME': os.path.join(BASE_DIR, 'db.sqlite3'),
+        'CONN_MAX_AGE': 600,
+        'OPTIONS': {
+            'pragmas': {
+                'journal_mode': 'WAL',
+                'synchronous': 'NORMAL',
+                'busy_timeout': 5000,
+                'mmap_size': 268435456,
+                'cache_size': -20000,
+                'temp_store': 'MEMORY',
+            },
+            'lock_retries': 5,
+            'lock_backoff': 0.05,
+        },
     }
 }
 
+# Реплики для чтения. Локально это копия основной базы, которую
+# обновляет manage.py sync_replica.
+DATABASE_REPLICAS = []
+if os.environ.get('YATUBE_READ_REPLICA'):
+    DATABASES['replica'] = {
+        **DATABASES['default'],
+        'NAME': os.path.join(BASE_DIR, 'db_replica.sqlite3'),
+        'TEST': {'MIRROR': 'default'},
+    }
+    DATABASE_REPLICAS = ['replica']
+
+# Шарды постов и комментариев, распределённых по авторам. Локально это
+# файлы db_shardN.sqlite3, их число задаёт YATUBE_POST_SHARDS.
+POST_SHARDS = []
+POST_SHARD_BUCKETS = 1024
+for number in range(int(os.environ.get('YATUBE_POST_SHARDS', 0))):
+    alias = f'shard{number}'
+    DATABASES[alias] = {
+        **DATABASES['default'],
+        'NAME': os.path.join(BASE_DIR, f'db_{alias}.sqlite3'),
+    }
+    POST_SHARDS.append(alias)
+
+DATABASE_ROUTERS = [
+    'posts.sharding.ShardRouter',
+    'core.db.routers.ReplicaRouter',
+]
+REPLICA_READ_VIEWS = [
+    'posts:index',
+    'posts:group_list',
+    'posts:profile',
+    'posts:post_detail',
+]
+REPLICA_PIN_SECONDS = 10
+
 
 # Password validation
 # https://docs.djangoproject.com/en/2.2/ref/settings/#auth-password-validators
@@ -97,11 +149,33 @@ AUTH_PASSWORD_VALIDATORS = [
     },
 ]
 
+AUTHENTICATION_BACKENDS = ['users.backends.CachedModelBackend']
+
+# default — LRU в памяти процесса перед общим кэшем 'shared'.
+# Без YATUBE_CACHE_DIR 'shared' тоже живёт в памяти: так работают тесты
+# и однопроцессный runserver; несколько воркеров делят каталог кэша.
 CACHES = {
     'default': {
+        'BACKEND': 'core.caching.backends.TwoTierCache',
+        'LOCATION': 'shared',
+        'OPTIONS': {
+            'L1_MAX_ENTRIES': 1000,
+            'L1_TIMEOUT': 5,
+            'SYNC_INTERVAL': 0.5,
+        },
+    },
+    'shared': {
         'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
-    }
+    },
 }
+if os.getenv('YATUBE_CACHE_DIR'):
+    CACHES['shared'] = {
+        'BACKEND': 'django.core.cache.backends.filebased.FileBasedCache',
+        'LOCATION': os.getenv('YATUBE_CACHE_DIR'),
+        'OPTIONS': {'MAX_ENTRIES': 100_000},
+    }
+
+SESSION_ENGINE = 'django.contrib.sessions.backends.cached_db'
 
 # Internationalization
 # https://docs.djangoproject.com/en/2.2/topics/i18n/
@@ -122,10 +196,37 @@ USE_TZ = True
 
 STATIC_URL = '/static/'
 STATICFILES_DIRS = [os.path.join(BASE_DIR, 'static')]
+STATIC_ROOT = os.path.join(BASE_DIR, 'collected_static')
+STATICFILES_STORAGE = 'core.storage.CompressedManifestStaticFilesStorage'
 LOGIN_URL = 'users:login'
 LOGIN_REDIRECT_URL = 'posts:index'
 EMAIL_BACKEND = 'django.core.mail.backends.filebased.EmailBackend'
 EMAIL_FILE_PATH = os.path.join(BASE_DIR, 'sent_emails')
+DEFAULT_FROM_EMAIL = 'noreply@yatube.ru'
+# Адрес сайта для ссылок в письмах.
+SITE_URL = os.getenv('YATUBE_SITE_URL', 'http://127.0.0.1:8000')
 CSRF_FAILURE_VIEW = 'core.views.csrf_failure'
 MEDIA_URL = '/media/'
 MEDIA_ROOT = os.path.join(BASE_DIR, 'media')
+# Кому отдавать файлы из MEDIA_ROOT: '' — сам Django через sendfile,
+# 'x-accel-redirect' — nginx (internal-локация MEDIA_ACCEL_PREFIX),
+# 'x-sendfile' — Apache/lighttpd.
+MEDIA_ACCEL = os.getenv('YATUBE_MEDIA_ACCEL', '')
+MEDIA_ACCEL_PREFIX = '/protected-media/'
+# Загрузки сразу пишутся во временный файл, хэш считается на лету.
+FILE_UPLOAD_HANDLERS = ['core.uploads.HashingUploadHandler']
+# Проверка заголовка при загрузке и ограничение для normalize_images.
+IMAGE_FORMATS = ['JPEG', 'PNG', 'GIF', 'WEBP']
+IMAGE_MAX_PIXELS = 50_000_000
+IMAGE_MAX_SIDE = 2048
+
+# Строк в счётчике лайков одного поста, см. posts.likes.
+LIKE_COUNTER_SHARDS = 8
+# Буфер просмотров процесса сбрасывается в базу не реже, см. posts.view_counts.
+VIEW_FLUSH_SECONDS = 10
+VIEW_FLUSH_SIZE = 1000
+# 'flag', 'collapse', 'reject' или '' — см. posts.duplicates.
+DUPLICATE_POLICY = os.getenv('YATUBE_DUPLICATE_POLICY', 'flag')
+# Сверка со штампом и полная пересборка индексов, см. posts.autocomplete.
+AUTOCOMPLETE_CHECK_SECONDS = 5
+AUTOCOMPLETE_REBUILD_SECONDS = 15 * 60
@@ -10,7 +10,21 @@ https://docs.djangoproject.com/en/2.2/howto/deployment/wsgi/
 import os
 
 from django.core.wsgi import get_wsgi_application
+from django.db import DatabaseError
 
 os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'yatube.settings')
 
 application = get_wsgi_application()
+
+# Индексы автодополнения строятся при старте воркера, а не на первом
+# запросе; без базы (например, до миграций) их соберёт первый поиск.
+# Несброшенные просмотры пишутся в базу при остановке воркера.
+from posts.autocomplete import warm_up  # noqa: E402
+from posts.view_counts import flush_at_exit  # noqa: E402
+
+flush_at_exit()
+
+try:
+    warm_up()
+except DatabaseError:
+    pass